@@ -1,21 +1,25 @@
 import streamlit as st
-import google.generativeai as genai
-import PyPDF2
-import pytesseract
-from PIL import Image
 import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
-import json
 import re
 import os
-import io
-from typing import List, Dict, Any
-from dataclasses import dataclass
+from typing import List, Optional
 import time
 from dotenv import load_dotenv
-from config import AVAILABLE_MODELS, KEMENTERIAN_LEMBAGA_INDONESIA, DEFAULT_MODEL
+from config import Config, AVAILABLE_MODELS, KEMENTERIAN_LEMBAGA_INDONESIA, EXTRACTION_MODES
 from export_utils import create_excel_report, create_pdf_report
+from document_processor import DocumentProcessor
+from gemini_analyzer import GeminiAnalyzer
+from ocr_utils import ocr_stats
+from metrics import llm_metrics
+from resilience import circuit_states
+from dedup_utils import find_duplicate_uploads, DUPLICATE_EXACT
+from job_runner import JobRunner, JobContext, JOB_QUEUED, JOB_RUNNING, JOB_DONE, JOB_FAILED
+from pipeline import (
+    run_overlap_analysis, PipelineState, PHASE_OVERLAP,
+    FILE_WAITING, FILE_EXTRACTING, FILE_OCR, FILE_DONE, FILE_FAILED, AGENCY_ANALYZING
+)
 
 # Load environment variables
 load_dotenv()
@@ -127,305 +131,9 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
-@dataclass
-class InstansiData:
-    nama: str
-    tugas_pokok: List[str]
-    fungsi: List[str]
-    program: List[str]
-    kegiatan: List[str]
-    anggaran: str
-    target_sasaran: List[str]
-    dokumen_sumber: List[str]
-
-class DocumentProcessor:
-    def __init__(self):
-        # Set Tesseract path from environment variable
-        tesseract_cmd = os.getenv('TESSERACT_CMD')
-        if tesseract_cmd and os.path.exists(tesseract_cmd):
-            pytesseract.pytesseract.tesseract_cmd = tesseract_cmd
-    
-    def extract_text_from_pdf(self, pdf_file) -> str:
-        """Ekstrak teks dari PDF dengan fallback yang lebih robust"""
-        try:
-            # Reset file pointer
-            pdf_file.seek(0)
-            
-            # Coba ekstrak teks langsung
-            pdf_reader = PyPDF2.PdfReader(pdf_file)
-            text = ""
-            for page in pdf_reader.pages:
-                text += page.extract_text() + "\n"
-            
-            # Jika teks kosong atau minimal, gunakan OCR
-            if len(text.strip()) < 100:
-                return self.ocr_pdf_simple(pdf_file)
-            
-            return text
-        except Exception as e:
-            st.warning(f"Error ekstraksi PDF dengan PyPDF2: {e}")
-            return self.ocr_pdf_simple(pdf_file)
-    
-    def ocr_pdf_simple(self, pdf_file) -> str:
-        """OCR sederhana tanpa poppler dependency"""
-        try:
-            # Reset file pointer
-            pdf_file.seek(0)
-            
-            # Coba gunakan PyMuPDF sebagai alternatif yang lebih reliable
-            try:
-                import fitz  # PyMuPDF
-                
-                # Convert PDF to images using PyMuPDF
-                pdf_document = fitz.open(stream=pdf_file.read(), filetype="pdf")
-                text = ""
-                
-                for page_num in range(len(pdf_document)):
-                    page = pdf_document.load_page(page_num)
-                    
-                    # Convert to image
-                    pix = page.get_pixmap(matrix=fitz.Matrix(2, 2))  # 2x zoom for better quality
-                    img_data = pix.tobytes("png")
-                    
-                    # Convert to PIL Image
-                    image = Image.open(io.BytesIO(img_data))
-                    
-                    # OCR
-                    page_text = pytesseract.image_to_string(image, lang='ind+eng')
-                    text += f"\n--- Halaman {page_num + 1} ---\n{page_text}\n"
-                
-                pdf_document.close()
-                return text
-                
-            except ImportError:
-                # Fallback: basic text extraction without images
-                st.warning("⚠️ PyMuPDF tidak tersedia. Menggunakan ekstraksi teks dasar.")
-                
-                # Try alternative: extract what we can from PyPDF2
-                pdf_file.seek(0)
-                pdf_reader = PyPDF2.PdfReader(pdf_file)
-                text = ""
-                
-                for i, page in enumerate(pdf_reader.pages):
-                    page_text = page.extract_text()
-                    if page_text.strip():
-                        text += f"\n--- Halaman {i + 1} ---\n{page_text}\n"
-                
-                if not text.strip():
-                    return "Error: Tidak dapat mengekstrak teks dari PDF. Pastikan PDF tidak terenkripsi dan dapat dibaca."
-                
-                return text
-            
-        except Exception as e:
-            st.error(f"Error OCR: {e}")
-            return f"Error: Gagal memproses PDF - {str(e)}"
-    
-    def process_multiple_files(self, uploaded_files: List, file_names: List[str]) -> str:
-        """Proses multiple files untuk satu instansi"""
-        combined_text = ""
-        
-        for i, (file, name) in enumerate(zip(uploaded_files, file_names)):
-            st.info(f"📄 Memproses file {i+1}/{len(uploaded_files)}: {name}")
-            
-            # Extract text
-            text = self.extract_text_from_pdf(file)
-            
-            if text and not text.startswith("Error:"):
-                combined_text += f"\n\n{'='*50}\n"
-                combined_text += f"DOKUMEN: {name}\n"
-                combined_text += f"{'='*50}\n"
-                combined_text += text
-            else:
-                st.warning(f"⚠️ Gagal mengekstrak teks dari {name}: {text}")
-        
-        return combined_text
-
-class GeminiAnalyzer:
-    def __init__(self, api_key: str, model_name: str = DEFAULT_MODEL):
-        genai.configure(api_key=api_key)
-        self.model_name = model_name
-        self.model = genai.GenerativeModel(model_name)
-    
-    def extract_instansi_data(self, combined_text: str, nama_instansi: str, file_names: List[str]) -> InstansiData:
-        """Ekstrak data terstruktur dari multiple dokumen instansi"""
-        
-        # Batasi teks untuk efisiensi
-        limited_text = self._smart_text_limiting(combined_text, max_chars=6000)
-        
-        prompt = f"""
-        Analisis kumpulan dokumen instansi pemerintah Indonesia berikut dan ekstrak informasi dalam format JSON:
-
-        Nama Instansi: {nama_instansi}
-        Dokumen yang Dianalisis: {', '.join(file_names)}
-        
-        Dokumen Gabungan:
-        {limited_text}
-
-        INSTRUKSI EKSTRAKSI (Konteks Indonesia):
-        Dari berbagai dokumen di atas, ekstrak dan konsolidasi informasi berikut sesuai dengan konteks pemerintahan Indonesia:
-        
-        1. Tugas Pokok (tugas_pokok): tugas utama instansi berdasarkan peraturan perundang-undangan
-        2. Fungsi (fungsi): fungsi-fungsi spesifik yang disebutkan dalam SOTK atau dokumen resmi
-        3. Program (program): program kerja strategis sesuai Renstra/RPJMN
-        4. Kegiatan (kegiatan): kegiatan operasional spesifik dalam Renja/DIPA
-        5. Anggaran (anggaran): informasi alokasi anggaran APBN/APBD
-        6. Target Sasaran (target_sasaran): target/indikator kinerja yang ingin dicapai
-
-        PETUNJUK KONSOLIDASI:
-        - Gabungkan informasi dari semua dokumen
-        - Hindari duplikasi (jika sama, masukkan sekali saja)
-        - Prioritaskan informasi dari dokumen resmi (SOTK, Renstra, Perpres, Permen)
-        - Gunakan terminologi pemerintahan Indonesia yang benar
-        - Jika ada konflik informasi, ambil yang paling terbaru/lengkap
-
-        Format output JSON:
-        {{
-            "tugas_pokok": ["tugas 1", "tugas 2"],
-            "fungsi": ["fungsi 1", "fungsi 2"],
-            "program": ["program 1", "program 2"],
-            "kegiatan": ["kegiatan 1", "kegiatan 2"],
-            "anggaran": "ringkasan informasi anggaran",
-            "target_sasaran": ["sasaran 1", "sasaran 2"]
-        }}
-        
-        Pastikan ekstraksi akurat dan komprehensif dari SEMUA dokumen.
-        Jika informasi tidak ditemukan, gunakan array kosong.
-        """
-        
-        try:
-            response = self.model.generate_content(prompt)
-            json_str = response.text.strip()
-            if json_str.startswith('```json'):
-                json_str = json_str[7:-3]
-            elif json_str.startswith('```'):
-                json_str = json_str[3:-3]
-            
-            data = json.loads(json_str)
-            
-            return InstansiData(
-                nama=nama_instansi,
-                tugas_pokok=data.get('tugas_pokok', []),
-                fungsi=data.get('fungsi', []),
-                program=data.get('program', []),
-                kegiatan=data.get('kegiatan', []),
-                anggaran=data.get('anggaran', ''),
-                target_sasaran=data.get('target_sasaran', []),
-                dokumen_sumber=file_names
-            )
-        except Exception as e:
-            st.error(f"Error parsing data untuk {nama_instansi}: {e}")
-            return InstansiData(nama_instansi, [], [], [], [], '', [], file_names)
-    
-    def _smart_text_limiting(self, text: str, max_chars: int = 6000) -> str:
-        """Smart limiting: ambil bagian penting dari teks panjang"""
-        if len(text) <= max_chars:
-            return text
-        
-        # Split berdasarkan dokumen
-        documents = text.split("="*50)
-        
-        limited_text = ""
-        remaining_chars = max_chars
-        
-        for doc in documents:
-            if remaining_chars <= 0:
-                break
-                
-            # Ambil bagian awal dari setiap dokumen
-            doc_portion = doc[:min(len(doc), remaining_chars // max(1, len(documents) - documents.index(doc)))]
-            limited_text += doc_portion
-            remaining_chars -= len(doc_portion)
-        
-        return limited_text
-    
-    def analyze_overlaps(self, instansi_list: List[InstansiData]) -> Dict[str, Any]:
-        """Analisis tumpang tindih antar instansi dengan konteks Indonesia"""
-        
-        # Prepare data untuk analisis
-        instansi_summary = ""
-        for i, instansi in enumerate(instansi_list):
-            instansi_summary += f"""
-            
-INSTANSI {i+1}: {instansi.nama}
-Dokumen Sumber: {', '.join(instansi.dokumen_sumber)}
-Tugas Pokok: {'; '.join(instansi.tugas_pokok)}
-Fungsi: {'; '.join(instansi.fungsi)}
-Program: {'; '.join(instansi.program)}
-Kegiatan: {'; '.join(instansi.kegiatan)}
-Target Sasaran: {'; '.join(instansi.target_sasaran)}
-            """
-        
-        prompt = f"""
-        Analisis tumpang tindih tugas, fungsi, dan program antar instansi pemerintah Indonesia berikut:
-
-        {instansi_summary}
-
-        KONTEKS ANALISIS:
-        - Sistem pemerintahan Indonesia dengan struktur kementerian/lembaga
-        - Regulasi perundang-undangan Indonesia (UU, PP, Perpres, Permen)
-        - Koordinasi antar K/L berdasarkan tugas dan fungsi masing-masing
-        - Efisiensi anggaran APBN dan pencegahan duplikasi program
-        - Best practices reformasi birokrasi Indonesia
-
-        Berikan analisis komprehensif dalam format JSON dengan struktur:
-        {{
-            "ringkasan_eksekutif": "ringkasan singkat temuan utama dengan konteks Indonesia",
-            "tumpang_tindih": [
-                {{
-                    "kategori": "tugas_pokok/fungsi/program/kegiatan",
-                    "deskripsi": "deskripsi tumpang tindih dengan konteks regulasi Indonesia",
-                    "instansi_terlibat": ["instansi 1", "instansi 2"],
-                    "tingkat_overlap": "tinggi/sedang/rendah",
-                    "dampak_potensial": "deskripsi dampak terhadap pelayanan publik/efisiensi",
-                    "estimasi_pemborosan_anggaran": "persentase atau nilai rupiah jika memungkinkan",
-                    "dokumen_sumber": ["dokumen yang menunjukkan overlap"],
-                    "rekomendasi_koordinasi": "mekanisme koordinasi yang disarankan"
-                }}
-            ],
-            "rekomendasi": [
-                {{
-                    "prioritas": "tinggi/sedang/rendah",
-                    "aksi": "deskripsi aksi sesuai sistem pemerintahan Indonesia",
-                    "instansi_pelaksana": "instansi yang sebaiknya menjalankan (lead agency)",
-                    "instansi_pendukung": ["instansi pendukung"],
-                    "timeline": "estimasi waktu implementasi",
-                    "benefit_estimasi": "manfaat untuk pelayanan publik dan efisiensi",
-                    "dasar_hukum": "rujukan regulasi yang mendukung",
-                    "mekanisme_koordinasi": "forum/mekanisme koordinasi yang disarankan"
-                }}
-            ],
-            "metrik_overlap": {{
-                "total_overlap_ditemukan": 0,
-                "overlap_tinggi": 0,
-                "overlap_sedang": 0,
-                "overlap_rendah": 0,
-                "efisiensi_potensial": "persentase efisiensi anggaran yang dapat dicapai"
-            }}
-        }}
-
-        Fokus pada:
-        1. Identifikasi duplikasi tugas berdasarkan regulasi masing-masing K/L
-        2. Program dengan target sasaran dan output yang sama
-        3. Potensi konflik kewenangan regulasi
-        4. Peluang sinergi dan kolaborasi antar K/L
-        5. Optimasi alokasi anggaran APBN
-        6. Perbaikan koordinasi sesuai sistem pemerintahan Indonesia
-
-        Berikan rekomendasi yang praktis, dapat diimplementasikan, dan sesuai dengan sistem pemerintahan Indonesia.
-        """
-        
-        try:
-            response = self.model.generate_content(prompt)
-            json_str = response.text.strip()
-            if json_str.startswith('```json'):
-                json_str = json_str[7:-3]
-            elif json_str.startswith('```'):
-                json_str = json_str[3:-3]
-            
-            return json.loads(json_str)
-        except Exception as e:
-            st.error(f"Error analisis overlap: {e}")
-            return {"error": str(e)}
+def notify_streamlit(level: str, message: str):
+    """Tampilkan pesan dari DocumentProcessor/GeminiAnalyzer sebagai st.info/st.warning/st.error"""
+    getattr(st, level)(message)
 
 def check_api_configuration():
     """Check API configuration and display status"""
@@ -503,6 +211,9 @@ def main():
     # Get API key from environment
     api_key = os.getenv('GEMINI_API_KEY')
     
+    # Document processor tidak bergantung pada model yang dipilih
+    doc_processor = DocumentProcessor(notifier=notify_streamlit)
+    
     # Sidebar
     with st.sidebar:
         st.header("⚙️ Konfigurasi Sistem")
@@ -536,6 +247,48 @@ def main():
         
         st.info(f"📊 Akan menganalisis {num_instansi} instansi dengan model **{AVAILABLE_MODELS[selected_model]['name']}**")
         
+        use_response_cache = st.checkbox(
+            "♻️ Gunakan cache respons AI",
+            value=True,
+            help="Prompt yang sama persis tidak dikirim ulang ke Gemini. Nonaktifkan untuk memaksa analisis baru."
+        )
+        
+        extraction_mode_labels = {
+            'auto': "Otomatis (map-reduce untuk dokumen panjang)",
+            'single': "Satu prompt (bagian paling relevan)",
+            'map_reduce': "Map-reduce (seluruh dokumen)"
+        }
+        default_mode = os.getenv('EXTRACTION_MODE', Config.EXTRACTION_MODE)
+        extraction_mode = st.selectbox(
+            "🧩 Mode Ekstraksi Dokumen",
+            options=list(EXTRACTION_MODES),
+            format_func=lambda x: extraction_mode_labels[x],
+            index=EXTRACTION_MODES.index(default_mode) if default_mode in EXTRACTION_MODES else 0,
+            help="Map-reduce mengekstrak setiap bagian dokumen secara paralel dengan model yang lebih murah, "
+                 "lalu menggabungkan hasilnya. Cocok untuk Renstra yang panjang."
+        )
+        
+        fast_model = AVAILABLE_MODELS[selected_model].get('fast_model', selected_model)
+        use_cascade = st.checkbox(
+            "🔀 Ekstraksi dengan model cepat (cascade)",
+            value=os.getenv('MODEL_ROUTING', Config.MODEL_ROUTING) == 'cascade',
+            disabled=fast_model == selected_model,
+            help=f"Ekstraksi per instansi memakai {fast_model}; hanya hasil yang kosong atau tidak sesuai "
+                 f"schema yang diulang dengan {selected_model}. Analisis tumpang tindih tetap memakai {selected_model}."
+        )
+        
+        use_prefilter = st.checkbox(
+            "🎯 Saring kandidat tumpang tindih sebelum AI",
+            value=os.getenv('OVERLAP_PREFILTER', str(Config.OVERLAP_PREFILTER)).lower() == 'true',
+            help="Item yang mirip antar instansi dicari secara lokal; AI hanya menganalisis kelompok kandidat "
+                 "tersebut sehingga prompt tidak membengkak mengikuti jumlah item."
+        )
+        
+        # Initialize analyzer dengan model yang dipilih
+        analyzer = GeminiAnalyzer(api_key, selected_model, notifier=notify_streamlit, use_cache=use_response_cache,
+                                  extraction_mode=extraction_mode, routing='cascade' if use_cascade else 'single',
+                                  prefilter=use_prefilter)
+        
         # System status
         with st.expander("🔧 System Status"):
             st.markdown("### Model Information")
@@ -550,6 +303,44 @@ def main():
             for model_id, model_info in AVAILABLE_MODELS.items():
                 status = "✅" if model_id == selected_model else "⚪"
                 st.write(f"{status} {model_info['name']} - {model_info['cost']} cost, {model_info['speed']} speed")
+            
+            st.markdown("### Job Analisis")
+            jobs = get_job_runner().jobs()
+            st.json({
+                "berjalan": sum(1 for job in jobs if job.status == JOB_RUNNING),
+                "antre": sum(1 for job in jobs if job.status == JOB_QUEUED),
+                "selesai": sum(1 for job in jobs if job.status in (JOB_DONE, JOB_FAILED))
+            })
+            
+            st.markdown("### Cache Ekstraksi Teks")
+            st.json(doc_processor.text_cache.stats())
+            
+            st.markdown("### Cache OCR per Halaman")
+            if doc_processor.ocr_cache:
+                # hits/misses dihitung di proses ini termasuk hasil dari worker OCR
+                st.json({**doc_processor.ocr_cache.stats(), **ocr_stats.snapshot()})
+            else:
+                st.info("Cache OCR per halaman nonaktif (OCR_CACHE_MAX_MB=0)")
+                st.json(ocr_stats.snapshot())
+            
+            st.markdown("### Cache Respons Gemini")
+            if analyzer.response_cache:
+                st.json(analyzer.response_cache.stats())
+            else:
+                st.info("Cache respons Gemini nonaktif (LLM_CACHE_MAX_MB=0)")
+            
+            st.markdown("### Panggilan Model (retry, failover & parse JSON)")
+            metrics_snapshot = llm_metrics.snapshot()
+            stage_rows = metrics_snapshot.pop('stages')
+            st.json({**metrics_snapshot, 'circuit_breaker': circuit_states()})
+            
+            st.markdown("### Routing Model per Tahap")
+            if stage_rows:
+                st.dataframe(pd.DataFrame(stage_rows), use_container_width=True, hide_index=True)
+                st.caption(f"Eskalasi ekstraksi: {metrics_snapshot['escalations'] or 'tidak ada'} | "
+                           f"Perkiraan biaya total: ${metrics_snapshot['total_cost_usd']:.4f}")
+            else:
+                st.caption("Belum ada panggilan model.")
         
         # Help section
         with st.expander("📋 Jenis Dokumen yang Didukung"):
@@ -586,10 +377,6 @@ def main():
             - 📝 Auto-complete
             """)
     
-    # Initialize processors dengan model yang dipilih
-    doc_processor = DocumentProcessor()
-    analyzer = GeminiAnalyzer(api_key, selected_model)
-    
     # Main content
     st.header("📄 Upload Dokumen Instansi")
     st.info("💡 **Tip:** Setiap instansi dapat mengupload beberapa dokumen sekaligus untuk analisis yang lebih komprehensif")
@@ -615,11 +402,37 @@ def main():
                 if instansi_data:
                     uploaded_files_data[i] = instansi_data
     
+    # Deteksi dokumen yang sama di beberapa instansi; diekstrak sekali saat analisis
+    duplicate_groups = []
+    duplicate_labels = {}
+    if uploaded_files_data:
+        # Hash dan sidik jari disimpan di session_state: rerun (termasuk polling progress job) tidak membaca ulang PDF
+        fingerprint_cache = st.session_state.setdefault('document_fingerprints', {})
+        hash_cache = st.session_state.setdefault('upload_hashes', {})
+        duplicate_groups = find_duplicate_uploads(uploaded_files_data, fingerprint_cache, hash_cache)
+        for group in duplicate_groups:
+            canonical_key, canonical_index = group.canonical
+            canonical_data = uploaded_files_data[canonical_key]
+            canonical_label = f"{canonical_data['file_names'][canonical_index]} ({canonical_data['nama']})"
+            for key, index in group.members:
+                duplicate_labels[(key, index)] = canonical_label
+    
     # Summary section
     if uploaded_files_data:
         st.markdown("---")
         st.subheader("📋 Ringkasan Upload")
         
+        for group in duplicate_groups:
+            files = [
+                f"**{uploaded_files_data[key]['file_names'][index]}** ({uploaded_files_data[key]['nama']})"
+                for key, index in [group.canonical] + group.members
+            ]
+            if group.kind == DUPLICATE_EXACT:
+                st.warning(f"🔁 Dokumen identik diunggah di beberapa slot: {', '.join(files)}. Teks diekstrak sekali dan dipakai bersama.")
+            else:
+                st.warning(f"🔁 Dokumen hampir identik (kemiripan {group.similarity:.0%}): {', '.join(files)}. "
+                           f"Teks diekstrak sekali dari {files[0]} dan dipakai bersama.")
+        
         summary_cols = st.columns(len(uploaded_files_data))
         for idx, (i, data) in enumerate(uploaded_files_data.items()):
             with summary_cols[idx]:
@@ -631,8 +444,11 @@ def main():
                     <ul style="font-size: 0.9em; margin: 0;">
                 """, unsafe_allow_html=True)
                 
-                for file_name in data['file_names']:
-                    st.markdown(f"<li>{file_name}</li>", unsafe_allow_html=True)
+                for file_index, file_name in enumerate(data['file_names']):
+                    if (i, file_index) in duplicate_labels:
+                        st.markdown(f"<li>{file_name} 🔁 <em>duplikat dari {duplicate_labels[(i, file_index)]}</em></li>", unsafe_allow_html=True)
+                    else:
+                        st.markdown(f"<li>{file_name}</li>", unsafe_allow_html=True)
                 
                 st.markdown("</ul></div>", unsafe_allow_html=True)
     
@@ -646,7 +462,13 @@ def main():
             st.info(f"📊 Total {len(uploaded_files_data)} instansi, {total_files} dokumen siap dianalisis dengan **{AVAILABLE_MODELS[selected_model]['name']}**")
             
             if st.button("🔍 Mulai Analisis Tumpang Tindih", use_container_width=True):
-                analyze_documents(uploaded_files_data, doc_processor, analyzer)
+                analyze_documents(uploaded_files_data, doc_processor, analyzer, duplicate_groups)
+    
+    # Job analisis milik session ini (atau dari URL setelah browser di-refresh)
+    job_id = st.session_state.get('analysis_job_id') or st.query_params.get('job')
+    if job_id:
+        st.session_state['analysis_job_id'] = job_id
+        show_analysis_job(job_id)
 
 def create_instansi_upload_section(index: int):
     """Create upload section for one instansi with smart instansi selection"""
@@ -766,83 +588,164 @@ def create_instansi_upload_section(index: int):
     
     return None
 
-def analyze_documents(uploaded_files_data, doc_processor, analyzer):
-    """Fungsi untuk menganalisis dokumen dengan multiple files support"""
+@st.cache_resource
+def get_job_runner() -> JobRunner:
+    """Job runner bersama untuk seluruh session di proses server ini"""
+    return JobRunner(max_workers=int(os.getenv('JOB_WORKERS', Config.JOB_WORKERS)))
+
+def run_analysis_job(context: JobContext, uploaded_files_data, doc_processor, analyzer, duplicate_groups=None):
+    """Isi job analisis: berjalan di thread job runner, tidak boleh memanggil st.*"""
+    doc_processor.notifier = context.notify
+    analyzer.notifier = context.notify
+    stream_analysis = os.getenv('STREAM_OVERLAP_ANALYSIS', str(Config.STREAM_OVERLAP_ANALYSIS)).lower() == 'true'
+    
+    return run_overlap_analysis(
+        doc_processor,
+        analyzer,
+        uploaded_files_data,
+        file_workers=int(os.getenv('EXTRACTION_WORKERS', Config.EXTRACTION_WORKERS)),
+        llm_workers=int(os.getenv('LLM_WORKERS', Config.LLM_WORKERS)),
+        duplicate_groups=duplicate_groups,
+        on_update=context.update_state,
+        on_phase=context.set_phase,
+        on_partial=context.set_partial_result if stream_analysis else None
+    )
+
+def analyze_documents(uploaded_files_data, doc_processor, analyzer, duplicate_groups=None):
+    """Kirim analisis sebagai job latar belakang; halaman memantau progress lewat job id"""
+    job_id = get_job_runner().submit(
+        run_analysis_job,
+        uploaded_files_data,
+        doc_processor,
+        analyzer,
+        duplicate_groups,
+        meta={
+            'total_instansi': len(uploaded_files_data),
+            'total_files': sum(len(data['files']) for data in uploaded_files_data.values()),
+            'model_name': analyzer.model_name,
+            'started': time.strftime('%Y-%m-%d %H:%M:%S UTC')
+        }
+    )
     
-    # Progress tracking
-    total_instansi = len(uploaded_files_data)
-    total_files = sum(len(data['files']) for data in uploaded_files_data.values())
+    # Job id di session_state bertahan antar rerun; di URL agar bertahan saat browser di-refresh
+    st.session_state['analysis_job_id'] = job_id
+    st.query_params['job'] = job_id
+
+def clear_analysis_job():
+    st.session_state.pop('analysis_job_id', None)
+    if 'job' in st.query_params:
+        del st.query_params['job']
+
+def show_analysis_job(job_id: str):
+    """Tampilkan progress job analisis, atau hasilnya jika sudah selesai"""
+    job = get_job_runner().get(job_id)
+    if job is None:
+        st.warning("⚠️ Job analisis tidak ditemukan (server dimulai ulang atau hasil sudah kedaluwarsa).")
+        clear_analysis_job()
+        return
     
+    st.markdown("---")
     st.markdown(f"""
     <div class="metric-card">
-        <h3>🔄 Memulai Analisis</h3>
-        <p>📊 <strong>Total Instansi:</strong> {total_instansi}</p>
-        <p>📄 <strong>Total Dokumen:</strong> {total_files}</p>
-        <p>🤖 <strong>Model AI:</strong> {analyzer.model_name}</p>
+        <h3>🔄 Analisis {job.job_id}</h3>
+        <p>📊 <strong>Total Instansi:</strong> {job.meta.get('total_instansi')}</p>
+        <p>📄 <strong>Total Dokumen:</strong> {job.meta.get('total_files')}</p>
+        <p>🤖 <strong>Model AI:</strong> {job.meta.get('model_name')}</p>
         <p>👤 <strong>User:</strong> sihatiuser</p>
-        <p>📅 <strong>Waktu:</strong> {time.strftime('%Y-%m-%d %H:%M:%S UTC')}</p>
+        <p>📅 <strong>Waktu:</strong> {job.meta.get('started')}</p>
     </div>
     """, unsafe_allow_html=True)
     
-    # Progress bars
-    overall_progress = st.progress(0)
-    status_text = st.empty()
-    detail_text = st.empty()
-    
-    instansi_list = []
+    if job.status in (JOB_DONE, JOB_FAILED):
+        if st.button("🗑️ Tutup Hasil Analisis", key="clear_analysis_job"):
+            clear_analysis_job()
+            st.rerun()
     
-    # Step 1: Extract data from each instansi (with multiple files)
-    for idx, (i, instansi_data) in enumerate(uploaded_files_data.items()):
-        overall_progress.progress((idx + 1) / (total_instansi + 1))
-        status_text.text(f"🏢 Menganalisis {instansi_data['nama']} ({idx + 1}/{total_instansi})")
-        
-        # Process multiple files for this instansi
-        detail_text.text(f"📄 Memproses {len(instansi_data['files'])} dokumen...")
-        
-        # Extract text from all files
-        combined_text = doc_processor.process_multiple_files(
-            instansi_data['files'], 
-            instansi_data['file_names']
-        )
-        
-        if combined_text and not combined_text.startswith("Error:"):
-            detail_text.text(f"🤖 Menganalisis dengan {analyzer.model_name}...")
-            
-            # Analyze with Gemini
-            extracted_data = analyzer.extract_instansi_data(
-                combined_text, 
-                instansi_data['nama'],
-                instansi_data['file_names']
-            )
-            instansi_list.append(extracted_data)
-            
-            st.success(f"✅ {instansi_data['nama']}: {len(instansi_data['files'])} dokumen berhasil dianalisis")
+    if job.status in (JOB_QUEUED, JOB_RUNNING):
+        if job.status == JOB_QUEUED:
+            st.text("⏳ Menunggu giliran job analisis...")
+        elif job.phase == PHASE_OVERLAP:
+            st.text(f"🤖 AI sedang membandingkan semua data dengan {job.meta.get('model_name')}...")
         else:
-            st.error(f"❌ Gagal mengekstrak teks dari dokumen {instansi_data['nama']}")
-    
-    # Step 2: Analyze overlaps
-    if len(instansi_list) >= 2:
-        overall_progress.progress(1.0)
-        status_text.text("🔍 Menganalisis tumpang tindih antar instansi...")
-        detail_text.text(f"🤖 AI sedang membandingkan semua data dengan {analyzer.model_name}...")
+            st.text(f"🏢 Mengekstrak {job.meta.get('total_files')} dokumen dari {job.meta.get('total_instansi')} instansi secara paralel...")
         
-        overlap_analysis = analyzer.analyze_overlaps(instansi_list)
+        if job.state is not None:
+            render_pipeline_state(st.empty(), job.state, job.messages)
         
-        overall_progress.empty()
-        status_text.empty()
-        detail_text.empty()
+        # Hasil sementara dari respons yang sedang di-stream
+        if job.partial_result is not None:
+            display_results(**job.partial_result, partial=True)
         
-        # Display results
-        display_results(instansi_list, overlap_analysis, analyzer.model_name)
-    else:
+        # Polling: script dijalankan ulang hingga job selesai; job tetap berjalan di thread runner
+        time.sleep(float(os.getenv('JOB_POLL_SECONDS', Config.JOB_POLL_SECONDS)))
+        st.rerun()
+    
+    if job.state is not None:
+        render_pipeline_state(st.empty(), job.state, job.messages)
+    
+    if job.status == JOB_FAILED:
+        st.error(f"❌ Analisis gagal: {job.error.splitlines()[0] if job.error else 'error tidak diketahui'}")
+        return
+    
+    if job.result['overlap_analysis'] is None:
         st.error("❌ Minimal 2 instansi diperlukan untuk analisis")
+        return
+    
+    display_results(job.result['instansi_list'], job.result['overlap_analysis'], job.result['model_name'])
+
+PIPELINE_STATUS_LABELS = {
+    FILE_WAITING: "⏳ Menunggu",
+    FILE_EXTRACTING: "📄 Ekstraksi teks",
+    FILE_OCR: "🔎 OCR",
+    FILE_DONE: "✅ Selesai",
+    FILE_FAILED: "❌ Gagal",
+    AGENCY_ANALYZING: "🤖 Analisis AI",
+}
 
-def display_results(instansi_list, overlap_analysis, model_name):
-    """Tampilkan hasil analisis dengan info model"""
+def render_pipeline_state(placeholder, state: PipelineState, messages: Optional[List[tuple]] = None):
+    """Tampilkan status ekstraksi per instansi dan per file beserta log pesan job"""
+    if messages:
+        with st.expander(f"📜 Log Proses ({len(messages)} pesan)"):
+            for level, message in messages:
+                getattr(st, level)(message)
+    
+    rows = []
+    for agency in state.agencies.values():
+        done_files = sum(1 for f in agency.files if f.status in (FILE_DONE, FILE_FAILED))
+        rows.append({
+            'Instansi': f"🏢 {agency.nama}",
+            'Dokumen': f"{done_files}/{len(agency.files)} dokumen",
+            'Status': PIPELINE_STATUS_LABELS.get(agency.status, agency.status),
+            'Progress': done_files / len(agency.files) if agency.files else 1.0,
+            'Duplikat dari': ""
+        })
+        for file_status in agency.files:
+            rows.append({
+                'Instansi': "",
+                'Dokumen': f"📄 {file_status.name}",
+                'Status': PIPELINE_STATUS_LABELS.get(file_status.status, file_status.status),
+                'Progress': file_status.progress,
+                'Duplikat dari': f"🔁 {file_status.duplicate_of}" if file_status.duplicate_of else ""
+            })
+    
+    placeholder.dataframe(
+        pd.DataFrame(rows),
+        use_container_width=True,
+        hide_index=True,
+        column_config={
+            'Progress': st.column_config.ProgressColumn("Progress", min_value=0.0, max_value=1.0)
+        }
+    )
+
+def display_results(instansi_list, overlap_analysis, model_name, partial: bool = False):
+    """Tampilkan hasil analisis dengan info model; partial=True untuk hasil sementara saat streaming"""
     
     st.markdown("---")
     st.header("📊 Hasil Analisis")
     
+    if partial:
+        st.caption("⏳ Hasil sementara: AI masih menulis analisis, bagian baru muncul begitu selesai.")
+    
     # Analysis info
     st.markdown(f"""
     <div class="config-info">
@@ -855,6 +758,23 @@ def display_results(instansi_list, overlap_analysis, model_name):
     </div>
     """, unsafe_allow_html=True)
     
+    # Statistik penyaringan kandidat sebelum analisis AI
+    if 'penyaringan_kandidat' in overlap_analysis:
+        penyaringan = overlap_analysis['penyaringan_kandidat']
+        with st.expander("🎯 Penyaringan Kandidat"):
+            col1, col2, col3 = st.columns(3)
+            col1.metric("Item Dikirim ke AI", f"{penyaringan['item_dikirim']} / {penyaringan['total_item']}")
+            col2.metric("Pasangan Dipangkas", f"{penyaringan['pemangkasan_pasangan']:.1%}")
+            col3.metric("Token Prompt", penyaringan['token_prompt_dikirim'],
+                        delta=penyaringan['token_prompt_dikirim'] - penyaringan['token_prompt_tanpa_penyaringan'],
+                        delta_color="inverse")
+            st.caption(f"{penyaringan['pasangan_kandidat']} pasangan kandidat dari "
+                       f"{penyaringan['pasangan_antar_instansi']} pasangan antar instansi, "
+                       f"{penyaringan['kelompok_dikirim']} dari {penyaringan['kelompok_kandidat']} kelompok dikirim "
+                       f"({penyaringan['detik_penyaringan']:.3f} detik)."
+                       + (" Ringkasan lengkap dikirim karena tidak ada kandidat yang muat atau daftar kandidat tidak lebih ringkas."
+                          if penyaringan.get('ringkasan_lengkap_dipakai') else ""))
+    
     # Ringkasan Eksekutif
     if 'ringkasan_eksekutif' in overlap_analysis:
         st.subheader("📋 Ringkasan Eksekutif")
@@ -896,14 +816,14 @@ def display_results(instansi_list, overlap_analysis, model_name):
     if 'tumpang_tindih' in overlap_analysis:
         st.subheader("🔍 Detail Tumpang Tindih")
         
-        overlaps = overlap_analysis['tumpang_tindih']
+        # Model tanpa output terstruktur (mis. gemma) atau item hasil sementara bisa tidak lengkap;
+        # field dibaca dengan .get agar tampilan tidak gagal di tengah polling
+        overlaps = [overlap for overlap in overlap_analysis['tumpang_tindih'] or [] if isinstance(overlap, dict)]
         
         # Chart
         if overlaps:
-            df_overlap = pd.DataFrame(overlaps)
-            
             # Pie chart tingkat overlap
-            tingkat_counts = df_overlap['tingkat_overlap'].value_counts()
+            tingkat_counts = pd.Series([overlap.get('tingkat_overlap') or '-' for overlap in overlaps]).value_counts()
             
             fig_pie = px.pie(
                 values=tingkat_counts.values,
@@ -919,12 +839,13 @@ def display_results(instansi_list, overlap_analysis, model_name):
             
             # Detail cards with document sources
             for i, overlap in enumerate(overlaps):
-                css_class = f"overlap-{overlap['tingkat_overlap']}"
+                tingkat = str(overlap.get('tingkat_overlap') or '-')
+                css_class = f"overlap-{tingkat}"
                 
                 # Document sources if available
                 doc_sources = ""
-                if 'dokumen_sumber' in overlap and overlap['dokumen_sumber']:
-                    doc_sources = f"<p><strong>Dokumen Sumber:</strong> {', '.join(overlap['dokumen_sumber'])}</p>"
+                if overlap.get('dokumen_sumber'):
+                    doc_sources = f"<p><strong>Dokumen Sumber:</strong> {', '.join(map(str, overlap['dokumen_sumber']))}</p>"
                 
                 # Coordination recommendation if available
                 coord_rec = ""
@@ -933,11 +854,11 @@ def display_results(instansi_list, overlap_analysis, model_name):
                 
                 st.markdown(f"""
                 <div class="metric-card {css_class}">
-                    <h4>🔄 {overlap['kategori'].replace('_', ' ').title()}</h4>
-                    <p><strong>Deskripsi:</strong> {overlap['deskripsi']}</p>
-                    <p><strong>Instansi Terlibat:</strong> {', '.join(overlap['instansi_terlibat'])}</p>
-                    <p><strong>Tingkat:</strong> {overlap['tingkat_overlap'].upper()}</p>
-                    <p><strong>Dampak:</strong> {overlap['dampak_potensial']}</p>
+                    <h4>🔄 {str(overlap.get('kategori') or 'tumpang tindih').replace('_', ' ').title()}</h4>
+                    <p><strong>Deskripsi:</strong> {overlap.get('deskripsi', '-')}</p>
+                    <p><strong>Instansi Terlibat:</strong> {', '.join(map(str, overlap.get('instansi_terlibat') or []))}</p>
+                    <p><strong>Tingkat:</strong> {tingkat.upper()}</p>
+                    <p><strong>Dampak:</strong> {overlap.get('dampak_potensial', '-')}</p>
                     {doc_sources}
                     {coord_rec}
                     {f"<p><strong>Estimasi Pemborosan:</strong> {overlap['estimasi_pemborosan_anggaran']}</p>" if overlap.get('estimasi_pemborosan_anggaran') else ''}
@@ -950,7 +871,7 @@ def display_results(instansi_list, overlap_analysis, model_name):
     if 'rekomendasi' in overlap_analysis:
         st.subheader("💡 Rekomendasi Strategis")
         
-        rekomendasi = overlap_analysis['rekomendasi']
+        rekomendasi = [rec for rec in overlap_analysis['rekomendasi'] or [] if isinstance(rec, dict)]
         
         for i, rec in enumerate(rekomendasi):
             priority_color = {
@@ -959,15 +880,16 @@ def display_results(instansi_list, overlap_analysis, model_name):
                 'rendah': '🟢'
             }
             
-            with st.expander(f"{priority_color.get(rec['prioritas'], '⚪')} Rekomendasi {i+1} - Prioritas {rec['prioritas'].title()}"):
-                st.write(f"**Aksi:** {rec['aksi']}")
-                st.write(f"**Instansi Pelaksana (Lead Agency):** {rec['instansi_pelaksana']}")
+            prioritas = str(rec.get('prioritas') or '-')
+            with st.expander(f"{priority_color.get(prioritas, '⚪')} Rekomendasi {i+1} - Prioritas {prioritas.title()}"):
+                st.write(f"**Aksi:** {rec.get('aksi', '-')}")
+                st.write(f"**Instansi Pelaksana (Lead Agency):** {rec.get('instansi_pelaksana', '-')}")
                 
                 if rec.get('instansi_pendukung'):
-                    st.write(f"**Instansi Pendukung:** {', '.join(rec['instansi_pendukung'])}")
+                    st.write(f"**Instansi Pendukung:** {', '.join(map(str, rec['instansi_pendukung']))}")
                 
-                st.write(f"**Timeline:** {rec['timeline']}")
-                st.write(f"**Benefit Estimasi:** {rec['benefit_estimasi']}")
+                st.write(f"**Timeline:** {rec.get('timeline', '-')}")
+                st.write(f"**Benefit Estimasi:** {rec.get('benefit_estimasi', '-')}")
                 
                 if rec.get('dasar_hukum'):
                     st.write(f"**Dasar Hukum:** {rec['dasar_hukum']}")
@@ -1009,6 +931,10 @@ def display_results(instansi_list, overlap_analysis, model_name):
             
             st.markdown("---")
     
+    # Export dan ringkasan angka baru tersedia setelah analisis lengkap
+    if partial:
+        return
+    
     # Export hasil
     st.subheader("📤 Export Hasil")
     st.info("💡 Laporan akan mencakup semua data analisis, metrik, dan rekomendasi dalam format yang rapi")
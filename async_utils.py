@@ -0,0 +1,111 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Coroutine, Dict, Optional
+
+from config import AVAILABLE_MODELS
+
+# Modul ini tidak mengimpor streamlit: satu event loop latar belakang per proses menjalankan
+# semua panggilan LLM async, sehingga limiter per model berlaku lintas job dan session.
+
+DEFAULT_MODEL_RPM = 60
+DEFAULT_MODEL_CONCURRENCY = 4
+# Thread untuk asyncio.to_thread (akses cache SQLite, panggilan SDK via REST); default asyncio
+# hanya cpu_count + 4 sehingga bisa lebih kecil dari max_concurrency model
+LOOP_THREAD_WORKERS = 32
+
+_loop: Optional[asyncio.AbstractEventLoop] = None
+_loop_lock = threading.Lock()
+
+_limiters: Dict[str, 'ModelLimiter'] = {}
+_limiters_lock = threading.Lock()
+
+
+def get_async_loop() -> asyncio.AbstractEventLoop:
+    """Event loop bersama yang berjalan di daemon thread, dibuat saat pertama kali dibutuhkan"""
+    global _loop
+    with _loop_lock:
+        if _loop is None:
+            _loop = asyncio.new_event_loop()
+            _loop.set_default_executor(ThreadPoolExecutor(max_workers=LOOP_THREAD_WORKERS,
+                                                          thread_name_prefix='sihati-async-io'))
+            threading.Thread(target=_loop.run_forever, name='sihati-async', daemon=True).start()
+        return _loop
+
+
+def run_async(coro: Coroutine) -> Future:
+    """Jadwalkan coroutine di event loop bersama; hasilnya concurrent.futures.Future"""
+    return asyncio.run_coroutine_threadsafe(coro, get_async_loop())
+
+
+class TokenBucket:
+    """Rate limiter token bucket: rate_per_minute token diisi merata, maksimal capacity token"""
+
+    def __init__(self, rate_per_minute: float, capacity: int):
+        self.rate = rate_per_minute / 60
+        self.capacity = capacity
+        self.tokens = float(capacity)
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    async def acquire(self):
+        async with self._lock:
+            while True:
+                self._refill()
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+class ModelLimiter:
+    """Batas panggilan bersamaan (semaphore) dan laju request (token bucket) untuk satu model"""
+
+    def __init__(self, rpm: float, concurrency: int):
+        self.rpm = rpm
+        self.concurrency = concurrency
+        self._semaphore = asyncio.Semaphore(concurrency)
+        self._bucket = TokenBucket(rpm, concurrency)
+        self.pause_until = 0.0  # time.monotonic() sampai kapan semua panggilan model ini ditahan
+
+    def pause(self, seconds: float):
+        """Tahan semua panggilan berikutnya ke model ini (mis. setelah 429 dari server)"""
+        self.pause_until = max(self.pause_until, time.monotonic() + seconds)
+
+    def pause_remaining(self) -> float:
+        return max(0.0, self.pause_until - time.monotonic())
+
+    async def __aenter__(self):
+        await self._semaphore.acquire()
+        try:
+            await self._bucket.acquire()
+            pause = self.pause_remaining()
+            if pause > 0:
+                await asyncio.sleep(pause)
+        except BaseException:
+            self._semaphore.release()
+            raise
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        self._semaphore.release()
+
+
+def get_model_limiter(model_name: str) -> ModelLimiter:
+    """Limiter bersama per model sesuai 'rpm' dan 'max_concurrency' di AVAILABLE_MODELS"""
+    with _limiters_lock:
+        limiter = _limiters.get(model_name)
+        if limiter is None:
+            model_info = AVAILABLE_MODELS.get(model_name, {})
+            limiter = ModelLimiter(
+                model_info.get('rpm', DEFAULT_MODEL_RPM),
+                model_info.get('max_concurrency', DEFAULT_MODEL_CONCURRENCY)
+            )
+            _limiters[model_name] = limiter
+        return limiter
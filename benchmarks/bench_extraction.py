@@ -0,0 +1,178 @@
+"""Benchmark ekstraksi PDF: jalur lama (PyPDF2 lalu parse ulang PyMuPDF) vs engine satu-parse PyMuPDF.
+
+OCR tidak diikutkan secara default karena biayanya sama di kedua jalur; yang diukur
+adalah parsing, text layer, dan rasterisasi halaman yang perlu OCR.
+
+Contoh:
+    python benchmarks/bench_extraction.py dokumen1.pdf dokumen2.pdf
+    python benchmarks/bench_extraction.py --generate 200 --scanned-every 4
+"""
+import argparse
+import io
+import json
+import multiprocessing
+import os
+import resource
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def legacy_path(pdf_file, dpi: int) -> tuple:
+    """Replika alur lama: PyPDF2 untuk text layer, jika tipis baca ulang file ke PyMuPDF untuk OCR"""
+    zoom = dpi / 72
+    import fitz  # PyMuPDF
+    import PyPDF2
+    from PIL import Image
+
+    pdf_file.seek(0)
+    pdf_reader = PyPDF2.PdfReader(pdf_file)
+    text = ""
+    for page in pdf_reader.pages:
+        text += page.extract_text() + "\n"
+
+    if len(text.strip()) >= 100:
+        # Halaman scan di dokumen campuran ikut terlewat pada alur lama
+        return len(pdf_reader.pages), 0
+
+    pdf_file.seek(0)
+    pdf_document = fitz.open(stream=pdf_file.read(), filetype="pdf")
+    for page_num in range(len(pdf_document)):
+        pix = pdf_document.load_page(page_num).get_pixmap(matrix=fitz.Matrix(zoom, zoom))
+        Image.open(io.BytesIO(pix.tobytes("png"))).load()
+    page_count = len(pdf_document)
+    pdf_document.close()
+    return page_count, page_count
+
+
+def single_parse_path(pdf_file, dpi: int) -> tuple:
+    """Engine baru: satu handle PyMuPDF untuk text layer dan raster halaman yang perlu OCR"""
+    from ocr_utils import page_needs_ocr, render_page_image
+    from pdf_utils import PdfSource
+
+    rasterized = 0
+    with PdfSource(pdf_file) as source:
+        for page_num, page_text in enumerate(source.page_texts()):
+            if page_needs_ocr(page_text):
+                render_page_image(source.document.load_page(page_num), dpi).load()
+                rasterized += 1
+        return source.page_count, rasterized
+
+
+PATHS = {
+    'legacy': legacy_path,
+    'single_parse': single_parse_path,
+}
+
+
+def _run_once(path_name: str, pdf_path: str, dpi: int, results):
+    # Impor semua library di kedua jalur lebih dulu agar peak RSS hanya membedakan penanganan data
+    import fitz  # noqa: F401
+    import PyPDF2  # noqa: F401
+    import ocr_utils  # noqa: F401
+    import pdf_utils  # noqa: F401
+    baseline_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    # Input dimuat ke BytesIO seperti UploadedFile Streamlit
+    with open(pdf_path, 'rb') as f:
+        pdf_file = io.BytesIO(f.read())
+
+    start = time.perf_counter()
+    pages, rasterized = PATHS[path_name](pdf_file, dpi)
+    elapsed = time.perf_counter() - start
+
+    # Linux melaporkan ru_maxrss dalam KB
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    results.put({
+        'pages': pages,
+        'rasterized_pages': rasterized,
+        'seconds': elapsed,
+        'peak_rss_mb': peak_rss / 1024,
+        'peak_rss_delta_mb': (peak_rss - baseline_rss) / 1024
+    })
+
+
+def measure(path_name: str, pdf_path: str, dpi: int) -> dict:
+    """Jalankan satu pengukuran di proses terpisah agar peak RSS tidak tercampur"""
+    context = multiprocessing.get_context('spawn')
+    results = context.Queue()
+    process = context.Process(target=_run_once, args=(path_name, pdf_path, dpi, results))
+    process.start()
+    result = results.get()
+    process.join()
+    result['pages_per_sec'] = result['pages'] / result['seconds'] if result['seconds'] else 0.0
+    return result
+
+
+def generate_pdf(path: str, pages: int, scanned_every: int):
+    """Buat PDF uji: halaman teks digital, setiap N halaman berupa gambar tanpa text layer"""
+    import fitz  # PyMuPDF
+
+    document = fitz.open()
+    for page_num in range(pages):
+        page = document.new_page()
+        if scanned_every and page_num % scanned_every == scanned_every - 1:
+            pix = fitz.Pixmap(fitz.csGRAY, fitz.IRect(0, 0, 1200, 1600), False)
+            pix.clear_with(230)
+            page.insert_image(page.rect, pixmap=pix)
+        else:
+            for line in range(40):
+                page.insert_text((50, 60 + line * 18), f"Halaman {page_num + 1} baris {line + 1}: "
+                                 "tugas pokok, fungsi, program dan kegiatan instansi", fontsize=10)
+    document.save(path)
+    document.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('pdfs', nargs='*', help='File PDF yang akan diukur')
+    parser.add_argument('--generate', type=int, default=0, help='Buat PDF uji dengan N halaman')
+    parser.add_argument('--scanned-every', type=int, default=4, help='Setiap N halaman PDF uji berupa scan')
+    parser.add_argument('--dpi', type=int, default=144)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--json', help='Simpan hasil ke file JSON')
+    args = parser.parse_args()
+
+    pdf_paths = list(args.pdfs)
+    generated_path = None
+    if args.generate:
+        generated_path = tempfile.NamedTemporaryFile(suffix='.pdf', delete=False).name
+        generate_pdf(generated_path, args.generate, args.scanned_every)
+        pdf_paths.append(generated_path)
+
+    if not pdf_paths:
+        parser.error("berikan file PDF atau gunakan --generate")
+
+    report = []
+    try:
+        for pdf_path in pdf_paths:
+            for path_name in PATHS:
+                runs = [measure(path_name, pdf_path, args.dpi) for _ in range(args.repeat)]
+                best = min(runs, key=lambda run: run['seconds'])
+                row = {
+                    'file': os.path.basename(pdf_path),
+                    'path': path_name,
+                    'pages': best['pages'],
+                    'rasterized_pages': best['rasterized_pages'],
+                    'pages_per_sec': round(best['pages_per_sec'], 2),
+                    'seconds': round(best['seconds'], 3),
+                    'peak_rss_mb': round(max(run['peak_rss_mb'] for run in runs), 1),
+                    'peak_rss_delta_mb': round(max(run['peak_rss_delta_mb'] for run in runs), 1)
+                }
+                report.append(row)
+                print(f"{row['file']:<30} {row['path']:<14} {row['pages']:>5} hal "
+                      f"({row['rasterized_pages']:>4} raster)  {row['pages_per_sec']:>9.2f} hal/detik  "
+                      f"{row['peak_rss_mb']:>8.1f} MB peak RSS (+{row['peak_rss_delta_mb']:.1f} MB)")
+    finally:
+        if generated_path:
+            os.remove(generated_path)
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,112 @@
+"""Benchmark ekstraksi Gemini per instansi: serial vs async terbatas, terhadap stub server lokal.
+
+Stub (benchmarks/gemini_stub_server.py) dijalankan di proses ini dengan latensi yang
+bisa diatur, sehingga yang diukur adalah overhead orkestrasi dan efek concurrency
+semaphore + token bucket per model, bukan kecepatan API. Cache respons dinonaktifkan.
+
+Dengan --error-rate / --throttle-models stub menyuntikkan error 429/503 sehingga retry,
+backoff, dan failover ke model cadangan ikut terukur (lihat metrik di output).
+
+Contoh:
+    python benchmarks/bench_llm_concurrency.py --agencies 6 --latency 2.0
+    python benchmarks/bench_llm_concurrency.py --agencies 12 --model gemini-2.5-flash --json hasil.json
+    python benchmarks/bench_llm_concurrency.py --error-rate 0.3 --throttle-models gemini-2.5-pro
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+import urllib.request
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+sys.path.insert(0, BENCH_DIR)
+
+from gemini_stub_server import start_stub_server  # noqa: E402
+
+
+def read_stats(url: str) -> dict:
+    with urllib.request.urlopen(f"{url}/stats") as response:
+        return json.load(response)
+
+
+async def extract_all(analyzer, agencies):
+    """Kirim semua instansi sekaligus dan kumpulkan hasil sesuai urutan selesai"""
+    start = time.perf_counter()
+    tasks = [analyzer.extract_instansi_data_async(text, nama, ['dokumen.pdf']) for nama, text in agencies]
+    completions = []
+    for task in asyncio.as_completed(tasks):
+        instansi_data = await task
+        completions.append((instansi_data.nama, round(time.perf_counter() - start, 3)))
+    return completions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--agencies', type=int, default=6)
+    parser.add_argument('--latency', type=float, default=1.0)
+    parser.add_argument('--jitter', type=float, default=0.2)
+    parser.add_argument('--model', default='gemini-2.5-pro')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='Peluang stub menjawab error 503')
+    parser.add_argument('--throttle-models', default='', help='Model yang selalu dijawab 429 oleh stub')
+    parser.add_argument('--json', help='Simpan hasil ke file JSON')
+    args = parser.parse_args()
+
+    throttle_models = [name.strip() for name in args.throttle_models.split(',') if name.strip()]
+    server, url = start_stub_server(args.latency, args.jitter, error_rate=args.error_rate,
+                                    throttle_models=throttle_models)
+    os.environ['GEMINI_API_ENDPOINT'] = url
+    os.environ['LLM_CACHE_MAX_MB'] = '0'
+
+    from async_utils import get_model_limiter, run_async
+    from gemini_analyzer import GeminiAnalyzer
+    from metrics import llm_metrics
+
+    analyzer = GeminiAnalyzer('stub-key', args.model, notifier=lambda level, message: print(level, message))
+    agencies = [(f"Instansi {i + 1}", f"Tugas dan fungsi instansi {i + 1}. " * 50) for i in range(args.agencies)]
+
+    start = time.perf_counter()
+    for nama, text in agencies:
+        analyzer.extract_instansi_data(text, nama, ['dokumen.pdf'])
+    serial_seconds = time.perf_counter() - start
+    serial_stats = read_stats(url)
+
+    server.state.max_in_flight = 0
+    start = time.perf_counter()
+    completions = run_async(extract_all(analyzer, agencies)).result()
+    async_seconds = time.perf_counter() - start
+    async_stats = read_stats(url)
+    server.shutdown()
+
+    limiter = get_model_limiter(args.model)
+    report = {
+        'agencies': args.agencies,
+        'latency': args.latency,
+        'model': args.model,
+        'rpm': limiter.rpm,
+        'max_concurrency': limiter.concurrency,
+        'serial_seconds': round(serial_seconds, 3),
+        'async_seconds': round(async_seconds, 3),
+        'speedup': round(serial_seconds / async_seconds, 2) if async_seconds else None,
+        'serial_max_in_flight': serial_stats['max_in_flight'],
+        'async_max_in_flight': async_stats['max_in_flight'],
+        'completion_order': completions,
+        'stub': async_stats,
+        'llm_metrics': llm_metrics.snapshot()
+    }
+    print(f"serial {report['serial_seconds']:.2f}s | async {report['async_seconds']:.2f}s "
+          f"({report['speedup']}x, maks {report['async_max_in_flight']} bersamaan, "
+          f"limit {limiter.concurrency} / {limiter.rpm} rpm)")
+    for nama, seconds in completions:
+        print(f"  {seconds:>7.3f}s  {nama}")
+    print(json.dumps(report['llm_metrics'], indent=2))
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
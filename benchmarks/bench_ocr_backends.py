@@ -0,0 +1,156 @@
+"""Microbenchmark latensi OCR per halaman untuk setiap backend OCR yang tersedia.
+
+Panggilan pertama dilaporkan terpisah karena mencakup pemuatan model bahasa
+(tesserocr memuatnya sekali, pytesseract memuatnya di setiap halaman).
+
+Dengan --adaptive, mode OCR tetap (--dpi) dibandingkan dengan OCR adaptif
+(--low-dpi dulu, render ulang di --high-dpi hanya untuk halaman ber-confidence rendah).
+
+Contoh:
+    python benchmarks/bench_ocr_backends.py dokumen_scan.pdf --pages 20
+    python benchmarks/bench_ocr_backends.py --pages 20 --dpi 200
+    python benchmarks/bench_ocr_backends.py dokumen_scan.pdf --adaptive --low-dpi 100 --high-dpi 300
+"""
+import argparse
+import json
+import os
+import resource
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ocr_utils import OCR_BACKENDS, OcrSettings, get_ocr_backend, ocr_page, render_page_image  # noqa: E402
+
+
+def open_document(pdf_path: str, pages: int):
+    """Buka PDF, atau buat dokumen berisi halaman teks sintetis jika PDF tidak diberikan"""
+    import fitz  # PyMuPDF
+
+    if pdf_path:
+        return fitz.open(pdf_path)
+
+    document = fitz.open()
+    for page_num in range(pages):
+        page = document.new_page()
+        for line in range(35):
+            page.insert_text((50, 60 + line * 20), f"Halaman {page_num + 1}: penyelenggaraan urusan "
+                             "pemerintahan di bidang perencanaan pembangunan nasional", fontsize=10)
+    return document
+
+
+def load_pages(pdf_path: str, pages: int, dpi: int, colorspace: str):
+    """Render halaman dari PDF, atau dari halaman teks sintetis jika PDF tidak diberikan"""
+    document = open_document(pdf_path, pages)
+    images = [render_page_image(document.load_page(page_num % len(document)), dpi, colorspace)
+              for page_num in range(pages)]
+    document.close()
+    return images
+
+
+def bench_backend(name: str, lang: str, images) -> dict:
+    try:
+        start = time.perf_counter()
+        engine = get_ocr_backend(name, lang)
+        engine.image_to_string(images[0])
+        first_call = time.perf_counter() - start
+    except Exception as e:
+        return {'backend': name, 'error': str(e)}
+
+    latencies = []
+    for image in images[1:]:
+        start = time.perf_counter()
+        engine.image_to_string(image)
+        latencies.append(time.perf_counter() - start)
+
+    latencies.sort()
+    return {
+        'backend': name,
+        'pages': len(images),
+        'first_call_ms': round(first_call * 1000, 1),
+        'mean_ms': round(statistics.mean(latencies) * 1000, 1) if latencies else None,
+        'p50_ms': round(latencies[len(latencies) // 2] * 1000, 1) if latencies else None,
+        'p95_ms': round(latencies[int(len(latencies) * 0.95)] * 1000, 1) if latencies else None,
+    }
+
+
+def _cpu_seconds() -> float:
+    """CPU proses ini ditambah proses anak (pytesseract menjalankan tesseract sebagai subprocess)"""
+    children = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return time.process_time() + children.ru_utime + children.ru_stime
+
+
+def bench_mode(name: str, document, pages: int, settings: OcrSettings) -> dict:
+    """Waktu CPU rata-rata per halaman untuk satu mode OCR (render + OCR, termasuk render ulang)"""
+    # Pemanasan: muat model bahasa di luar pengukuran
+    ocr_page(document, 0, settings)
+
+    start = _cpu_seconds()
+    results = [ocr_page(document, page_num % len(document), settings) for page_num in range(pages)]
+    cpu_seconds = _cpu_seconds() - start
+
+    confidences = [result.confidence for result in results if result.confidence is not None]
+    return {
+        'mode': name,
+        'pages': pages,
+        'cpu_ms_per_page': round(cpu_seconds / pages * 1000, 1),
+        'rerendered_pages': sum(1 for result in results if result.rerendered),
+        'mean_confidence': round(statistics.mean(confidences), 1) if confidences else None,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('pdf', nargs='?', help='PDF sumber halaman (opsional)')
+    parser.add_argument('--pages', type=int, default=10)
+    parser.add_argument('--dpi', type=int, default=144)
+    parser.add_argument('--colorspace', default='gray', choices=['gray', 'rgb'])
+    parser.add_argument('--lang', default='ind+eng')
+    parser.add_argument('--backend', default='auto', help='Backend untuk --adaptive')
+    parser.add_argument('--adaptive', action='store_true', help='Bandingkan OCR tetap vs adaptif')
+    parser.add_argument('--low-dpi', type=int, default=100)
+    parser.add_argument('--high-dpi', type=int, default=300)
+    parser.add_argument('--min-confidence', type=float, default=70.0)
+    parser.add_argument('--json', help='Simpan hasil ke file JSON')
+    args = parser.parse_args()
+
+    if args.adaptive:
+        document = open_document(args.pdf, args.pages)
+        modes = {
+            'fixed': OcrSettings(args.lang, args.dpi, args.colorspace, args.backend),
+            'adaptive': OcrSettings(args.lang, args.low_dpi, args.colorspace, args.backend, adaptive=True,
+                                    high_dpi=args.high_dpi, min_confidence=args.min_confidence),
+        }
+        report = []
+        for name, settings in modes.items():
+            row = bench_mode(name, document, args.pages, settings)
+            report.append(row)
+            print(f"{name:<10} {row['pages']:>4} hal  CPU {row['cpu_ms_per_page']:>8.1f} ms/hal  "
+                  f"render ulang {row['rerendered_pages']}  confidence {row['mean_confidence']}")
+        document.close()
+
+        if args.json:
+            with open(args.json, 'w') as f:
+                json.dump(report, f, indent=2)
+        return
+
+    images = load_pages(args.pdf, args.pages, args.dpi, args.colorspace)
+
+    report = []
+    for name in OCR_BACKENDS:
+        row = bench_backend(name, args.lang, images)
+        report.append(row)
+        if 'error' in row:
+            print(f"{name:<12} tidak tersedia: {row['error']}")
+        else:
+            print(f"{name:<12} {row['pages']:>4} hal  pertama {row['first_call_ms']:>8.1f} ms  "
+                  f"rata-rata {row['mean_ms']} ms  p50 {row['p50_ms']} ms  p95 {row['p95_ms']} ms")
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
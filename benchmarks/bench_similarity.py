@@ -0,0 +1,119 @@
+"""Benchmark similarity item antar instansi: SequenceMatcher per pasangan vs engine TF-IDF n-gram karakter.
+
+Item tugas/fungsi/program sintetis dibangkitkan dari frasa khas dokumen pemerintahan dengan
+variasi (imbuhan, urutan, salah ketik OCR), lalu semua pasangan item antar instansi pada field
+yang sama dibandingkan. Diukur waktu total, jumlah pasangan di atas threshold, dan berapa
+pasangan SequenceMatcher yang juga ditemukan engine (recall).
+
+Contoh:
+    python benchmarks/bench_similarity.py --agencies 6 --items 40
+    python benchmarks/bench_similarity.py --agencies 20 --items 100 --skip-baseline
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import time
+from difflib import SequenceMatcher
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+
+from similarity_utils import ITEM_FIELDS, collect_items, find_candidate_pairs  # noqa: E402
+
+ACTIONS = ['Perumusan kebijakan', 'Pelaksanaan kebijakan', 'Koordinasi', 'Pembinaan dan pengawasan',
+           'Penyusunan rencana', 'Pengelolaan data', 'Evaluasi dan pelaporan', 'Fasilitasi']
+TOPICS = ['pendidikan dasar', 'kesehatan masyarakat', 'keuangan daerah', 'statistik nasional',
+          'perencanaan pembangunan', 'pemberdayaan desa', 'tenaga kerja', 'lingkungan hidup',
+          'sarana dan prasarana', 'pelayanan publik', 'ketahanan pangan', 'transportasi darat']
+SUFFIXES = ['', ' di bidang {topic}', ' tingkat provinsi', ' secara terpadu', ' sesuai ketentuan peraturan']
+
+
+class SyntheticAgency:
+    def __init__(self, nama, **fields):
+        self.nama = nama
+        for field in ITEM_FIELDS:
+            setattr(self, field, fields.get(field, []))
+
+
+def typo(text: str, rng: random.Random) -> str:
+    """Tukar satu huruf seperti salah baca OCR"""
+    i = rng.randrange(len(text))
+    return text[:i] + rng.choice('aeiourn') + text[i + 1:]
+
+
+def generate_agencies(count: int, items: int, seed: int):
+    rng = random.Random(seed)
+    agencies = []
+    for a in range(count):
+        fields = {}
+        for field in ITEM_FIELDS:
+            values = []
+            for _ in range(items):
+                topic = rng.choice(TOPICS)
+                text = f"{rng.choice(ACTIONS)} {topic}{rng.choice(SUFFIXES).format(topic=rng.choice(TOPICS))}"
+                values.append(typo(text, rng) if rng.random() < 0.2 else text)
+            fields[field] = values
+        agencies.append(SyntheticAgency(f"Instansi {a + 1}", **fields))
+    return agencies
+
+
+def sequence_matcher_pairs(agencies, threshold: float) -> set:
+    items = collect_items(agencies)
+    pairs = set()
+    for i, a in enumerate(items):
+        for b in items[i + 1:]:
+            if a.instansi == b.instansi or a.field != b.field:
+                continue
+            if SequenceMatcher(None, a.text.lower(), b.text.lower()).ratio() >= threshold:
+                pairs.add((a.instansi, a.field, a.text, b.instansi, b.text))
+    return pairs
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--agencies', type=int, default=6)
+    parser.add_argument('--items', type=int, default=40, help='Item per field per instansi')
+    parser.add_argument('--threshold', type=float, default=0.5, help='Threshold engine TF-IDF')
+    parser.add_argument('--baseline-threshold', type=float, default=0.8, help='Threshold SequenceMatcher')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--skip-baseline', action='store_true', help='Lewati SequenceMatcher (lambat untuk data besar)')
+    parser.add_argument('--json', help='Simpan hasil ke file JSON')
+    args = parser.parse_args()
+
+    agencies = generate_agencies(args.agencies, args.items, args.seed)
+    total_items = len(collect_items(agencies))
+
+    start = time.perf_counter()
+    candidates = find_candidate_pairs(agencies, args.threshold)
+    engine_seconds = time.perf_counter() - start
+    engine_pairs = {(p.item_a.instansi, p.item_a.field, p.item_a.text, p.item_b.instansi, p.item_b.text)
+                    for p in candidates}
+
+    report = {
+        'agencies': args.agencies,
+        'items': total_items,
+        'engine_seconds': round(engine_seconds, 4),
+        'engine_pairs': len(engine_pairs)
+    }
+    if not args.skip_baseline:
+        start = time.perf_counter()
+        baseline_pairs = sequence_matcher_pairs(agencies, args.baseline_threshold)
+        baseline_seconds = time.perf_counter() - start
+        report.update({
+            'baseline_seconds': round(baseline_seconds, 4),
+            'baseline_pairs': len(baseline_pairs),
+            'speedup': round(baseline_seconds / engine_seconds, 1) if engine_seconds else None,
+            'recall_vs_baseline': round(len(baseline_pairs & engine_pairs) / len(baseline_pairs), 3)
+            if baseline_pairs else None
+        })
+
+    print(json.dumps(report, indent=2))
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,87 @@
+"""Benchmark analisis tumpang tindih: respons penuh vs streaming, terhadap stub server lokal.
+
+Mengukur waktu sampai insight pertama (ringkasan eksekutif dan item tumpang_tindih pertama
+tersedia) dibanding total latensi. Stub (benchmarks/gemini_stub_server.py) mengirim respons
+stream dalam --stream-chunks potongan sepanjang --latency detik. Cache respons dinonaktifkan.
+
+Contoh:
+    python benchmarks/bench_streaming.py --latency 20 --agencies 6
+    python benchmarks/bench_streaming.py --latency 5 --json hasil.json
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+sys.path.insert(0, BENCH_DIR)
+
+from gemini_stub_server import start_stub_server  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--agencies', type=int, default=4)
+    parser.add_argument('--latency', type=float, default=5.0)
+    parser.add_argument('--stream-chunks', type=int, default=20)
+    parser.add_argument('--model', default='gemini-2.5-pro')
+    parser.add_argument('--json', help='Simpan hasil ke file JSON')
+    args = parser.parse_args()
+
+    server, url = start_stub_server(args.latency, stream_chunks=args.stream_chunks)
+    os.environ['GEMINI_API_ENDPOINT'] = url
+    os.environ['LLM_CACHE_MAX_MB'] = '0'
+
+    from gemini_analyzer import GeminiAnalyzer, InstansiData
+
+    analyzer = GeminiAnalyzer('stub-key', args.model, notifier=lambda level, message: print(level, message))
+    instansi_list = [
+        InstansiData(f"Instansi {i + 1}", ["Tugas"], ["Perumusan kebijakan"], ["Program"], [], '', [], ['dokumen.pdf'])
+        for i in range(args.agencies)
+    ]
+
+    start = time.perf_counter()
+    blocking_result = analyzer.analyze_overlaps(instansi_list)
+    blocking_seconds = time.perf_counter() - start
+
+    first_seen = {}
+
+    def on_partial(partial):
+        elapsed = time.perf_counter() - start
+        if 'ringkasan_eksekutif' in partial:
+            first_seen.setdefault('ringkasan_eksekutif', elapsed)
+        if partial.get('tumpang_tindih'):
+            first_seen.setdefault('tumpang_tindih_pertama', elapsed)
+        first_seen.setdefault('pembaruan_pertama', elapsed)
+        first_seen['pembaruan'] = first_seen.get('pembaruan', 0) + 1
+
+    start = time.perf_counter()
+    streaming_result = analyzer.analyze_overlaps(instansi_list, on_partial=on_partial)
+    streaming_seconds = time.perf_counter() - start
+    server.shutdown()
+
+    report = {
+        'agencies': args.agencies,
+        'latency': args.latency,
+        'stream_chunks': args.stream_chunks,
+        'blocking_seconds': round(blocking_seconds, 3),
+        'streaming_seconds': round(streaming_seconds, 3),
+        'first_summary_seconds': round(first_seen.get('ringkasan_eksekutif', streaming_seconds), 3),
+        'first_overlap_seconds': round(first_seen.get('tumpang_tindih_pertama', streaming_seconds), 3),
+        'partial_updates': first_seen.get('pembaruan', 0),
+        'same_result': blocking_result == streaming_result
+    }
+    print(f"respons penuh {report['blocking_seconds']:.2f}s | streaming total {report['streaming_seconds']:.2f}s, "
+          f"ringkasan {report['first_summary_seconds']:.2f}s, tumpang tindih pertama "
+          f"{report['first_overlap_seconds']:.2f}s ({report['partial_updates']} pembaruan, "
+          f"hasil sama: {report['same_result']})")
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
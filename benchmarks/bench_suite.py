@@ -0,0 +1,311 @@
+"""Suite benchmark throughput ekstraksi di atas korpus sintetis (lihat benchmarks/corpus.py).
+
+Untuk setiap dokumen korpus dan setiap backend ekstraksi diukur halaman/detik, peak RSS,
+dan waktu per tahap (buka, text layer, penargetan, OCR, gabung teks). Setiap pengukuran
+berjalan di proses terpisah dengan cache teks/OCR kosong. Hasil ditulis sebagai JSON
+bersama metadata commit sehingga dapat dibandingkan antar commit dengan --compare.
+
+Backend:
+    pypdf2        text layer PyPDF2 (jalur cadangan tanpa PyMuPDF)
+    pymupdf_text  text layer PyMuPDF saja
+    engine        jalur DocumentProcessor: text layer, penargetan halaman, OCR halaman scan
+    ocr_simple    OCR seluruh halaman (DocumentProcessor.ocr_pdf_simple)
+
+Contoh:
+    python benchmarks/bench_suite.py --scale small --output hasil_baru.json
+    python benchmarks/bench_suite.py --backends pypdf2,pymupdf_text --compare hasil_lama.json
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Dict, List, Optional
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+sys.path.insert(0, BENCH_DIR)
+
+from corpus import CORPUS_SCALES, generate_corpus  # noqa: E402
+
+RESULT_VERSION = 1
+DEFAULT_THRESHOLD = 0.10  # Penurunan throughput / kenaikan peak RSS di atas 10% dianggap regresi
+
+
+class StageTimer:
+    """Akumulasi waktu per tahap ekstraksi"""
+
+    def __init__(self):
+        self.stages: Dict[str, float] = {}
+
+    @contextmanager
+    def stage(self, name: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.stages[name] = self.stages.get(name, 0.0) + time.perf_counter() - start
+
+
+def bench_pypdf2(doc_processor, pdf_path: str, timer: StageTimer) -> tuple:
+    import PyPDF2
+
+    with timer.stage('open'):
+        pages = PyPDF2.PdfReader(pdf_path).pages
+    with timer.stage('text_layer'):
+        texts = [page.extract_text() or "" for page in pages]
+    return len(texts), len(texts), 0
+
+
+def bench_pymupdf_text(doc_processor, pdf_path: str, timer: StageTimer) -> tuple:
+    from pdf_utils import PdfSource
+
+    with timer.stage('open'):
+        source = PdfSource(pdf_path)
+    with source:
+        with timer.stage('text_layer'):
+            texts = source.page_texts()
+    return len(texts), len(texts), 0
+
+
+def bench_engine(doc_processor, pdf_path: str, timer: StageTimer) -> tuple:
+    """Tahapan yang sama dengan DocumentProcessor._iter_pages_uncached, diukur per tahap"""
+    from ocr_utils import page_needs_ocr
+    from pdf_utils import PAGE_SOURCE_OCR, PAGE_SOURCE_TEXT, PageRecord, PdfSource, join_page_records, \
+        select_target_pages
+
+    with timer.stage('open'):
+        source = PdfSource(pdf_path)
+    with source:
+        with timer.stage('text_layer'):
+            page_texts = source.page_texts()
+        with timer.stage('targeting'):
+            page_numbers = select_target_pages(source.document, page_texts, doc_processor.page_budget)
+            if page_numbers is None:
+                page_numbers = list(range(len(page_texts)))
+            ocr_page_numbers = [page_num for page_num in page_numbers if page_needs_ocr(page_texts[page_num])]
+        with timer.stage('ocr'):
+            ocr_texts = dict(doc_processor._iter_ocr_pages(source, ocr_page_numbers))
+
+    with timer.stage('join'):
+        join_page_records(
+            PageRecord("", page_num + 1, PAGE_SOURCE_OCR, ocr_texts[page_num]) if page_num in ocr_texts
+            else PageRecord("", page_num + 1, PAGE_SOURCE_TEXT, page_texts[page_num])
+            for page_num in page_numbers
+        )
+    return len(page_texts), len(page_numbers), len(ocr_page_numbers)
+
+
+def bench_ocr_simple(doc_processor, pdf_path: str, timer: StageTimer) -> tuple:
+    from pdf_utils import PAGE_SOURCE_OCR, PageRecord, PdfSource, join_page_records
+
+    with timer.stage('open'):
+        source = PdfSource(pdf_path)
+    with source:
+        page_numbers = list(range(source.page_count))
+        with timer.stage('ocr'):
+            ocr_texts = dict(doc_processor._iter_ocr_pages(source, page_numbers))
+
+    with timer.stage('join'):
+        join_page_records(PageRecord("", page_num + 1, PAGE_SOURCE_OCR, ocr_texts[page_num])
+                          for page_num in page_numbers)
+    return len(page_numbers), len(page_numbers), len(page_numbers)
+
+
+BACKENDS = {
+    'pypdf2': bench_pypdf2,
+    'pymupdf_text': bench_pymupdf_text,
+    'engine': bench_engine,
+    'ocr_simple': bench_ocr_simple,
+}
+
+
+def _run_once(backend: str, pdf_path: str, results):
+    # Cache kosong di setiap pengukuran agar yang diukur adalah ekstraksi sebenarnya
+    os.environ['SIHATI_CACHE_DIR'] = tempfile.mkdtemp(prefix='sihati-bench-')
+    os.environ['OCR_CACHE_MAX_MB'] = '0'
+
+    # Impor semua library backend lebih dulu agar waktu buka dan peak RSS tidak mencakup impor
+    import fitz  # noqa: F401
+    import PyPDF2  # noqa: F401
+    from document_processor import DocumentProcessor
+    from ocr_utils import get_ocr_pool
+
+    doc_processor = DocumentProcessor()
+    if backend in ('engine', 'ocr_simple') and doc_processor.ocr_workers > 1:
+        # Start-up process pool tidak dihitung sebagai waktu ekstraksi
+        get_ocr_pool(doc_processor.ocr_workers)
+    baseline_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    timer = StageTimer()
+    start = time.perf_counter()
+    try:
+        pages, extracted_pages, ocr_pages = BACKENDS[backend](doc_processor, pdf_path, timer)
+    except Exception as e:
+        results.put({'error': f"{type(e).__name__}: {e}"})
+        return
+    elapsed = time.perf_counter() - start
+
+    # Linux melaporkan ru_maxrss dalam KB; worker OCR paralel dilaporkan terpisah
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    results.put({
+        'pages': pages,
+        'extracted_pages': extracted_pages,
+        'ocr_pages': ocr_pages,
+        'seconds': elapsed,
+        'stages': timer.stages,
+        'peak_rss_mb': peak_rss / 1024,
+        'peak_rss_delta_mb': (peak_rss - baseline_rss) / 1024,
+        'ocr_settings': doc_processor.ocr_settings._asdict(),
+        'ocr_workers': doc_processor.ocr_workers,
+        'page_budget': doc_processor.page_budget
+    })
+
+
+def measure(backend: str, pdf_path: str) -> dict:
+    """Satu pengukuran di proses terpisah agar peak RSS dan state cache tidak tercampur"""
+    context = multiprocessing.get_context('spawn')
+    results = context.Queue()
+    process = context.Process(target=_run_once, args=(backend, pdf_path, results))
+    process.start()
+    result = results.get()
+    process.join()
+    return result
+
+
+def bench_document(entry: dict, pdf_path: str, backend: str, repeat: int) -> dict:
+    runs = [measure(backend, pdf_path) for _ in range(repeat)]
+    row = {'document': entry['name'], 'kind': entry['kind'], 'backend': backend}
+
+    errors = [run['error'] for run in runs if 'error' in run]
+    if errors:
+        row['error'] = errors[0]
+        return row
+
+    best = min(runs, key=lambda run: run['seconds'])
+    row.update({
+        'pages': best['pages'],
+        'extracted_pages': best['extracted_pages'],
+        'ocr_pages': best['ocr_pages'],
+        'seconds': round(best['seconds'], 4),
+        'pages_per_sec': round(best['pages'] / best['seconds'], 2) if best['seconds'] else 0.0,
+        'stages': {name: round(seconds, 4) for name, seconds in best['stages'].items()},
+        'peak_rss_mb': round(max(run['peak_rss_mb'] for run in runs), 1),
+        'peak_rss_delta_mb': round(max(run['peak_rss_delta_mb'] for run in runs), 1),
+        'settings': {key: best[key] for key in ('ocr_settings', 'ocr_workers', 'page_budget')}
+    })
+    return row
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(['git', 'rev-parse', 'HEAD'], cwd=BENCH_DIR, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare_reports(baseline: dict, report: dict, threshold: float) -> List[str]:
+    """Bandingkan dua hasil; kembalikan daftar regresi throughput/peak RSS di atas threshold"""
+    previous = {(row['document'], row['backend']): row for row in baseline['results'] if 'error' not in row}
+    regressions = []
+
+    print(f"\nDibandingkan dengan {str(baseline['meta'].get('commit'))[:12]} (threshold {threshold:.0%}):")
+    for row in report['results']:
+        old = previous.get((row['document'], row['backend']))
+        if old is None or 'error' in row:
+            continue
+
+        speed_ratio = row['pages_per_sec'] / old['pages_per_sec'] if old['pages_per_sec'] else 1.0
+        rss_ratio = row['peak_rss_delta_mb'] / old['peak_rss_delta_mb'] if old['peak_rss_delta_mb'] > 0 else 1.0
+        flags = []
+        if speed_ratio < 1 - threshold:
+            flags.append('throughput')
+        if rss_ratio > 1 + threshold and row['peak_rss_delta_mb'] - old['peak_rss_delta_mb'] >= 1:
+            flags.append('peak_rss')
+
+        label = f"{row['document']}/{row['backend']}"
+        print(f"  {label:<32} {speed_ratio:>6.2f}x hal/detik  {rss_ratio:>6.2f}x RSS  {' '.join(flags)}")
+        if flags:
+            regressions.append(f"{label}: {', '.join(flags)}")
+
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0],
+                                     formatter_class=argparse.RawDescriptionHelpFormatter, epilog=__doc__)
+    parser.add_argument('--corpus-dir', default=os.path.join(tempfile.gettempdir(), 'sihati-bench-corpus'),
+                        help='Lokasi korpus (dibuat jika belum ada)')
+    parser.add_argument('--scale', default='standard', choices=list(CORPUS_SCALES))
+    parser.add_argument('--backends', default=','.join(BACKENDS), help='Backend dipisah koma')
+    parser.add_argument('--documents', help='Nama dokumen korpus dipisah koma (default semua)')
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--output', help='Simpan hasil ke file JSON')
+    parser.add_argument('--compare', help='Hasil JSON commit lain sebagai pembanding')
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD)
+    args = parser.parse_args()
+
+    backends = [name.strip() for name in args.backends.split(',') if name.strip()]
+    unknown = sorted(set(backends) - set(BACKENDS))
+    if unknown:
+        parser.error(f"backend tidak dikenal: {', '.join(unknown)}")
+
+    manifest = generate_corpus(os.path.join(args.corpus_dir, args.scale), args.scale)
+    documents = manifest['documents']
+    if args.documents:
+        selected = {name.strip() for name in args.documents.split(',')}
+        documents = [entry for entry in documents if entry['name'] in selected]
+
+    results = []
+    for entry in documents:
+        pdf_path = os.path.join(args.corpus_dir, args.scale, entry['file'])
+        for backend in backends:
+            row = bench_document(entry, pdf_path, backend, args.repeat)
+            results.append(row)
+
+            label = f"{row['document']:<14} {row['backend']:<13}"
+            if 'error' in row:
+                print(f"{label} ERROR {row['error']}")
+                continue
+            stages = '  '.join(f"{name}={seconds * 1000:.0f}ms" for name, seconds in row['stages'].items())
+            print(f"{label} {row['pages']:>5} hal ({row['extracted_pages']:>4} ekstrak, {row['ocr_pages']:>4} OCR)  "
+                  f"{row['pages_per_sec']:>9.2f} hal/detik  "
+                  f"{row['peak_rss_mb']:>7.1f} MB (+{row['peak_rss_delta_mb']:.1f})  {stages}")
+
+    report = {
+        'version': RESULT_VERSION,
+        'meta': {
+            'commit': git_commit(),
+            'created': datetime.now().isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+            'repeat': args.repeat
+        },
+        'corpus': manifest,
+        'results': results
+    }
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            baseline = json.load(f)
+        regressions = compare_reports(baseline, report, args.threshold)
+        if regressions:
+            print(f"\n❌ {len(regressions)} regresi: " + '; '.join(regressions))
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,201 @@
+"""Generator korpus PDF sintetis yang reproducible untuk benchmark ekstraksi (reportlab).
+
+Korpus mencakup PDF teks digital, scan tanpa text layer di beberapa DPI, dokumen
+campuran, dan dokumen dengan jumlah halaman sangat besar. Isi setiap dokumen
+ditentukan oleh seed dan PDF ditulis dalam mode invariant reportlab, sehingga
+korpus yang sama menghasilkan byte yang sama di setiap mesin dan commit.
+
+Contoh:
+    python benchmarks/corpus.py --output-dir /tmp/sihati-corpus
+    python benchmarks/corpus.py --output-dir /tmp/sihati-corpus --scale small
+"""
+import argparse
+import hashlib
+import json
+import os
+import random
+from typing import Dict, List, NamedTuple, Optional
+
+CORPUS_VERSION = 1  # Naikkan jika isi dokumen berubah agar korpus lama dibuat ulang
+MANIFEST_NAME = 'corpus.json'
+
+# Jenis dokumen
+KIND_DIGITAL = 'digital'
+KIND_SCAN = 'scan'
+KIND_MIXED = 'mixed'
+
+LINES_PER_PAGE = 40
+FONT_SIZE = 10  # pt, dipakai untuk text layer maupun teks pada gambar scan
+
+SUBJECTS = [
+    'penyelenggaraan urusan pemerintahan', 'perumusan kebijakan teknis', 'pembinaan dan pengawasan',
+    'koordinasi pelaksanaan tugas', 'pengelolaan barang milik negara', 'pelaksanaan evaluasi dan pelaporan',
+    'pelayanan administrasi', 'penyusunan rencana strategis', 'pengembangan sumber daya manusia',
+    'pengelolaan data dan informasi statistik', 'pemberdayaan masyarakat desa', 'perencanaan pembangunan daerah',
+]
+FIELDS = [
+    'bidang perencanaan', 'bidang keuangan', 'bidang kepegawaian', 'bidang statistik', 'bidang pendidikan',
+    'bidang kesehatan', 'bidang pekerjaan umum', 'bidang pemerintahan dalam negeri', 'bidang ketenagakerjaan',
+]
+FILLER = [
+    'sesuai dengan ketentuan peraturan perundang-undangan', 'dalam rangka mendukung pencapaian sasaran',
+    'secara terpadu dan berkelanjutan', 'berdasarkan kebijakan yang ditetapkan oleh Menteri',
+    'di lingkungan kementerian', 'bersama pemerintah daerah provinsi dan kabupaten/kota',
+]
+
+
+class CorpusSpec(NamedTuple):
+    name: str
+    kind: str
+    pages: int
+    dpi: int = 0  # DPI gambar scan; 0 untuk dokumen digital
+    scan_every: int = 0  # Dokumen campuran: setiap N halaman berupa scan
+    seed: int = 0
+
+
+# Skala korpus: 'small' untuk cek cepat, 'standard' untuk perbandingan antar commit
+CORPUS_SCALES: Dict[str, List[CorpusSpec]] = {
+    'small': [
+        CorpusSpec('digital_20', KIND_DIGITAL, 20, seed=1),
+        CorpusSpec('scan_100dpi', KIND_SCAN, 2, dpi=100, seed=2),
+        CorpusSpec('scan_200dpi', KIND_SCAN, 2, dpi=200, seed=3),
+        CorpusSpec('mixed_12', KIND_MIXED, 12, dpi=150, scan_every=4, seed=4),
+        CorpusSpec('digital_200', KIND_DIGITAL, 200, seed=5),
+    ],
+    'standard': [
+        CorpusSpec('digital_20', KIND_DIGITAL, 20, seed=1),
+        CorpusSpec('scan_100dpi', KIND_SCAN, 5, dpi=100, seed=2),
+        CorpusSpec('scan_200dpi', KIND_SCAN, 5, dpi=200, seed=3),
+        CorpusSpec('scan_300dpi', KIND_SCAN, 5, dpi=300, seed=6),
+        CorpusSpec('mixed_40', KIND_MIXED, 40, dpi=150, scan_every=4, seed=4),
+        CorpusSpec('digital_1000', KIND_DIGITAL, 1000, seed=5),
+    ],
+}
+
+
+def page_lines(rng: random.Random, page_num: int) -> List[str]:
+    """Isi satu halaman: judul BAB/Pasal, kalimat TUPOKSI, dan sesekali tabel program/kegiatan"""
+    lines = []
+    if page_num % 5 == 0:
+        lines.append(f"BAB {page_num // 5 + 1} TUGAS DAN FUNGSI")
+    lines.append(f"Pasal {page_num + 1}")
+
+    while len(lines) < LINES_PER_PAGE:
+        if rng.random() < 0.1:
+            lines.append(f"Kode Program {rng.randint(1, 99):02d} Kegiatan {rng.randint(1000, 9999)} "
+                         f"{rng.choice(SUBJECTS)}")
+        else:
+            lines.append(f"({len(lines)}) {rng.choice(SUBJECTS)} di {rng.choice(FIELDS)} {rng.choice(FILLER)};")
+    return lines
+
+
+def render_scan_image(lines: List[str], width_pt: float, height_pt: float, dpi: int):
+    """Gambar halaman scan (grayscale) tanpa text layer dengan ukuran huruf setara FONT_SIZE"""
+    from PIL import Image, ImageDraw, ImageFont
+
+    scale = dpi / 72
+    image = Image.new('L', (round(width_pt * scale), round(height_pt * scale)), 255)
+    draw = ImageDraw.Draw(image)
+    font = ImageFont.load_default(size=max(8, round(FONT_SIZE * scale)))
+    line_height = 1.5 * FONT_SIZE * scale
+    for line_num, line in enumerate(lines):
+        draw.text((50 * scale, 60 * scale + line_num * line_height), line, fill=0, font=font)
+    return image
+
+
+def write_pdf(path: str, spec: CorpusSpec):
+    """Tulis satu dokumen korpus; mode invariant membuat output byte-identik untuk spec yang sama"""
+    from reportlab.lib.pagesizes import A4
+    from reportlab.lib.utils import ImageReader
+    from reportlab.pdfgen import canvas
+
+    rng = random.Random(spec.seed)
+    width, height = A4
+    pdf = canvas.Canvas(path, pagesize=A4, invariant=1)
+    pdf.setTitle(spec.name)
+
+    for page_num in range(spec.pages):
+        lines = page_lines(rng, page_num)
+        is_scan = spec.kind == KIND_SCAN or (
+            spec.kind == KIND_MIXED and page_num % spec.scan_every == spec.scan_every - 1
+        )
+
+        if is_scan:
+            image = render_scan_image(lines, width, height, spec.dpi)
+            pdf.drawImage(ImageReader(image), 0, 0, width=width, height=height)
+        else:
+            pdf.setFont('Helvetica', FONT_SIZE)
+            for line_num, line in enumerate(lines):
+                pdf.drawString(50, height - 60 - line_num * 1.5 * FONT_SIZE, line)
+        pdf.showPage()
+
+    pdf.save()
+
+
+def sha256_file(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _load_manifest(output_dir: str) -> Optional[dict]:
+    try:
+        with open(os.path.join(output_dir, MANIFEST_NAME), encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def generate_corpus(output_dir: str, scale: str = 'standard', force: bool = False) -> dict:
+    """Buat korpus di output_dir (dilewati jika manifest dengan versi dan skala sama sudah ada).
+
+    Mengembalikan manifest: versi, skala, dan daftar dokumen beserta path, jenis, jumlah
+    halaman, DPI, ukuran, dan sha256.
+    """
+    specs = CORPUS_SCALES[scale]
+    manifest = _load_manifest(output_dir)
+    if (not force and manifest and manifest.get('version') == CORPUS_VERSION and manifest.get('scale') == scale
+            and all(os.path.exists(os.path.join(output_dir, entry['file'])) for entry in manifest['documents'])):
+        return manifest
+
+    os.makedirs(output_dir, exist_ok=True)
+    documents = []
+    for spec in specs:
+        file_name = f"{spec.name}.pdf"
+        path = os.path.join(output_dir, file_name)
+        write_pdf(path, spec)
+        documents.append({
+            'name': spec.name,
+            'file': file_name,
+            'kind': spec.kind,
+            'pages': spec.pages,
+            'dpi': spec.dpi,
+            'scan_every': spec.scan_every,
+            'seed': spec.seed,
+            'bytes': os.path.getsize(path),
+            'sha256': sha256_file(path)
+        })
+
+    manifest = {'version': CORPUS_VERSION, 'scale': scale, 'documents': documents}
+    with open(os.path.join(output_dir, MANIFEST_NAME), 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2)
+    return manifest
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--output-dir', required=True)
+    parser.add_argument('--scale', default='standard', choices=list(CORPUS_SCALES))
+    parser.add_argument('--force', action='store_true', help='Buat ulang meskipun korpus sudah ada')
+    args = parser.parse_args()
+
+    manifest = generate_corpus(args.output_dir, args.scale, args.force)
+    for entry in manifest['documents']:
+        print(f"{entry['file']:<20} {entry['kind']:<8} {entry['pages']:>5} hal  "
+              f"{entry['bytes'] / 1024:>9.1f} KB  {entry['sha256'][:12]}")
+
+
+if __name__ == '__main__':
+    main()
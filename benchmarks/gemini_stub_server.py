@@ -0,0 +1,274 @@
+"""Server stub lokal yang meniru endpoint REST generateContent Gemini dengan latensi yang bisa diatur.
+
+Dipakai untuk menguji dan mengukur jalur LLM tanpa kuota/biaya API: arahkan aplikasi ke
+stub dengan GEMINI_API_ENDPOINT=http://127.0.0.1:<port>. Statistik request (jumlah,
+maksimal request bersamaan, error yang disuntikkan) tersedia di GET /stats.
+
+Error sementara dapat disuntikkan untuk menguji retry/failover: --error-rate mengembalikan
+--error-status (429 atau 503) secara acak, --throttle-models selalu mengembalikan 429
+untuk model tertentu.
+
+streamGenerateContent juga didukung: teks respons dikirim dalam --stream-chunks potongan
+yang tersebar merata sepanjang latensi, seperti model yang menulis token demi token.
+--truncate-rate memotong teks respons secara acak (mis. batas max_output_tokens) untuk
+menguji parser JSON toleran; request dengan responseSchema dihitung di /stats.
+--empty-rate membuat respons ekstraksi model di --empty-models kosong secara acak untuk
+menguji eskalasi routing cascade (model cepat gagal, model kuat mengulang).
+
+Contoh:
+    python benchmarks/gemini_stub_server.py --port 8765 --latency 2.0 --jitter 0.5
+    python benchmarks/gemini_stub_server.py --error-rate 0.3 --throttle-models gemini-2.5-pro
+    python benchmarks/gemini_stub_server.py --empty-rate 0.3 --empty-models gemini-2.5-flash
+    GEMINI_API_ENDPOINT=http://127.0.0.1:8765 GEMINI_API_KEY=stub streamlit run app.py
+"""
+import argparse
+import json
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Iterable, List, Optional, Tuple
+
+PATH_PATTERN = re.compile(r'^/v1(beta)?/models/(?P<model>[^:/]+):(?P<method>generateContent|streamGenerateContent)')
+INSTANSI_PATTERN = re.compile(r'Nama Instansi:\s*(?P<nama>.+)')
+OVERLAP_INSTANSI_PATTERN = re.compile(r'^INSTANSI \d+:\s*(?P<nama>.+)$', re.MULTILINE)
+
+
+def extraction_response(nama: str) -> dict:
+    return {
+        'tugas_pokok': [f"Menyelenggarakan urusan pemerintahan {nama}"],
+        'fungsi': ["Perumusan kebijakan", "Pelaksanaan kebijakan", "Pembinaan dan pengawasan"],
+        'program': ["Program Dukungan Manajemen", "Program Perencanaan Pembangunan"],
+        'kegiatan': ["Penyusunan rencana strategis", "Pengelolaan data dan informasi"],
+        'anggaran': "Rp 1 triliun (stub)",
+        'target_sasaran': ["Meningkatnya kualitas perencanaan"]
+    }
+
+
+def empty_extraction_response() -> dict:
+    return {'tugas_pokok': [], 'fungsi': [], 'program': [], 'kegiatan': [], 'anggaran': '', 'target_sasaran': []}
+
+
+def overlap_response(instansi: List[str]) -> dict:
+    pairs = list(zip(instansi, instansi[1:]))
+    levels = ['tinggi', 'sedang', 'rendah']
+    return {
+        'ringkasan_eksekutif': "Respons stub: tidak ada analisis sebenarnya.",
+        'tumpang_tindih': [{
+            'kategori': 'fungsi',
+            'deskripsi': f"Fungsi perumusan kebijakan {a} dan {b} beririsan (stub)",
+            'instansi_terlibat': [a, b],
+            'tingkat_overlap': levels[i % len(levels)],
+            'dampak_potensial': "Duplikasi kegiatan (stub)",
+            'dokumen_sumber': [],
+            'rekomendasi_koordinasi': "Forum koordinasi bersama (stub)"
+        } for i, (a, b) in enumerate(pairs)],
+        'rekomendasi': [],
+        'metrik_overlap': {
+            'total_overlap_ditemukan': len(pairs), 'overlap_tinggi': 0, 'overlap_sedang': 0, 'overlap_rendah': 0,
+            'efisiensi_potensial': '0%'
+        }
+    }
+
+
+ERROR_BODIES = {
+    429: {'code': 429, 'status': 'RESOURCE_EXHAUSTED',
+          'message': 'Resource has been exhausted (e.g. check quota). Please retry in 1s.'},
+    503: {'code': 503, 'status': 'UNAVAILABLE', 'message': 'The model is overloaded. Please try again later.'},
+}
+
+
+class StubState:
+    def __init__(self, latency: float, jitter: float, seed: int, error_rate: float = 0.0,
+                 error_status: int = 503, throttle_models: Iterable[str] = (), stream_chunks: int = 20,
+                 truncate_rate: float = 0.0, empty_rate: float = 0.0, empty_models: Iterable[str] = ()):
+        self.latency = latency
+        self.stream_chunks = max(1, stream_chunks)
+        self.truncate_rate = truncate_rate
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.throttle_models = set(throttle_models)
+        self.empty_rate = empty_rate
+        self.empty_models = set(empty_models)  # Kosong = semua model
+        self.rng = random.Random(seed)
+        self.requests = 0
+        self.errors = 0
+        self.truncated = 0
+        self.empty = 0
+        self.structured_requests = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.requests_by_model = {}
+        self.lock = threading.Lock()
+
+    def injected_error(self, model: str) -> Optional[int]:
+        """Status error yang harus dikembalikan untuk request ini, None jika normal"""
+        if model in self.throttle_models:
+            return 429
+        if self.error_rate and self.rng.random() < self.error_rate:
+            return self.error_status
+        return None
+
+    def snapshot(self) -> dict:
+        with self.lock:
+            return {'requests': self.requests, 'errors': self.errors, 'truncated': self.truncated, 'empty': self.empty,
+                    'structured_requests': self.structured_requests, 'in_flight': self.in_flight,
+                    'max_in_flight': self.max_in_flight, 'requests_by_model': dict(self.requests_by_model)}
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    server_version = 'SihatiGeminiStub/1.0'
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send_json(self, status: int, payload: dict):
+        body = json.dumps(payload).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if self.path == '/stats':
+            self._send_json(200, self.server.state.snapshot())
+        else:
+            self._send_json(404, {'error': {'code': 404, 'message': 'Not found', 'status': 'NOT_FOUND'}})
+
+    def do_POST(self):
+        match = PATH_PATTERN.match(self.path)
+        if not match:
+            self._send_json(404, {'error': {'code': 404, 'message': 'Not found', 'status': 'NOT_FOUND'}})
+            return
+
+        request = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))) or b'{}')
+        prompt = ''.join(part.get('text', '') for content in request.get('contents', [])
+                         for part in content.get('parts', []))
+
+        state = self.server.state
+        model = match.group('model')
+        with state.lock:
+            state.requests += 1
+            state.requests_by_model[model] = state.requests_by_model.get(model, 0) + 1
+            state.in_flight += 1
+            state.max_in_flight = max(state.max_in_flight, state.in_flight)
+            delay = max(0.0, state.latency + state.rng.uniform(-state.jitter, state.jitter))
+            error = state.injected_error(model)
+            if error:
+                state.errors += 1
+            if 'responseSchema' in request.get('generationConfig', {}):
+                state.structured_requests += 1
+            truncate = not error and state.truncate_rate and state.rng.random() < state.truncate_rate
+            if truncate:
+                state.truncated += 1
+                cut = state.rng.uniform(0.3, 0.9)
+            empty = (not error and state.empty_rate and (not state.empty_models or model in state.empty_models)
+                     and state.rng.random() < state.empty_rate)
+        streaming = match.group('method') == 'streamGenerateContent'
+        try:
+            # Error kuota dikembalikan segera, error overload setelah latensi normal.
+            # Respons stream menyebar latensinya di antara potongan teks.
+            if not streaming or error:
+                time.sleep(0 if error == 429 else delay)
+
+            if error:
+                self._send_json(error, {'error': ERROR_BODIES[error]})
+                return
+
+            instansi = INSTANSI_PATTERN.search(prompt)
+            if instansi and empty:
+                with state.lock:
+                    state.empty += 1
+                result = empty_extraction_response()
+            elif instansi:
+                result = extraction_response(instansi.group('nama').strip())
+            else:
+                result = overlap_response([m.group('nama').strip() for m in OVERLAP_INSTANSI_PATTERN.finditer(prompt)])
+            text = json.dumps(result, ensure_ascii=False, indent=2)
+            if truncate:
+                text = text[:int(len(text) * cut)]
+
+            if streaming:
+                self._send_stream(text, model, len(prompt), delay, truncate)
+            else:
+                self._send_json(200, self._response_payload(text, model, len(prompt), 'MAX_TOKENS' if truncate else 'STOP'))
+        finally:
+            with state.lock:
+                state.in_flight -= 1
+
+    def _response_payload(self, text: str, model: str, prompt_chars: int, finish_reason: Optional[str]) -> dict:
+        candidate = {'content': {'parts': [{'text': text}], 'role': 'model'}, 'index': 0}
+        if finish_reason:
+            candidate['finishReason'] = finish_reason
+        return {
+            'candidates': [candidate],
+            'usageMetadata': {'promptTokenCount': prompt_chars // 4, 'candidatesTokenCount': 200},
+            'modelVersion': model
+        }
+
+    def _send_stream(self, text: str, model: str, prompt_chars: int, delay: float, truncate: bool = False):
+        """Kirim array JSON GenerateContentResponse sepotong demi sepotong (format REST tanpa alt=sse)"""
+        chunks = self.server.state.stream_chunks
+        size = -(-len(text) // chunks)
+        pieces = [text[i:i + size] for i in range(0, len(text), size)]
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.end_headers()
+        self.wfile.write(b'[')
+        for index, piece in enumerate(pieces):
+            time.sleep(delay / len(pieces))
+            finish_reason = ('MAX_TOKENS' if truncate else 'STOP') if index == len(pieces) - 1 else None
+            payload = json.dumps(self._response_payload(piece, model, prompt_chars, finish_reason))
+            self.wfile.write(((',\n' if index else '') + payload).encode('utf-8'))
+            self.wfile.flush()
+        self.wfile.write(b']')
+
+
+def start_stub_server(latency: float = 1.0, jitter: float = 0.0, port: int = 0, seed: int = 0,
+                      error_rate: float = 0.0, error_status: int = 503,
+                      throttle_models: Iterable[str] = (), stream_chunks: int = 20,
+                      truncate_rate: float = 0.0, empty_rate: float = 0.0,
+                      empty_models: Iterable[str] = ()) -> Tuple[ThreadingHTTPServer, str]:
+    """Jalankan stub di daemon thread; kembalikan (server, url endpoint)"""
+    server = ThreadingHTTPServer(('127.0.0.1', port), StubHandler)
+    server.daemon_threads = True
+    server.state = StubState(latency, jitter, seed, error_rate, error_status, throttle_models, stream_chunks,
+                             truncate_rate, empty_rate, empty_models)
+    threading.Thread(target=server.serve_forever, name='gemini-stub', daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0],
+                                     formatter_class=argparse.RawDescriptionHelpFormatter, epilog=__doc__)
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--latency', type=float, default=1.0, help='Latensi respons dalam detik')
+    parser.add_argument('--jitter', type=float, default=0.0, help='Variasi latensi +/- detik')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--error-rate', type=float, default=0.0, help='Peluang request dijawab error')
+    parser.add_argument('--error-status', type=int, default=503, choices=sorted(ERROR_BODIES))
+    parser.add_argument('--throttle-models', default='', help='Model yang selalu dijawab 429, dipisah koma')
+    parser.add_argument('--stream-chunks', type=int, default=20, help='Jumlah potongan respons streamGenerateContent')
+    parser.add_argument('--truncate-rate', type=float, default=0.0, help='Peluang teks respons dipotong')
+    parser.add_argument('--empty-rate', type=float, default=0.0, help='Peluang respons ekstraksi kosong')
+    parser.add_argument('--empty-models', default='', help='Model yang terkena --empty-rate (default semua), dipisah koma')
+    args = parser.parse_args()
+
+    throttle_models = [name.strip() for name in args.throttle_models.split(',') if name.strip()]
+    empty_models = [name.strip() for name in args.empty_models.split(',') if name.strip()]
+    server, url = start_stub_server(args.latency, args.jitter, args.port, args.seed,
+                                    args.error_rate, args.error_status, throttle_models, args.stream_chunks,
+                                    args.truncate_rate, args.empty_rate, empty_models)
+    print(f"Stub Gemini berjalan di {url} (latensi {args.latency}s ± {args.jitter}s). Ctrl+C untuk berhenti.")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
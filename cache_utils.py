@@ -0,0 +1,179 @@
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from contextlib import contextmanager
+from typing import Any, Dict, Optional
+
+HASH_CHUNK_SIZE = 1024 * 1024  # 1MB
+
+_caches: Dict[str, 'DiskCache'] = {}
+_caches_lock = threading.Lock()
+
+
+def hash_file(file_obj) -> str:
+    """Hitung SHA-256 isi file upload (atau path file) tanpa membuat salinan penuh di memori"""
+    if isinstance(file_obj, (str, os.PathLike)):
+        with open(file_obj, 'rb') as f:
+            return hash_file(f)
+
+    digest = hashlib.sha256()
+
+    # UploadedFile / BytesIO: hash langsung dari buffer internal (zero-copy)
+    if hasattr(file_obj, 'getbuffer'):
+        with file_obj.getbuffer() as buffer:
+            digest.update(buffer)
+        return digest.hexdigest()
+
+    file_obj.seek(0)
+    for chunk in iter(lambda: file_obj.read(HASH_CHUNK_SIZE), b''):
+        digest.update(chunk)
+    file_obj.seek(0)
+    return digest.hexdigest()
+
+
+def make_cache_key(*parts: Any) -> str:
+    """Gabungkan beberapa komponen menjadi satu key cache yang stabil"""
+    return hashlib.sha256('\x1f'.join(str(part) for part in parts).encode('utf-8')).hexdigest()
+
+
+class DiskCache:
+    """Cache key-value persisten berbasis SQLite dengan eviction LRU berdasarkan ukuran.
+
+    Aman dipakai bersamaan oleh beberapa session Streamlit, thread, maupun proses
+    karena setiap operasi membuka koneksi SQLite sendiri (mode WAL).
+    """
+
+    def __init__(self, path: str, max_bytes: int, ttl_seconds: Optional[float] = None):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS entries (
+                    key TEXT PRIMARY KEY,
+                    value BLOB NOT NULL,
+                    size INTEGER NOT NULL,
+                    created REAL NOT NULL,
+                    accessed REAL NOT NULL
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_entries_accessed ON entries(accessed)")
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def get(self, key: str) -> Optional[str]:
+        """Ambil nilai dari cache, None jika tidak ada atau sudah kedaluwarsa"""
+        now = time.time()
+        try:
+            with self._connect() as conn:
+                row = conn.execute(
+                    "SELECT value, created FROM entries WHERE key = ?", (key,)
+                ).fetchone()
+
+                if row is not None and self.ttl_seconds is not None and now - row[1] > self.ttl_seconds:
+                    conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+                    row = None
+
+                if row is not None:
+                    conn.execute("UPDATE entries SET accessed = ? WHERE key = ?", (now, key))
+        except sqlite3.Error:
+            row = None
+
+        with self._lock:
+            if row is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+
+        if row is None:
+            return None
+        return zlib.decompress(row[0]).decode('utf-8')
+
+    def set(self, key: str, value: str):
+        """Simpan nilai ke cache lalu lakukan eviction jika melebihi batas ukuran"""
+        blob = zlib.compress(value.encode('utf-8'))
+        if len(blob) > self.max_bytes:
+            return
+
+        now = time.time()
+        try:
+            with self._connect() as conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO entries (key, value, size, created, accessed) VALUES (?, ?, ?, ?, ?)",
+                    (key, blob, len(blob), now, now)
+                )
+                self._evict(conn)
+        except sqlite3.Error:
+            # Cache bersifat opsional: kegagalan tulis tidak boleh menggagalkan proses utama
+            pass
+
+    def _evict(self, conn: sqlite3.Connection):
+        """Hapus entri yang paling lama tidak diakses hingga total ukuran di bawah batas"""
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+
+        excess = total - self.max_bytes
+        freed = 0
+        stale_keys = []
+        for key, size in conn.execute("SELECT key, size FROM entries ORDER BY accessed ASC"):
+            stale_keys.append((key,))
+            freed += size
+            if freed >= excess:
+                break
+
+        conn.executemany("DELETE FROM entries WHERE key = ?", stale_keys)
+
+    def clear(self):
+        """Kosongkan seluruh isi cache"""
+        with self._connect() as conn:
+            conn.execute("DELETE FROM entries")
+
+    def stats(self) -> Dict[str, Any]:
+        """Statistik cache untuk ditampilkan di UI"""
+        try:
+            with self._connect() as conn:
+                entries, total = conn.execute(
+                    "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries"
+                ).fetchone()
+        except sqlite3.Error:
+            entries, total = 0, 0
+
+        lookups = self.hits + self.misses
+        return {
+            'entries': entries,
+            'size_mb': round(total / 1024 / 1024, 2),
+            'max_size_mb': round(self.max_bytes / 1024 / 1024, 2),
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': round(self.hits / lookups, 3) if lookups else 0.0
+        }
+
+
+def get_cache(path: str, max_bytes: int, ttl_seconds: Optional[float] = None) -> DiskCache:
+    """Ambil instance DiskCache bersama per path agar statistik hit/miss terakumulasi dalam satu proses"""
+    path = os.path.abspath(path)
+    with _caches_lock:
+        cache = _caches.get(path)
+        if cache is None:
+            cache = DiskCache(path, max_bytes, ttl_seconds)
+            _caches[path] = cache
+        return cache
@@ -0,0 +1,357 @@
+"""CLI batch analisis tumpang tindih tugas instansi tanpa Streamlit.
+
+Input berupa direktori dengan satu folder per instansi (nama folder = nama instansi,
+semua PDF di dalamnya termasuk subfolder ikut dianalisis):
+
+    arsip/
+        Kementerian Dalam Negeri/sotk.pdf
+        Kementerian Dalam Negeri/renstra.pdf
+        Badan Pusat Statistik/renja.pdf
+
+atau manifest JSON (path file relatif terhadap lokasi manifest):
+
+    {"instansi": [{"nama": "Kementerian Dalam Negeri", "files": ["kemendagri/sotk.pdf"]}, ...]}
+
+Hasil ekstraksi per instansi disimpan ke <output-dir>/progress/ begitu selesai, sehingga
+run yang terhenti dapat dilanjutkan tanpa mengulang instansi yang dokumennya tidak berubah.
+
+Contoh:
+    python cli.py --input-dir arsip --output-dir hasil
+    python cli.py --manifest manifest.json --output-dir hasil --format xlsx,json --file-workers 8
+"""
+import argparse
+import json
+import logging
+import os
+import re
+import sys
+from dataclasses import asdict
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from dotenv import load_dotenv
+
+from cache_utils import make_cache_key
+from config import AVAILABLE_MODELS, Config, DEFAULT_MODEL, EXTRACTION_MODES, MODEL_ROUTINGS
+from dedup_utils import find_duplicate_uploads
+from utils import notify_log
+
+logger = logging.getLogger('sihati')
+
+OUTPUT_FORMATS = ('xlsx', 'pdf', 'json')
+REPORT_BASENAME = 'laporan_tumpang_tindih'
+
+
+def load_manifest(manifest_path: str) -> List[dict]:
+    """Baca manifest JSON menjadi daftar {'nama', 'files'} dengan path absolut.
+
+    Instansi tanpa file dilewati seperti folder kosong di scan_input_dir; ValueError jika ada
+    file yang tidak ditemukan.
+    """
+    with open(manifest_path, encoding='utf-8') as f:
+        manifest = json.load(f)
+
+    base_dir = os.path.dirname(os.path.abspath(manifest_path))
+    agencies = []
+    missing = []
+    for entry in manifest['instansi']:
+        files = [os.path.normpath(os.path.join(base_dir, path)) for path in entry['files']]
+        if not files:
+            logger.warning("⚠️ Instansi %s di manifest tidak memiliki file, dilewati", entry['nama'])
+            continue
+        missing.extend(path for path in files if not os.path.isfile(path))
+        agencies.append({'nama': entry['nama'], 'files': files})
+    if missing:
+        raise ValueError(f"file manifest tidak ditemukan: {', '.join(missing)}")
+    return agencies
+
+
+def scan_input_dir(input_dir: str) -> List[dict]:
+    """Satu folder per instansi; PDF dicari rekursif dan diurutkan berdasarkan path"""
+    agencies = []
+    for name in sorted(os.listdir(input_dir)):
+        agency_dir = os.path.join(input_dir, name)
+        if not os.path.isdir(agency_dir):
+            continue
+
+        files = []
+        for root, _, file_names in os.walk(agency_dir):
+            files.extend(os.path.join(root, file_name) for file_name in file_names
+                         if file_name.lower().endswith('.pdf'))
+        if files:
+            agencies.append({'nama': name, 'files': sorted(files)})
+    return agencies
+
+
+def extraction_settings(analyzer) -> List[Any]:
+    """Pengaturan analyzer yang menentukan hasil ekstraksi (model, mode ekstraksi, routing)"""
+    return [analyzer.model_name, analyzer.fast_model, analyzer.extraction_mode, analyzer.routing]
+
+
+def agency_signature(agency: dict, settings: List[Any]) -> str:
+    """Penanda input satu instansi: berubah jika file ditambah, dihapus, atau dimodifikasi,
+    atau jika pengaturan ekstraksi (extraction_settings) berubah"""
+    parts = list(settings)
+    for path in agency['files']:
+        stat = os.stat(path)
+        parts.extend([os.path.abspath(path), stat.st_size, stat.st_mtime_ns])
+    return make_cache_key(agency['nama'], *parts)
+
+
+def slugify(name: str) -> str:
+    """Nama file aman untuk nama instansi; hash nama lengkap mencegah dua instansi berbagi file
+    jika hanya berbeda tanda baca atau setelah karakter ke-80"""
+    slug = re.sub(r'[^\w-]+', '_', name, flags=re.UNICODE).strip('_')[:80] or 'instansi'
+    return f"{slug}_{make_cache_key(name)[:10]}"
+
+
+class ProgressStore:
+    """Hasil ekstraksi per instansi di <output-dir>/progress, dipakai ulang saat run dilanjutkan"""
+
+    def __init__(self, output_dir: str):
+        self.progress_dir = os.path.join(output_dir, 'progress')
+        os.makedirs(self.progress_dir, exist_ok=True)
+
+    def _path(self, agency: dict) -> str:
+        return os.path.join(self.progress_dir, f"{slugify(agency['nama'])}.json")
+
+    def load(self, agency: dict) -> Optional[Any]:
+        from gemini_analyzer import InstansiData
+
+        path = self._path(agency)
+        if not os.path.exists(path):
+            return None
+        try:
+            with open(path, encoding='utf-8') as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if entry.get('signature') != agency['signature']:
+            return None
+        instansi_data = InstansiData(**entry['instansi_data'])
+        # Progress kosong (ditulis versi lama saat ekstraksi gagal) diekstrak ulang
+        return None if instansi_data.is_empty() else instansi_data
+
+    def save(self, agency: dict, instansi_data):
+        # Tulis ke file sementara lalu rename agar progress tidak rusak jika proses dihentikan
+        path = self._path(agency)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({
+                'signature': agency['signature'],
+                'saved': datetime.now().isoformat(timespec='seconds'),
+                'instansi_data': asdict(instansi_data)
+            }, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, path)
+
+
+def extract_agencies(agencies: List[dict], store: ProgressStore, doc_processor, analyzer,
+                     file_workers: int, llm_workers: int, resume: bool = True) -> Tuple[List[Any], List[str]]:
+    """Ekstraksi data terstruktur semua instansi; instansi yang sudah ada di progress dilewati.
+
+    Mengembalikan (InstansiData yang berhasil, nama instansi yang gagal). Hanya hasil yang berhasil
+    dan tidak kosong yang disimpan ke progress, sehingga instansi gagal dicoba lagi saat run dilanjutkan.
+    """
+    from pipeline import ExtractionScheduler
+
+    results: Dict[int, Any] = {}
+    pending: Dict[int, dict] = {}
+    for index, agency in enumerate(agencies):
+        cached = store.load(agency) if resume else None
+        if cached is not None:
+            results[index] = cached
+        else:
+            pending[index] = {
+                'nama': agency['nama'],
+                'files': agency['files'],
+                'file_names': [os.path.basename(path) for path in agency['files']]
+            }
+
+    logger.info("%d instansi dari progress sebelumnya, %d instansi akan diekstrak", len(results), len(pending))
+
+    if pending:
+        duplicate_groups = find_duplicate_uploads(pending)
+        for group in duplicate_groups:
+            logger.info("Dokumen %s dipakai bersama oleh %d slot lain", group.canonical, len(group.members))
+
+        def save_result(index, instansi_data):
+            if instansi_data.is_empty():
+                logger.warning("⚠️ Tidak ada informasi yang terekstrak untuk %s; tidak disimpan ke progress",
+                               instansi_data.nama)
+                return
+            results[index] = instansi_data
+            store.save(agencies[index], instansi_data)
+            logger.info("✅ [%d/%d] %s", len(results), len(agencies), instansi_data.nama)
+
+        def log_messages(state):
+            # Pesan processor/analyzer selama scheduler berjalan (OCR, retry, failover model)
+            for level, message in state.messages:
+                notify_log(level, message)
+            state.messages.clear()
+
+        scheduler = ExtractionScheduler(doc_processor, analyzer, file_workers, llm_workers)
+        scheduler.run(pending, on_update=log_messages, duplicate_groups=duplicate_groups, on_result=save_result)
+
+    failed = [agencies[index]['nama'] for index in pending if index not in results]
+    if failed:
+        logger.warning("❌ %d instansi gagal diekstrak: %s", len(failed), ', '.join(failed))
+
+    return [results[index] for index in sorted(results)], failed
+
+
+def analyze_overlaps(instansi_list: List[Any], analyzer, output_dir: str, resume: bool) -> Dict[str, Any]:
+    """Analisis tumpang tindih; hasil sebelumnya dipakai ulang jika data instansi tidak berubah"""
+    signature = make_cache_key(analyzer.model_name, analyzer.prefilter,
+                               json.dumps([asdict(item) for item in instansi_list], sort_keys=True))
+    path = os.path.join(output_dir, 'progress', '_overlap.json')
+
+    if resume and os.path.exists(path):
+        with open(path, encoding='utf-8') as f:
+            entry = json.load(f)
+        if entry.get('signature') == signature:
+            logger.info("Analisis tumpang tindih dipakai ulang dari progress sebelumnya")
+            return entry['overlap_analysis']
+
+    logger.info("🔍 Menganalisis tumpang tindih %d instansi dengan %s...", len(instansi_list), analyzer.model_name)
+    overlap_analysis = analyzer.analyze_overlaps(instansi_list)
+    if 'error' not in overlap_analysis:
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump({'signature': signature, 'overlap_analysis': overlap_analysis}, f, ensure_ascii=False, indent=2)
+    return overlap_analysis
+
+
+def write_reports(instansi_list: List[Any], overlap_analysis: Dict[str, Any], output_dir: str,
+                  formats: List[str], model_name: str) -> List[str]:
+    """Tulis laporan Excel/PDF/JSON ke output_dir; kembalikan path yang berhasil ditulis"""
+    from export_utils import ExcelExporter, PDFExporter
+
+    written = []
+    base_path = os.path.join(output_dir, REPORT_BASENAME)
+
+    if 'json' in formats:
+        with open(f"{base_path}.json", 'w', encoding='utf-8') as f:
+            json.dump({
+                'model': model_name,
+                'dibuat': datetime.now().isoformat(timespec='seconds'),
+                'instansi': [asdict(item) for item in instansi_list],
+                'overlap_analysis': overlap_analysis
+            }, f, ensure_ascii=False, indent=2)
+        written.append(f"{base_path}.json")
+
+    exporters = {'xlsx': (ExcelExporter, 'create_excel_report'), 'pdf': (PDFExporter, 'create_pdf_report')}
+    for extension, (exporter_class, method_name) in exporters.items():
+        if extension not in formats:
+            continue
+        try:
+            buffer = getattr(exporter_class(), method_name)(instansi_list, overlap_analysis)
+        except Exception as e:
+            logger.error("❌ Gagal membuat laporan %s: %s", extension, e)
+            continue
+        with open(f"{base_path}.{extension}", 'wb') as f:
+            f.write(buffer.getvalue())
+        written.append(f"{base_path}.{extension}")
+
+    return written
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0],
+                                     formatter_class=argparse.RawDescriptionHelpFormatter, epilog=__doc__)
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument('--input-dir', help='Direktori dengan satu folder per instansi')
+    source.add_argument('--manifest', help='Manifest JSON daftar instansi dan file')
+    parser.add_argument('--output-dir', required=True, help='Direktori laporan dan progress')
+    parser.add_argument('--model', default=DEFAULT_MODEL, choices=list(AVAILABLE_MODELS))
+    parser.add_argument('--format', default=','.join(OUTPUT_FORMATS),
+                        help=f"Format laporan, dipisah koma ({', '.join(OUTPUT_FORMATS)})")
+    parser.add_argument('--file-workers', type=int,
+                        default=int(os.getenv('EXTRACTION_WORKERS', Config.EXTRACTION_WORKERS)))
+    parser.add_argument('--llm-workers', type=int, default=int(os.getenv('LLM_WORKERS', Config.LLM_WORKERS)))
+    parser.add_argument('--ocr-workers', type=int, help='Jumlah proses OCR (default OCR_WORKERS)')
+    parser.add_argument('--extraction-mode', choices=EXTRACTION_MODES,
+                        default=os.getenv('EXTRACTION_MODE', Config.EXTRACTION_MODE),
+                        help='single: satu prompt per instansi, map_reduce: per bagian dokumen, auto: map-reduce '
+                             'untuk teks panjang')
+    parser.add_argument('--routing', choices=MODEL_ROUTINGS,
+                        default=os.getenv('MODEL_ROUTING', Config.MODEL_ROUTING),
+                        help='cascade: ekstraksi dengan model cepat dan eskalasi ke --model jika hasilnya gagal '
+                             'validasi, single: semua tahap dengan --model')
+    parser.add_argument('--no-prefilter', action='store_true',
+                        default=os.getenv('OVERLAP_PREFILTER', str(Config.OVERLAP_PREFILTER)).lower() != 'true',
+                        help='Kirim semua item instansi ke analisis tumpang tindih tanpa penyaringan kandidat')
+    parser.add_argument('--no-resume', action='store_true', help='Abaikan progress run sebelumnya')
+    parser.add_argument('--no-llm-cache', action='store_true',
+                        help='Paksa panggilan Gemini baru (respons baru tetap disimpan ke cache)')
+    parser.add_argument('--verbose', action='store_true')
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.DEBUG if args.verbose else logging.INFO,
+                        format='%(asctime)s %(levelname)s %(message)s')
+    load_dotenv()
+
+    formats = [item.strip().lower() for item in args.format.split(',') if item.strip()]
+    unknown = sorted(set(formats) - set(OUTPUT_FORMATS))
+    if unknown:
+        parser.error(f"format tidak dikenal: {', '.join(unknown)}")
+
+    api_key = os.getenv('GEMINI_API_KEY')
+    if not api_key:
+        parser.error("GEMINI_API_KEY belum dikonfigurasi (environment atau file .env)")
+
+    if args.ocr_workers is not None:
+        os.environ['OCR_WORKERS'] = str(args.ocr_workers)
+
+    if args.manifest:
+        try:
+            agencies = load_manifest(args.manifest)
+        except (OSError, KeyError, ValueError) as e:
+            parser.error(f"manifest tidak valid: {e}")
+    else:
+        agencies = scan_input_dir(args.input_dir)
+    if len(agencies) < 2:
+        logger.error("❌ Minimal 2 instansi diperlukan untuk analisis (ditemukan %d)", len(agencies))
+        return 1
+    os.makedirs(args.output_dir, exist_ok=True)
+    store = ProgressStore(args.output_dir)
+
+    # Diimpor setelah konfigurasi environment (OCR_WORKERS) diterapkan
+    from document_processor import DocumentProcessor
+    from gemini_analyzer import GeminiAnalyzer
+    from metrics import llm_metrics
+
+    doc_processor = DocumentProcessor()
+    analyzer = GeminiAnalyzer(api_key, args.model, use_cache=not args.no_llm_cache,
+                              extraction_mode=args.extraction_mode, routing=args.routing,
+                              prefilter=not args.no_prefilter)
+    settings = extraction_settings(analyzer)
+    for agency in agencies:
+        agency['signature'] = agency_signature(agency, settings)
+
+    instansi_list, failed = extract_agencies(agencies, store, doc_processor, analyzer,
+                                     args.file_workers, args.llm_workers, resume=not args.no_resume)
+    if len(instansi_list) < 2:
+        logger.error("❌ Minimal 2 instansi berhasil diekstrak diperlukan untuk analisis")
+        return 1
+
+    overlap_analysis = analyze_overlaps(instansi_list, analyzer, args.output_dir, resume=not args.no_resume)
+    if 'penyaringan_kandidat' in overlap_analysis:
+        logger.info("Penyaringan kandidat: %s", json.dumps(overlap_analysis['penyaringan_kandidat']))
+    for path in write_reports(instansi_list, overlap_analysis, args.output_dir, formats, analyzer.model_name):
+        logger.info("📄 %s", path)
+    logger.info("Panggilan API Gemini: %d", analyzer.api_calls)
+    metrics_snapshot = llm_metrics.snapshot()
+    logger.info("Metrik panggilan model: %s", json.dumps(metrics_snapshot))
+    for row in metrics_snapshot['stages']:
+        logger.info("Tahap %-16s %-24s %3d permintaan (%d cache), %.1fs, %d/%d token, $%.4f",
+                    row['stage'], row['model'], row['requests'], row['cache_hits'], row['seconds'],
+                    row['prompt_tokens'], row['output_tokens'], row['cost_usd'])
+    if metrics_snapshot['escalations']:
+        logger.info("Eskalasi ekstraksi ke %s: %s", analyzer.model_name, metrics_snapshot['escalations'])
+
+    if failed:
+        logger.error("❌ Laporan tidak lengkap: %d instansi gagal diekstrak (%s)", len(failed), ', '.join(failed))
+    return 0 if 'error' not in overlap_analysis and not failed else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
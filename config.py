@@ -15,12 +15,51 @@ class Config:
     
     # Processing Settings
     MAX_TEXT_LENGTH = 10000  # Batasi untuk efisiensi API
+    CONTEXT_TOKEN_BUDGET = 1500  # Anggaran token teks dokumen per prompt jika model tidak punya 'context_tokens'
+    CONTEXT_CHUNK_TOKENS = 300  # Ukuran maksimal chunk yang diberi skor relevansi
+    EXTRACTION_MODE = 'auto'  # 'single' (satu prompt), 'map_reduce' (per bagian), 'auto' = map-reduce untuk teks panjang
+    MAP_REDUCE_MIN_TOKENS = 20000  # Mode auto: teks instansi di atas ini diekstrak per bagian
+    MAP_CHUNK_TOKENS = 6000  # Ukuran maksimal satu bagian pada tahap map
+    MODEL_ROUTING = 'cascade'  # 'cascade' (ekstraksi dengan fast_model, eskalasi jika gagal validasi) atau 'single'
     BATCH_SIZE = 5  # Jumlah dokumen per batch
+    EXTRACTION_WORKERS = 4  # Jumlah file yang diekstrak bersamaan (lintas instansi)
+    LLM_WORKERS = 3  # Jumlah panggilan ekstraksi Gemini per instansi yang berjalan bersamaan
+    JOB_WORKERS = 2  # Jumlah job analisis yang berjalan bersamaan di satu server
+    JOB_POLL_SECONDS = 1.0  # Interval halaman memeriksa progress job
+    STREAM_OVERLAP_ANALYSIS = True  # Stream respons analisis tumpang tindih dan tampilkan hasil sementara
+    PAGE_BUDGET = 40  # Maksimal halaman relevan yang diekstrak/OCR per dokumen, 0 = semua halaman
+    SIMILARITY_THRESHOLD = 0.5  # Cosine similarity n-gram karakter minimal agar dua item dianggap kandidat tumpang tindih
+    OVERLAP_PREFILTER = True  # Analisis tumpang tindih hanya menerima kelompok item kandidat hasil penyaringan lokal
+    OVERLAP_CANDIDATE_TOKEN_BUDGET = 6000  # Anggaran token kelompok kandidat di prompt analisis tumpang tindih
     
     # Model Settings
     GEMINI_MODEL = 'gemini-2.5-pro'
     TEMPERATURE = 0.1  # Lebih deterministik
     MAX_OUTPUT_TOKENS = 4096
+    LLM_TIMEOUT_SECONDS = 300  # Batas waktu satu panggilan model
+    LLM_MAX_ATTEMPTS = 4  # Percobaan maksimal per model untuk error sementara (429/5xx/timeout)
+    LLM_BACKOFF_BASE_SECONDS = 1.0  # Jeda dasar exponential backoff (dengan jitter)
+    LLM_BACKOFF_MAX_SECONDS = 30.0
+    LLM_BREAKER_FAILURES = 5  # Kegagalan beruntun sebelum circuit breaker model terbuka
+    LLM_BREAKER_RESET_SECONDS = 60  # Lama circuit terbuka sebelum satu panggilan percobaan
+    
+    # Cache Settings
+    CACHE_DIR = os.path.join(os.path.expanduser('~'), '.cache', 'sihati')
+    TEXT_CACHE_MAX_MB = 1024  # Batas ukuran cache teks hasil ekstraksi
+    OCR_CACHE_MAX_MB = 512  # Batas ukuran cache OCR per halaman (key: hash raster), 0 = nonaktif
+    LLM_CACHE_MAX_MB = 256  # Batas ukuran cache respons Gemini, 0 = nonaktif
+    LLM_CACHE_TTL_HOURS = 24 * 7  # Respons yang lebih lama dari ini diminta ulang ke API
+    OCR_LANG = 'ind+eng'
+    OCR_DPI = 144  # Setara zoom 2x dari 72 DPI, dipakai jika OCR adaptif dinonaktifkan
+    OCR_ADAPTIVE = True  # OCR di DPI rendah dulu, render ulang di DPI tinggi hanya jika confidence rendah
+    OCR_LOW_DPI = 100  # DPI percobaan pertama mode adaptif (cukup untuk scan bersih)
+    OCR_HIGH_DPI = 300  # DPI render ulang untuk halaman pudar/fotokopi
+    OCR_MIN_CONFIDENCE = 70  # Rata-rata confidence kata (0-100) di bawah ini memicu render ulang
+    OCR_BINARIZE = True  # Binarisasi Otsu sebelum OCR ulang
+    OCR_DESKEW = True  # Luruskan halaman miring sebelum OCR ulang
+    OCR_COLORSPACE = 'gray'  # 'gray' atau 'rgb'; grayscale 3x lebih kecil dan cukup untuk tesseract
+    OCR_BACKEND = 'auto'  # 'auto' (tesserocr jika tersedia), 'tesserocr', atau 'pytesseract'
+    OCR_WORKERS = 0  # Jumlah proses OCR paralel, 0 = semua core yang tersedia
 
 # Prompt templates
 EXTRACTION_PROMPT_TEMPLATE = """
@@ -131,6 +170,83 @@ FOKUS ANALISIS:
 - Redistribusi tugas yang lebih efisien
 """
 
+# Schema output JSON terstruktur (response_schema Gemini), sesuai InstansiData dan hasil analyze_overlaps
+_STRING_LIST = {"type": "array", "items": {"type": "string"}}
+
+EXTRACTION_RESPONSE_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "tugas_pokok": _STRING_LIST,
+        "fungsi": _STRING_LIST,
+        "program": _STRING_LIST,
+        "kegiatan": _STRING_LIST,
+        "anggaran": {"type": "string"},
+        "target_sasaran": _STRING_LIST
+    },
+    "required": ["tugas_pokok", "fungsi", "program", "kegiatan", "anggaran", "target_sasaran"]
+}
+
+# Tahap map ekstraksi map-reduce: anggaran berupa daftar kutipan per bagian dokumen
+MAP_RESPONSE_SCHEMA = {
+    "type": "object",
+    "properties": dict(EXTRACTION_RESPONSE_SCHEMA["properties"], anggaran=_STRING_LIST),
+    "required": EXTRACTION_RESPONSE_SCHEMA["required"]
+}
+
+OVERLAP_RESPONSE_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "ringkasan_eksekutif": {"type": "string"},
+        "tumpang_tindih": {
+            "type": "array",
+            "items": {
+                "type": "object",
+                "properties": {
+                    "kategori": {"type": "string"},
+                    "deskripsi": {"type": "string"},
+                    "instansi_terlibat": _STRING_LIST,
+                    "tingkat_overlap": {"type": "string", "enum": ["tinggi", "sedang", "rendah"]},
+                    "dampak_potensial": {"type": "string"},
+                    "estimasi_pemborosan_anggaran": {"type": "string"},
+                    "dokumen_sumber": _STRING_LIST,
+                    "rekomendasi_koordinasi": {"type": "string"}
+                },
+                "required": ["kategori", "deskripsi", "instansi_terlibat", "tingkat_overlap", "dampak_potensial"]
+            }
+        },
+        "rekomendasi": {
+            "type": "array",
+            "items": {
+                "type": "object",
+                "properties": {
+                    "prioritas": {"type": "string", "enum": ["tinggi", "sedang", "rendah"]},
+                    "aksi": {"type": "string"},
+                    "instansi_pelaksana": {"type": "string"},
+                    "instansi_pendukung": _STRING_LIST,
+                    "timeline": {"type": "string"},
+                    "benefit_estimasi": {"type": "string"},
+                    "dasar_hukum": {"type": "string"},
+                    "mekanisme_koordinasi": {"type": "string"}
+                },
+                "required": ["prioritas", "aksi", "instansi_pelaksana", "timeline", "benefit_estimasi"]
+            }
+        },
+        "metrik_overlap": {
+            "type": "object",
+            "properties": {
+                "total_overlap_ditemukan": {"type": "integer"},
+                "overlap_tinggi": {"type": "integer"},
+                "overlap_sedang": {"type": "integer"},
+                "overlap_rendah": {"type": "integer"},
+                "efisiensi_potensial": {"type": "string"}
+            },
+            "required": ["total_overlap_ditemukan", "overlap_tinggi", "overlap_sedang", "overlap_rendah",
+                         "efisiensi_potensial"]
+        }
+    },
+    "required": ["ringkasan_eksekutif", "tumpang_tindih", "rekomendasi", "metrik_overlap"]
+}
+
 # Update V4
 # Daftar model yang tersedia
 AVAILABLE_MODELS = {
@@ -139,21 +255,43 @@ AVAILABLE_MODELS = {
         "description": "Model terbaru dengan akurasi tinggi, cocok untuk analisis kompleks",
         "cost": "Tinggi",
         "speed": "Sedang",
-        "recommended": True
+        "recommended": True,
+        "rpm": 60,  # Batas request per menit (token bucket)
+        "max_concurrency": 4,  # Panggilan bersamaan maksimal per proses
+        "context_tokens": 1500,  # Anggaran token teks dokumen di prompt ekstraksi (perkiraan 4 karakter/token)
+        "fast_model": "gemini-2.5-flash",  # Model cepat/murah untuk ekstraksi (cascade) dan tahap map map-reduce
+        "input_price": 1.25,  # USD per 1 juta token input (perkiraan harga publik, untuk estimasi biaya)
+        "output_price": 10.0,  # USD per 1 juta token output
+        "fallback": "gemini-2.5-flash"  # Model cadangan saat model ini dibatasi kuota/tidak tersedia
     },
     "gemini-2.5-flash": {
         "name": "Gemini 2.5 Flash", 
         "description": "Model cepat dengan performa baik, cocok untuk analisis standar",
         "cost": "Sedang",
         "speed": "Cepat",
-        "recommended": False
+        "recommended": False,
+        "rpm": 300,
+        "max_concurrency": 8,
+        "context_tokens": 1500,
+        "fast_model": "gemini-2.5-flash",
+        "input_price": 0.30,
+        "output_price": 2.50,
+        "fallback": "gemini-2.5-pro"
     },
     "gemma-3n-e2b-it": {
         "name": "Gemma 3N E2B IT",
         "description": "Model khusus untuk teks Indonesia, optimized untuk dokumen pemerintah",
         "cost": "Rendah", 
         "speed": "Cepat",
-        "recommended": False
+        "recommended": False,
+        "rpm": 30,
+        "max_concurrency": 4,
+        "context_tokens": 1500,
+        "fast_model": "gemma-3n-e2b-it",
+        "input_price": 0.0,
+        "output_price": 0.0,
+        "structured_output": False,  # Model ini tidak mendukung response_schema; JSON diminta lewat prompt
+        "fallback": "gemini-2.5-flash"
     }
 }
 
@@ -271,3 +409,9 @@ KEMENTERIAN_LEMBAGA_INDONESIA = [
 
 # Default model
 DEFAULT_MODEL = "gemini-2.5-pro"
+
+# Mode ekstraksi data instansi (lihat Config.EXTRACTION_MODE)
+EXTRACTION_MODES = ('auto', 'single', 'map_reduce')
+
+# Kebijakan pemilihan model per tahap (lihat Config.MODEL_ROUTING)
+MODEL_ROUTINGS = ('cascade', 'single')
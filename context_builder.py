@@ -0,0 +1,198 @@
+import hashlib
+import os
+import re
+from dataclasses import dataclass
+from typing import Iterator, List, Optional
+
+from config import AVAILABLE_MODELS, Config
+from pdf_utils import DOCUMENT_SEPARATOR, score_page_text
+from utils import INDONESIAN_GOV_TERMS, TextProcessor
+
+# Modul ini tidak mengimpor streamlit. Konteks prompt ekstraksi: teks gabungan dipecah menjadi
+# chunk per halaman, diberi skor terhadap kosakata pemerintahan, lalu chunk terbaik dikemas
+# ke dalam anggaran token model dengan urutan dokumen tetap terjaga.
+
+CHARS_PER_TOKEN = 4  # Perkiraan kasar jumlah karakter per token untuk teks Indonesia
+KEY_TERM_WEIGHT = 3  # Bobot tiap term kunci TextProcessor.extract_key_terms yang ditemukan
+MAX_GOV_TERM_HITS = 10  # Batas kontribusi kosakata INDONESIAN_GOV_TERMS per chunk
+GAP_MARKER = '[...]'  # Penanda bagian teks yang dilewati
+MARKUP_TOKENS = 8  # Cadangan token per chunk untuk penanda halaman/lompatan saat dirender
+
+DOCUMENT_HEADER_PATTERN = re.compile(
+    rf'\n*{re.escape(DOCUMENT_SEPARATOR)}\nDOKUMEN: (?P<name>[^\n]*)\n{re.escape(DOCUMENT_SEPARATOR)}\n'
+)
+PAGE_MARKER_PATTERN = re.compile(r'\n--- Halaman (?P<page>\d+) ---\n')
+WHITESPACE_PATTERN = re.compile(r'\s+')
+
+
+def _gov_terms_pattern() -> re.Pattern:
+    terms = list(INDONESIAN_GOV_TERMS['abbreviations'])
+    terms += list(INDONESIAN_GOV_TERMS['abbreviations'].values())
+    terms += INDONESIAN_GOV_TERMS['common_functions'] + INDONESIAN_GOV_TERMS['document_types']
+    # Term terpanjang dulu agar "Rencana Kerja Pemerintah Daerah" tidak terpotong "Rencana Kerja"
+    terms = sorted({term.lower() for term in terms}, key=len, reverse=True)
+    return re.compile(r'\b(' + '|'.join(re.escape(term) for term in terms) + r')\b', re.IGNORECASE)
+
+
+GOV_TERMS_PATTERN = _gov_terms_pattern()
+
+
+@dataclass
+class TextChunk:
+    index: int  # Urutan chunk di teks gabungan
+    doc_name: Optional[str]
+    page_number: Optional[int]
+    text: str
+    score: int = 0
+    duplicate: bool = False  # Isi sama dengan chunk sebelumnya, tidak pernah dipilih
+
+    @property
+    def tokens(self) -> int:
+        return estimate_tokens(self.text)
+
+
+@dataclass
+class PackedContext:
+    text: str
+    tokens: int
+    total_tokens: int
+    selected_chunks: int
+    total_chunks: int
+
+
+def estimate_tokens(text: str) -> int:
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+def context_token_budget(model_name: str) -> int:
+    """Anggaran token konteks dokumen untuk model ('context_tokens' di AVAILABLE_MODELS)"""
+    model_info = AVAILABLE_MODELS.get(model_name, {})
+    return int(os.getenv('CONTEXT_TOKEN_BUDGET', model_info.get('context_tokens', Config.CONTEXT_TOKEN_BUDGET)))
+
+
+def score_chunk(text: str) -> int:
+    """Skor relevansi chunk: term kunci, kosakata pemerintahan, dan judul BAB/Pasal atau tabel program"""
+    key_terms = TextProcessor.extract_key_terms(text)
+    gov_hits = min(len(GOV_TERMS_PATTERN.findall(text)), MAX_GOV_TERM_HITS)
+    return KEY_TERM_WEIGHT * len(key_terms) + gov_hits + score_page_text(text)
+
+
+def _iter_sections(text: str) -> Iterator[tuple]:
+    """(nama dokumen, nomor halaman, teks) dari teks gabungan build_combined_text"""
+    parts = DOCUMENT_HEADER_PATTERN.split(text)
+    # parts = [teks sebelum header pertama, nama1, isi1, nama2, isi2, ...]
+    documents = [(None, parts[0])] + list(zip(parts[1::2], parts[2::2]))
+    for doc_name, body in documents:
+        pages = PAGE_MARKER_PATTERN.split(body)
+        yield doc_name, None, pages[0]
+        for page_number, page_text in zip(pages[1::2], pages[2::2]):
+            yield doc_name, int(page_number), page_text
+
+
+def _split_lines(text: str, max_chars: int) -> Iterator[str]:
+    """Bagi teks satu halaman per baris menjadi potongan maksimal max_chars"""
+    current = []
+    size = 0
+    for line in text.splitlines():
+        while len(line) > max_chars:
+            # Baris sangat panjang (teks OCR tanpa newline) dipotong paksa
+            if current:
+                yield '\n'.join(current)
+                current, size = [], 0
+            yield line[:max_chars]
+            line = line[max_chars:]
+        if current and size + len(line) + 1 > max_chars:
+            yield '\n'.join(current)
+            current, size = [], 0
+        current.append(line)
+        size += len(line) + 1
+    if current:
+        yield '\n'.join(current)
+
+
+def split_chunks(text: str, max_chunk_tokens: int) -> List[TextChunk]:
+    """Pecah teks gabungan menjadi chunk yang tidak melewati batas halaman, maksimal max_chunk_tokens"""
+    max_chars = max(1, max_chunk_tokens * CHARS_PER_TOKEN)
+    chunks = []
+    seen = set()
+    for doc_name, page_number, section in _iter_sections(text):
+        for piece in _split_lines(section, max_chars):
+            normalized = WHITESPACE_PATTERN.sub(' ', piece).strip().lower()
+            if not normalized:
+                continue
+            digest = hashlib.sha1(normalized.encode('utf-8')).digest()
+            chunk = TextChunk(len(chunks), doc_name, page_number, piece.strip('\n'))
+            if digest in seen:
+                chunk.duplicate = True
+            else:
+                seen.add(digest)
+                chunk.score = score_chunk(piece)
+            chunks.append(chunk)
+    return chunks
+
+
+def render_chunks(chunks: List[TextChunk]) -> str:
+    """Susun chunk terpilih sesuai urutan aslinya dengan header DOKUMEN, penanda halaman, dan penanda lompatan"""
+    parts = []
+    current_doc = current_page = previous_index = None
+    for chunk in sorted(chunks, key=lambda c: c.index):
+        if chunk.doc_name is not None and chunk.doc_name != current_doc:
+            parts.append(f"\n\n{DOCUMENT_SEPARATOR}\nDOKUMEN: {chunk.doc_name}\n{DOCUMENT_SEPARATOR}\n")
+            current_page = None
+        elif previous_index is not None and chunk.index != previous_index + 1:
+            parts.append(f"\n{GAP_MARKER}\n")
+        if chunk.page_number is not None and chunk.page_number != current_page:
+            parts.append(f"\n--- Halaman {chunk.page_number} ---\n")
+        parts.append(f"{chunk.text}\n")
+        current_doc, current_page, previous_index = chunk.doc_name, chunk.page_number, chunk.index
+    return "".join(parts)
+
+
+def build_context(text: str, token_budget: int, max_chunk_tokens: Optional[int] = None) -> PackedContext:
+    """Kemas chunk dengan skor tertinggi ke dalam token_budget; teks yang sudah muat dikembalikan utuh"""
+    total_tokens = estimate_tokens(text)
+    if total_tokens <= token_budget:
+        return PackedContext(text, total_tokens, total_tokens, 1, 1)
+
+    max_chunk_tokens = max_chunk_tokens or int(os.getenv('CONTEXT_CHUNK_TOKENS', Config.CONTEXT_CHUNK_TOKENS))
+    chunks = split_chunks(text, min(max_chunk_tokens, token_budget))
+
+    # Skor tertinggi dulu; skor sama -> chunk yang lebih awal (halaman depan, dokumen pertama)
+    selected = []
+    selected_docs = set()
+    used = 0
+    header_tokens = estimate_tokens(f"\n\n{DOCUMENT_SEPARATOR}\nDOKUMEN: \n{DOCUMENT_SEPARATOR}\n")
+    for chunk in sorted((c for c in chunks if not c.duplicate), key=lambda c: (-c.score, c.index)):
+        cost = chunk.tokens + MARKUP_TOKENS
+        if chunk.doc_name is not None and chunk.doc_name not in selected_docs:
+            cost += header_tokens + estimate_tokens(chunk.doc_name)
+        if used + cost <= token_budget:
+            selected.append(chunk)
+            selected_docs.add(chunk.doc_name)
+            used += cost
+
+    packed = render_chunks(selected)
+    return PackedContext(packed, estimate_tokens(packed), total_tokens, len(selected), len(chunks))
+
+
+def split_windows(text: str, window_tokens: int) -> List[str]:
+    """Bagi seluruh teks (tanpa chunk duplikat) menjadi bagian berurutan maksimal window_tokens.
+
+    Dipakai ekstraksi map-reduce: tidak ada chunk yang dibuang, tiap bagian diawali header DOKUMEN.
+    """
+    chunk_tokens = min(int(os.getenv('CONTEXT_CHUNK_TOKENS', Config.CONTEXT_CHUNK_TOKENS)), window_tokens)
+    windows = []
+    current = []
+    used = 0
+    for chunk in split_chunks(text, chunk_tokens):
+        if chunk.duplicate:
+            continue
+        cost = chunk.tokens + MARKUP_TOKENS
+        if current and used + cost > window_tokens:
+            windows.append(render_chunks(current))
+            current, used = [], 0
+        current.append(chunk)
+        used += cost
+    if current:
+        windows.append(render_chunks(current))
+    return windows
@@ -0,0 +1,167 @@
+import os
+import re
+import zlib
+from dataclasses import dataclass, field
+from typing import Any, Dict, FrozenSet, List, Optional, Tuple
+
+from cache_utils import hash_file
+
+# Modul ini tidak mengimpor streamlit agar bisa dipakai oleh scheduler dan CLI.
+
+SHINGLE_SIZE = 5  # Jumlah kata per shingle
+NEAR_DUPLICATE_THRESHOLD = 0.9  # Jaccard minimal shingle agar dua dokumen dianggap hampir identik
+MAX_PAGE_COUNT_RATIO = 1.2  # Dokumen hampir identik harus memiliki jumlah halaman yang mirip
+
+DUPLICATE_EXACT = 'identik'
+DUPLICATE_NEAR = 'mirip'
+
+TOKEN_PATTERN = re.compile(r'\w+')
+
+FileRef = Tuple[Any, int]  # (key instansi, indeks file)
+
+
+@dataclass
+class DocumentFingerprint:
+    file_hash: str
+    page_count: int
+    shingles: FrozenSet[int]
+
+
+@dataclass
+class DuplicateGroup:
+    """Sekumpulan file upload dengan isi sama; hanya file canonical yang diekstrak"""
+    canonical: FileRef
+    members: List[FileRef] = field(default_factory=list)  # Selain canonical
+    kind: str = DUPLICATE_EXACT
+    similarity: float = 1.0
+
+
+def fingerprint_document(pdf_file, file_hash: Optional[str] = None) -> DocumentFingerprint:
+    """Sidik jari dokumen: hash isi file dan shingle kata dari text layer seluruh halaman.
+
+    Seluruh halaman dipakai karena file hampir identik menggantikan hasil ekstraksi file lain;
+    dokumen yang hanya sama di halaman awal (template pembuka) tidak boleh dianggap sama.
+    """
+    from pdf_utils import open_pdf_document
+
+    file_hash = file_hash or hash_file(pdf_file)
+    try:
+        document = open_pdf_document(pdf_file)
+    except Exception:
+        # PDF tidak terbaca (atau PyMuPDF tidak tersedia): hanya deteksi identik byte
+        return DocumentFingerprint(file_hash, 0, frozenset())
+
+    with document:
+        page_count = len(document)
+        words = []
+        for page_num in range(page_count):
+            words.extend(TOKEN_PATTERN.findall(document.load_page(page_num).get_text().lower()))
+
+    shingles = frozenset(
+        zlib.crc32(' '.join(words[i:i + SHINGLE_SIZE]).encode('utf-8'))
+        for i in range(len(words) - SHINGLE_SIZE + 1)
+    )
+    return DocumentFingerprint(file_hash, page_count, shingles)
+
+
+def jaccard_similarity(a: FrozenSet[int], b: FrozenSet[int]) -> float:
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+
+def _near_duplicate_similarity(a: DocumentFingerprint, b: DocumentFingerprint) -> float:
+    """Jaccard shingle jika jumlah halaman sebanding, selain itu 0"""
+    if not a.page_count or not b.page_count:
+        return 0.0
+    if max(a.page_count, b.page_count) / min(a.page_count, b.page_count) > MAX_PAGE_COUNT_RATIO:
+        return 0.0
+    return jaccard_similarity(a.shingles, b.shingles)
+
+
+def upload_cache_key(pdf_file) -> Optional[tuple]:
+    """Key stabil file upload antar rerun Streamlit (file_id, atau nama + ukuran); None untuk path"""
+    if isinstance(pdf_file, (str, os.PathLike)):
+        return None
+    file_id = getattr(pdf_file, 'file_id', None)
+    if file_id:
+        return ('file_id', file_id)
+    name, size = getattr(pdf_file, 'name', None), getattr(pdf_file, 'size', None)
+    return ('name', name, size) if name and size is not None else None
+
+
+def find_duplicate_uploads(uploaded_files_data: Dict[Any, dict],
+                           fingerprint_cache: Optional[Dict[str, DocumentFingerprint]] = None,
+                           hash_cache: Optional[Dict[tuple, str]] = None) -> List[DuplicateGroup]:
+    """Cari file identik (byte) dan hampir identik (isi) di seluruh slot instansi.
+
+    File pertama sesuai urutan upload menjadi canonical. fingerprint_cache (key: hash
+    file) dan hash_cache (key: upload_cache_key) dipakai ulang antar rerun agar PDF yang
+    sama tidak dibaca dan dibuka berulang kali.
+    """
+    if fingerprint_cache is None:
+        fingerprint_cache = {}
+    if hash_cache is None:
+        hash_cache = {}
+
+    refs: List[FileRef] = []
+    hashes: Dict[FileRef, str] = {}
+    for key, data in uploaded_files_data.items():
+        for index, pdf_file in enumerate(data['files']):
+            ref = (key, index)
+            refs.append(ref)
+            cache_key = upload_cache_key(pdf_file)
+            if cache_key is None:
+                hashes[ref] = hash_file(pdf_file)
+            else:
+                if cache_key not in hash_cache:
+                    hash_cache[cache_key] = hash_file(pdf_file)
+                hashes[ref] = hash_cache[cache_key]
+
+    # Identik byte: kelompokkan berdasarkan hash isi file, urutan upload dipertahankan
+    exact_groups: Dict[str, List[FileRef]] = {}
+    for ref in refs:
+        exact_groups.setdefault(hashes[ref], []).append(ref)
+    representatives = [members[0] for members in exact_groups.values()]
+
+    fingerprints = {}
+    for key, index in representatives:
+        file_hash = hashes[(key, index)]
+        if file_hash not in fingerprint_cache:
+            fingerprint_cache[file_hash] = fingerprint_document(uploaded_files_data[key]['files'][index], file_hash)
+        fingerprints[(key, index)] = fingerprint_cache[file_hash]
+
+    # Hampir identik: bandingkan satu perwakilan per hash unik; salinan identiknya ikut ke grup yang sama
+    near_groups: Dict[FileRef, DuplicateGroup] = {}
+    assigned = set()
+    for i, ref in enumerate(representatives):
+        if ref in assigned:
+            continue
+        for other in representatives[i + 1:]:
+            if other in assigned:
+                continue
+            similarity = _near_duplicate_similarity(fingerprints[ref], fingerprints[other])
+            if similarity < NEAR_DUPLICATE_THRESHOLD:
+                continue
+
+            group = near_groups.get(ref)
+            if group is None:
+                group = near_groups[ref] = DuplicateGroup(
+                    canonical=ref, members=exact_groups[hashes[ref]][1:], kind=DUPLICATE_NEAR, similarity=similarity
+                )
+            group.similarity = min(group.similarity, similarity)
+            group.members.extend(exact_groups[hashes[other]])
+            assigned.add(other)
+
+    groups = []
+    for ref in representatives:
+        if ref in near_groups:
+            groups.append(near_groups[ref])
+        elif ref not in assigned and len(exact_groups[hashes[ref]]) > 1:
+            groups.append(DuplicateGroup(canonical=ref, members=exact_groups[hashes[ref]][1:]))
+    return groups
+
+
+def shared_file_map(groups: List[DuplicateGroup]) -> Dict[FileRef, FileRef]:
+    """Peta file duplikat -> file canonical yang hasil ekstraksinya dipakai bersama"""
+    return {member: group.canonical for group in groups for member in group.members}
@@ -0,0 +1,287 @@
+import json
+import os
+from concurrent.futures.process import BrokenProcessPool
+from typing import List, Dict, Optional, Callable, Iterator, Tuple
+
+import PyPDF2
+import pytesseract
+
+from config import Config
+from cache_utils import get_cache, hash_file, make_cache_key
+from ocr_utils import (
+    default_ocr_workers, get_ocr_pool, reset_ocr_pool,
+    ocr_page_worker, ocr_page, page_needs_ocr, ocr_stats, OcrSettings
+)
+from pdf_utils import (
+    PdfSource, PageRecord, PAGE_SOURCE_TEXT, PAGE_SOURCE_OCR, PAGE_SOURCE_FAILED,
+    join_page_records, build_combined_text, select_target_pages
+)
+from utils import notify_log
+
+# Modul ini tidak mengimpor streamlit agar bisa dipakai oleh app Streamlit maupun CLI batch.
+
+class DocumentProcessor:
+    # Naikkan versi ini jika logika ekstraksi berubah agar cache lama tidak terpakai
+    TEXT_CACHE_VERSION = 5
+    
+    def __init__(self, notifier: Callable[[str, str], None] = notify_log):
+        # Penerima pesan info/warning/error; diganti oleh ExtractionScheduler saat berjalan di thread
+        self.notifier = notifier
+        
+        # Set Tesseract path from environment variable
+        tesseract_cmd = os.getenv('TESSERACT_CMD')
+        if tesseract_cmd and os.path.exists(tesseract_cmd):
+            pytesseract.pytesseract.tesseract_cmd = tesseract_cmd
+        
+        # OCR settings (ikut menjadi bagian key cache)
+        ocr_adaptive = os.getenv('OCR_ADAPTIVE', str(Config.OCR_ADAPTIVE)).lower() == 'true'
+        if ocr_adaptive:
+            ocr_dpi = int(os.getenv('OCR_LOW_DPI', Config.OCR_LOW_DPI))
+        else:
+            ocr_dpi = int(os.getenv('OCR_DPI', Config.OCR_DPI))
+        self.ocr_settings = OcrSettings(
+            lang=os.getenv('OCR_LANG', Config.OCR_LANG),
+            dpi=ocr_dpi,
+            colorspace=os.getenv('OCR_COLORSPACE', Config.OCR_COLORSPACE),
+            backend=os.getenv('OCR_BACKEND', Config.OCR_BACKEND),
+            adaptive=ocr_adaptive,
+            high_dpi=int(os.getenv('OCR_HIGH_DPI', Config.OCR_HIGH_DPI)),
+            min_confidence=float(os.getenv('OCR_MIN_CONFIDENCE', Config.OCR_MIN_CONFIDENCE)),
+            binarize=os.getenv('OCR_BINARIZE', str(Config.OCR_BINARIZE)).lower() == 'true',
+            deskew=os.getenv('OCR_DESKEW', str(Config.OCR_DESKEW)).lower() == 'true'
+        )
+        
+        # Penargetan halaman: dokumen panjang hanya diekstrak/OCR pada halaman TUPOKSI yang relevan
+        self.page_budget = int(os.getenv('PAGE_BUDGET', Config.PAGE_BUDGET))
+        
+        # Jumlah proses OCR paralel (0 = semua core yang tersedia)
+        ocr_workers = int(os.getenv('OCR_WORKERS', Config.OCR_WORKERS))
+        self.ocr_workers = ocr_workers if ocr_workers > 0 else default_ocr_workers()
+        
+        # Cache teks hasil ekstraksi, dipakai bersama lintas session dan restart
+        cache_dir = os.getenv('SIHATI_CACHE_DIR', Config.CACHE_DIR)
+        cache_max_mb = int(os.getenv('TEXT_CACHE_MAX_MB', Config.TEXT_CACHE_MAX_MB))
+        self.text_cache = get_cache(os.path.join(cache_dir, 'text_cache.sqlite3'), cache_max_mb * 1024 * 1024)
+        
+        # Cache OCR per halaman berdasarkan hash raster: halaman identik (kop surat, lampiran
+        # yang sama) di dokumen berbeda cukup di-OCR sekali
+        ocr_cache_max_mb = int(os.getenv('OCR_CACHE_MAX_MB', Config.OCR_CACHE_MAX_MB))
+        self.ocr_cache_max_bytes = ocr_cache_max_mb * 1024 * 1024
+        self.ocr_cache_path = os.path.join(cache_dir, 'ocr_page_cache.sqlite3') if ocr_cache_max_mb > 0 else None
+        self.ocr_cache = get_cache(self.ocr_cache_path, self.ocr_cache_max_bytes) if self.ocr_cache_path else None
+    
+    def extract_text_from_pdf(self, pdf_file, progress_callback: Optional[Callable[[int, int], None]] = None) -> str:
+        """Ekstrak teks satu PDF sebagai string (penanda halaman disisipkan), memakai cache jika tersedia"""
+        try:
+            text = join_page_records(self.iter_pages(pdf_file, progress_callback=progress_callback))
+        except Exception as e:
+            return f"Error: Gagal memproses PDF - {str(e)}"
+        
+        if not text.strip():
+            return "Error: Tidak dapat mengekstrak teks dari PDF. Pastikan PDF tidak terenkripsi dan dapat dibaca."
+        
+        return text
+    
+    def iter_pages(self, pdf_file, doc_name: str = "",
+                   progress_callback: Optional[Callable[[int, int], None]] = None) -> Iterator[PageRecord]:
+        """Aliran record per halaman sesuai urutan, memakai cache berbasis hash isi file jika tersedia.
+        
+        Hasil hanya disimpan ke cache jika generator dikonsumsi sampai habis dan tidak ada halaman gagal OCR.
+        """
+        cache_key = make_cache_key(
+            self.TEXT_CACHE_VERSION, hash_file(pdf_file), self.page_budget, *self.ocr_settings.cache_parts()
+        )
+        
+        cached_pages = self.text_cache.get(cache_key)
+        if cached_pages is not None:
+            for page_number, source, text in json.loads(cached_pages):
+                yield PageRecord(doc_name, page_number, source, text)
+            return
+        
+        pages = []
+        for record in self._iter_pages_uncached(pdf_file, doc_name, progress_callback):
+            # Tuple hanya mereferensikan string yang sama, bukan salinan teks
+            pages.append((record.page_number, record.source, record.text))
+            yield record
+        
+        has_text = any(text.strip() for _, _, text in pages)
+        if has_text and all(source != PAGE_SOURCE_FAILED for _, source, _ in pages):
+            self.text_cache.set(cache_key, json.dumps(pages, ensure_ascii=False))
+    
+    def iter_documents(self, uploaded_files: List, file_names: List[str]) -> Iterator[PageRecord]:
+        """Aliran record halaman beberapa dokumen satu instansi sesuai urutan upload"""
+        for i, (file, name) in enumerate(zip(uploaded_files, file_names)):
+            self.notifier('info', f"📄 Memproses file {i+1}/{len(uploaded_files)}: {name}")
+            has_text = False
+            try:
+                for record in self.iter_pages(file, name):
+                    has_text = has_text or bool(record.text.strip())
+                    yield record
+            except Exception as e:
+                self.notifier('warning', f"⚠️ Gagal mengekstrak teks dari {name}: {e}")
+                continue
+            
+            if not has_text:
+                self.notifier('warning', f"⚠️ Gagal mengekstrak teks dari {name}: dokumen tidak berisi teks")
+    
+    def _iter_pages_uncached(self, pdf_file, doc_name: str,
+                             progress_callback: Optional[Callable[[int, int], None]] = None) -> Iterator[PageRecord]:
+        """Record per halaman: pakai text layer jika layak, OCR hanya halaman scan/rusak.
+        
+        Dokumen diparse sekali dengan PyMuPDF; text layer dan raster OCR berasal dari handle yang sama.
+        Dokumen yang lebih panjang dari page_budget hanya diekstrak pada halaman yang relevan.
+        """
+        try:
+            source = PdfSource(pdf_file)
+        except ImportError:
+            self.notifier('warning', "⚠️ PyMuPDF tidak tersedia. Menggunakan ekstraksi teks dasar.")
+            yield from self._iter_pages_pypdf2(pdf_file, doc_name)
+            return
+        except Exception as e:
+            self.notifier('warning', f"Error membuka PDF dengan PyMuPDF: {e}")
+            yield from self._iter_pages_pypdf2(pdf_file, doc_name)
+            return
+        
+        with source:
+            page_texts = source.page_texts()
+            
+            page_numbers = select_target_pages(source.document, page_texts, self.page_budget)
+            if page_numbers is None:
+                page_numbers = list(range(len(page_texts)))
+            else:
+                label = f"{doc_name}: " if doc_name else ""
+                self.notifier('info', f"🎯 {label}{len(page_numbers)} dari {len(page_texts)} halaman relevan diekstrak")
+            
+            # Klasifikasi per halaman, OCR hanya halaman yang text layer-nya tidak layak
+            ocr_page_numbers = [page_num for page_num in page_numbers if page_needs_ocr(page_texts[page_num])]
+            ocr_pages = self._iter_ocr_pages(source, ocr_page_numbers)
+            ocr_failed = False
+            ocr_done = 0
+            
+            try:
+                for page_num in page_numbers:
+                    page_text = page_texts[page_num]
+                    page_source = PAGE_SOURCE_TEXT
+                    
+                    if ocr_done < len(ocr_page_numbers) and ocr_page_numbers[ocr_done] == page_num:
+                        page_source = PAGE_SOURCE_FAILED
+                        if not ocr_failed:
+                            try:
+                                _, page_text = next(ocr_pages)
+                                page_source = PAGE_SOURCE_OCR
+                            except Exception as e:
+                                # Halaman OCR sisanya memakai text layer apa adanya
+                                self.notifier('warning', f"Error OCR: {e}")
+                                ocr_failed = True
+                        
+                        ocr_done += 1
+                        if progress_callback:
+                            progress_callback(ocr_done, len(ocr_page_numbers))
+                    
+                    # Lepaskan referensi text layer agar memori hanya dipegang konsumen
+                    page_texts[page_num] = None
+                    yield PageRecord(doc_name, page_num + 1, page_source, page_text)
+            finally:
+                ocr_pages.close()
+    
+    def _iter_pages_pypdf2(self, pdf_file, doc_name: str) -> Iterator[PageRecord]:
+        """Backend cadangan: text layer via PyPDF2 (tanpa OCR)"""
+        try:
+            # Reset file pointer (input berupa path dibaca langsung oleh PyPDF2)
+            if hasattr(pdf_file, 'seek'):
+                pdf_file.seek(0)
+            pdf_reader = PyPDF2.PdfReader(pdf_file)
+            pages = pdf_reader.pages
+        except Exception as e:
+            self.notifier('error', f"Error ekstraksi PDF dengan PyPDF2: {e}")
+            raise
+        
+        for page_num, page in enumerate(pages):
+            yield PageRecord(doc_name, page_num + 1, PAGE_SOURCE_TEXT, page.extract_text() or "")
+    
+    def ocr_pdf_simple(self, pdf_file, progress_callback: Optional[Callable[[int, int], None]] = None) -> str:
+        """OCR seluruh halaman tanpa poppler dependency"""
+        try:
+            ocr_texts = self.ocr_pdf_pages(pdf_file, None, progress_callback)
+            return join_page_records(
+                PageRecord("", page_num + 1, PAGE_SOURCE_OCR, ocr_texts[page_num]) for page_num in sorted(ocr_texts)
+            )
+        except ImportError:
+            # Fallback: basic text extraction without images
+            self.notifier('warning', "⚠️ PyMuPDF tidak tersedia. Menggunakan ekstraksi teks dasar.")
+            return self.extract_text_from_pdf(pdf_file)
+        except Exception as e:
+            self.notifier('error', f"Error OCR: {e}")
+            return f"Error: Gagal memproses PDF - {str(e)}"
+    
+    def ocr_pdf_pages(self, pdf_file, page_numbers: Optional[List[int]] = None,
+                      progress_callback: Optional[Callable[[int, int], None]] = None) -> Dict[int, str]:
+        """OCR halaman tertentu (default semua), paralel jika worker OCR > 1.
+        
+        Mengembalikan dict nomor halaman (0-based) -> teks OCR. Raise ImportError jika PyMuPDF tidak tersedia.
+        """
+        with PdfSource(pdf_file) as source:
+            if page_numbers is None:
+                page_numbers = list(range(source.page_count))
+            
+            page_texts = {}
+            for done, (page_num, page_text) in enumerate(self._iter_ocr_pages(source, page_numbers), start=1):
+                page_texts[page_num] = page_text
+                if progress_callback:
+                    progress_callback(done, len(page_numbers))
+            return page_texts
+    
+    def _iter_ocr_pages(self, source: PdfSource, page_numbers: List[int]) -> Iterator[Tuple[int, str]]:
+        """OCR halaman dari dokumen yang sudah dibuka sesuai urutan page_numbers, paralel jika worker OCR > 1"""
+        if self.ocr_workers > 1 and len(page_numbers) > 1:
+            return self._iter_ocr_pages_parallel(source, page_numbers)
+        return self._iter_ocr_pages_serial(source, page_numbers)
+    
+    def _iter_ocr_pages_parallel(self, source: PdfSource, page_numbers: List[int]) -> Iterator[Tuple[int, str]]:
+        """Sebar OCR per halaman ke process pool dan hasilkan kembali sesuai urutan halaman"""
+        # Worker membuka dokumen dari path (file asli atau file sementara yang ditulis sekali)
+        pdf_path = source.path()
+        document_key = source.document_key()
+        pool = get_ocr_pool(self.ocr_workers)
+        futures = [
+            pool.submit(ocr_page_worker, pdf_path, page_num, self.ocr_settings,
+                        pytesseract.pytesseract.tesseract_cmd, self.ocr_cache_path, self.ocr_cache_max_bytes,
+                        document_key)
+            for page_num in page_numbers
+        ]
+        
+        try:
+            for done, future in enumerate(futures):
+                try:
+                    result = future.result()
+                except BrokenProcessPool:
+                    # Worker mati (mis. kehabisan memori): buat ulang pool lain kali, lanjutkan secara serial
+                    reset_ocr_pool()
+                    self.notifier('warning', "⚠️ Worker OCR paralel berhenti tidak terduga. Melanjutkan OCR secara serial.")
+                    yield from self._iter_ocr_pages_serial(source, page_numbers[done:])
+                    return
+                ocr_stats.record(result)
+                yield result.page_num, result.text
+        finally:
+            # Konsumen berhenti lebih awal: jangan OCR halaman yang tidak akan dipakai
+            for future in futures:
+                future.cancel()
+    
+    def _iter_ocr_pages_serial(self, source: PdfSource, page_numbers: List[int]) -> Iterator[Tuple[int, str]]:
+        """OCR halaman satu per satu di proses ini"""
+        for page_num in page_numbers:
+            result = ocr_page(source.document, page_num, self.ocr_settings, self.ocr_cache)
+            ocr_stats.record(result)
+            yield result.page_num, result.text
+    
+    def process_multiple_files(self, uploaded_files: List, file_names: List[str]) -> str:
+        """Proses multiple files untuk satu instansi secara berurutan"""
+        return build_combined_text(self.iter_documents(uploaded_files, file_names))
+    
+    def combine_documents(self, documents: List[Optional[List[PageRecord]]], file_names: List[str]) -> str:
+        """Gabungkan record halaman beberapa dokumen satu instansi sesuai urutan upload"""
+        for records, name in zip(documents, file_names):
+            if not records or not any(record.text.strip() for record in records):
+                self.notifier('warning', f"⚠️ Gagal mengekstrak teks dari {name}")
+        
+        return build_combined_text(record for records in documents if records for record in records)
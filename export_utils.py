@@ -2,7 +2,10 @@ import io
 import pandas as pd
 from datetime import datetime
 from typing import List, Dict, Any
-import streamlit as st
+import logging
+
+# streamlit hanya diimpor oleh fungsi download di bawah agar exporter bisa dipakai CLI
+logger = logging.getLogger('sihati')
 
 # Excel Export
 try:
@@ -12,7 +15,7 @@ try:
     EXCEL_AVAILABLE = True
 except ImportError:
     EXCEL_AVAILABLE = False
-    st.warning("⚠️ openpyxl tidak tersedia. Install dengan: pip install openpyxl")
+    logger.warning("⚠️ openpyxl tidak tersedia. Install dengan: pip install openpyxl")
 
 # PDF Export  
 try:
@@ -25,7 +28,7 @@ try:
     PDF_AVAILABLE = True
 except ImportError:
     PDF_AVAILABLE = False
-    st.warning("⚠️ reportlab tidak tersedia. Install dengan: pip install reportlab")
+    logger.warning("⚠️ reportlab tidak tersedia. Install dengan: pip install reportlab")
 
 class ExcelExporter:
     def __init__(self):
@@ -579,6 +582,8 @@ class PDFExporter:
 # Export functions for use in main app
 def create_excel_report(instansi_list: List, overlap_analysis: Dict[str, Any]):
     """Create and download Excel report"""
+    import streamlit as st
+    
     try:
         exporter = ExcelExporter()
         excel_buffer = exporter.create_excel_report(instansi_list, overlap_analysis)
@@ -603,6 +608,8 @@ def create_excel_report(instansi_list: List, overlap_analysis: Dict[str, Any]):
 
 def create_pdf_report(instansi_list: List, overlap_analysis: Dict[str, Any]):
     """Create and download PDF report"""
+    import streamlit as st
+    
     try:
         exporter = PDFExporter()
         pdf_buffer = exporter.create_pdf_report(instansi_list, overlap_analysis)
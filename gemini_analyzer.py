@@ -0,0 +1,688 @@
+import asyncio
+import json
+import os
+import threading
+import time
+from dataclasses import dataclass
+from typing import List, Dict, Any, Callable, Iterable, Optional, Tuple
+
+import google.generativeai as genai
+
+from async_utils import get_model_limiter, run_async
+from cache_utils import get_cache, make_cache_key
+from config import (
+    AVAILABLE_MODELS, Config, DEFAULT_MODEL, EXTRACTION_MODES, MODEL_ROUTINGS,
+    EXTRACTION_RESPONSE_SCHEMA, MAP_RESPONSE_SCHEMA, OVERLAP_RESPONSE_SCHEMA
+)
+from context_builder import build_context, context_token_budget, estimate_tokens, split_windows
+from json_utils import IncrementalJsonParser, PARSE_REPAIRED, parse_json_response
+from metrics import llm_metrics
+from resilience import CircuitOpenError, call_with_retry, call_with_retry_async, is_retryable
+from similarity_utils import (
+    ITEM_PREFIX_PATTERN, cluster_candidates, collect_items, cross_agency_pair_count, find_candidate_pairs,
+    normalize_item
+)
+from utils import notify_log
+
+# Modul ini tidak mengimpor streamlit agar bisa dipakai oleh app Streamlit maupun CLI batch.
+
+LIST_FIELDS = ('tugas_pokok', 'fungsi', 'program', 'kegiatan', 'target_sasaran')
+MERGE_SIMILARITY = 0.85  # Jaccard kata minimal agar dua item hasil map dianggap sama
+
+# Tahap routing model (dicatat per tahap di llm_metrics)
+STAGE_EXTRACTION = 'ekstraksi'
+STAGE_MAP = 'map'
+STAGE_ESCALATION = 'eskalasi'
+STAGE_OVERLAP = 'analisis_overlap'
+
+@dataclass
+class InstansiData:
+    nama: str
+    tugas_pokok: List[str]
+    fungsi: List[str]
+    program: List[str]
+    kegiatan: List[str]
+    anggaran: str
+    target_sasaran: List[str]
+    dokumen_sumber: List[str]
+    
+    def is_empty(self) -> bool:
+        """Tidak ada satu pun informasi yang berhasil diekstrak"""
+        return not (any(getattr(self, field) for field in LIST_FIELDS) or self.anggaran)
+
+
+def merge_items(item_lists: Iterable[Any]) -> List[str]:
+    """Gabungkan list item dari beberapa bagian dokumen tanpa duplikasi.
+
+    Item dengan kata yang hampir sama (Jaccard >= MERGE_SIMILARITY) dianggap satu;
+    versi terpanjang yang dipertahankan, urutan kemunculan pertama tetap.
+    """
+    kept: List[str] = []
+    kept_words: List[frozenset] = []
+    seen = set()
+    for items in item_lists:
+        if isinstance(items, str):
+            items = [items]
+        for item in items or []:
+            item = ITEM_PREFIX_PATTERN.sub('', str(item)).strip()
+            key = normalize_item(item)
+            if not key or key in seen:
+                continue
+            seen.add(key)
+            words = frozenset(key.split())
+            for i, other in enumerate(kept_words):
+                if len(words & other) / len(words | other) >= MERGE_SIMILARITY:
+                    if len(item) > len(kept[i]):
+                        kept[i], kept_words[i] = item, words
+                    break
+            else:
+                kept.append(item)
+                kept_words.append(words)
+    return kept
+
+
+def validate_extraction(data: Any) -> Optional[str]:
+    """Alasan hasil ekstraksi ditolak ('schema' atau 'kosong'), None jika layak dipakai"""
+    if not isinstance(data, dict):
+        return 'schema'
+    for field in LIST_FIELDS:
+        value = data.get(field, [])
+        if not isinstance(value, list) or not all(isinstance(item, str) for item in value):
+            return 'schema'
+    if not isinstance(data.get('anggaran', ''), (str, list)):
+        return 'schema'
+    # Tugas pokok, fungsi, dan program kosong semua: model cepat kemungkinan gagal memahami dokumen
+    if not any(data.get(field) for field in ('tugas_pokok', 'fungsi', 'program')):
+        return 'kosong'
+    return None
+
+
+def _usage_tokens(usage) -> Tuple[int, int]:
+    """(token prompt, token output) dari usage_metadata respons; (0, 0) jika tidak tersedia"""
+    if usage is None:
+        return 0, 0
+    return getattr(usage, 'prompt_token_count', 0) or 0, getattr(usage, 'candidates_token_count', 0) or 0
+
+
+def merge_extractions(partials: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Tahap reduce map-reduce: satukan hasil ekstraksi per bagian secara lokal (tanpa panggilan model)"""
+    merged: Dict[str, Any] = {field: merge_items(partial.get(field) for partial in partials) for field in LIST_FIELDS}
+    merged['anggaran'] = '; '.join(merge_items(partial.get('anggaran') for partial in partials))
+    return merged
+
+
+class GeminiAnalyzer:
+    # Naikkan versi ini jika cara respons diproses berubah agar cache respons lama tidak terpakai
+    RESPONSE_CACHE_VERSION = 2
+    
+    def __init__(self, api_key: str, model_name: str = DEFAULT_MODEL,
+                 notifier: Callable[[str, str], None] = notify_log, use_cache: bool = True,
+                 extraction_mode: Optional[str] = None, routing: Optional[str] = None,
+                 prefilter: Optional[bool] = None):
+        self.notifier = notifier
+        
+        # GEMINI_API_ENDPOINT mengarahkan SDK ke server lain (mis. stub lokal di benchmarks/) lewat REST.
+        # Generasi async SDK hanya tersedia di transport gRPC; di REST panggilan sync dijalankan di thread.
+        api_endpoint = os.getenv('GEMINI_API_ENDPOINT')
+        if api_endpoint:
+            genai.configure(api_key=api_key, transport='rest', client_options={'api_endpoint': api_endpoint})
+        else:
+            genai.configure(api_key=api_key)
+        self.native_async = not api_endpoint
+        self.model_name = model_name
+        
+        # Generation config ikut menjadi bagian key cache respons (kosong = default model)
+        self.generation_config: Dict[str, Any] = {}
+        self.model = genai.GenerativeModel(model_name, generation_config=self.generation_config or None)
+        self._models = {model_name: self.model}  # Termasuk model cadangan yang dibuat saat failover
+        
+        # Retry bawaan SDK dimatikan: retry, backoff, dan failover ditangani modul resilience
+        self.request_options = {
+            'retry': None,
+            'timeout': float(os.getenv('LLM_TIMEOUT_SECONDS', Config.LLM_TIMEOUT_SECONDS))
+        }
+        
+        # Cache respons berdasarkan hash (model, generation config, prompt), dipakai bersama lintas session.
+        # use_cache=False memaksa panggilan baru; respons barunya tetap disimpan ke cache.
+        self.use_cache = use_cache
+        cache_max_mb = int(os.getenv('LLM_CACHE_MAX_MB', Config.LLM_CACHE_MAX_MB))
+        cache_ttl_hours = float(os.getenv('LLM_CACHE_TTL_HOURS', Config.LLM_CACHE_TTL_HOURS))
+        cache_dir = os.getenv('SIHATI_CACHE_DIR', Config.CACHE_DIR)
+        self.response_cache = get_cache(
+            os.path.join(cache_dir, 'llm_response_cache.sqlite3'), cache_max_mb * 1024 * 1024, cache_ttl_hours * 3600
+        ) if cache_max_mb > 0 else None
+        
+        # 'single', 'map_reduce', atau 'auto' (map-reduce jika teks instansi melebihi MAP_REDUCE_MIN_TOKENS)
+        self.extraction_mode = extraction_mode or os.getenv('EXTRACTION_MODE', Config.EXTRACTION_MODE)
+        if self.extraction_mode not in EXTRACTION_MODES:
+            raise ValueError(f"Mode ekstraksi tidak dikenal: {self.extraction_mode}")
+        
+        # 'cascade': ekstraksi per instansi dengan model cepat ('fast_model' di AVAILABLE_MODELS) dan
+        # eskalasi ke model terpilih hanya jika hasilnya gagal validasi; analisis overlap selalu model terpilih.
+        # 'single': semua tahap memakai model terpilih.
+        self.routing = routing or os.getenv('MODEL_ROUTING', Config.MODEL_ROUTING)
+        if self.routing not in MODEL_ROUTINGS:
+            raise ValueError(f"Routing model tidak dikenal: {self.routing}")
+        self.fast_model = AVAILABLE_MODELS.get(model_name, {}).get('fast_model', model_name)
+        
+        # Penyaringan kandidat: analisis tumpang tindih hanya menerima kelompok item yang mirip (similarity_utils)
+        if prefilter is None:
+            prefilter = os.getenv('OVERLAP_PREFILTER', str(Config.OVERLAP_PREFILTER)).lower() == 'true'
+        self.prefilter = prefilter
+        
+        # Jumlah panggilan API sebenarnya oleh analyzer ini (tidak termasuk respons dari cache)
+        self.api_calls = 0
+        self._lock = threading.Lock()
+    
+    def _response_cache_key(self, prompt: str, model_name: str, schema: Optional[Dict[str, Any]] = None) -> str:
+        return make_cache_key(
+            self.RESPONSE_CACHE_VERSION, model_name, json.dumps(self.generation_config, sort_keys=True),
+            json.dumps(self._output_config(model_name, schema), sort_keys=True), prompt
+        )
+    
+    def _output_config(self, model_name: str, schema: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+        """Generation config per panggilan: output JSON terstruktur sesuai schema jika model mendukung"""
+        if schema is None or not AVAILABLE_MODELS.get(model_name, {}).get('structured_output', True):
+            return {}
+        return {'response_mime_type': 'application/json', 'response_schema': schema}
+    
+    def _cached_response(self, cache_key: str) -> Any:
+        """Respons JSON dari cache, None jika tidak ada atau cache tidak dipakai"""
+        if self.response_cache and self.use_cache:
+            cached_text = self.response_cache.get(cache_key)
+            if cached_text is not None:
+                return json.loads(cached_text)
+        return None
+    
+    def _count_api_call(self):
+        with self._lock:
+            self.api_calls += 1
+    
+    def _get_model(self, model_name: str):
+        with self._lock:
+            model = self._models.get(model_name)
+            if model is None:
+                model = genai.GenerativeModel(model_name, generation_config=self.generation_config or None)
+                self._models[model_name] = model
+            return model
+    
+    def _model_chain(self, model_name: Optional[str] = None) -> List[str]:
+        """Model utama lalu model cadangannya (satu tingkat) dari AVAILABLE_MODELS"""
+        model_name = model_name or self.model_name
+        fallback = AVAILABLE_MODELS.get(model_name, {}).get('fallback')
+        return [model_name] + ([fallback] if fallback and fallback != model_name else [])
+    
+    def _should_fail_over(self, error: Exception, model_name: str, next_model: str) -> bool:
+        if not (isinstance(error, CircuitOpenError) or is_retryable(error)):
+            return False
+        llm_metrics.record_fallback()
+        self.notifier('warning', f"⚠️ Model {model_name} sedang dibatasi/tidak tersedia ({error}). "
+                                 f"Beralih ke model cadangan {next_model}.")
+        return True
+    
+    def _generate_json(self, prompt: str, model_name: Optional[str] = None,
+                       on_partial: Optional[Callable[[Dict[str, Any]], None]] = None,
+                       schema: Optional[Dict[str, Any]] = None, stage: str = STAGE_EXTRACTION) -> Any:
+        """Kirim prompt ke model dan parse respons JSON; respons yang valid disimpan ke cache.
+        
+        Error sementara diulang dengan backoff (lihat resilience); jika model utama dibatasi
+        kuota atau circuit breaker-nya terbuka, model cadangan yang dipakai.
+        
+        on_partial: respons di-stream dan on_partial(hasil_sementara) dipanggil setiap kali field
+        atau elemen array tingkat atas selesai ditulis model (lihat json_utils).
+        
+        schema: response_schema output JSON terstruktur (lihat config), diabaikan untuk model tanpa dukungan.
+        
+        stage: nama tahap untuk metrik latensi/token/biaya per tahap (llm_metrics.record_stage).
+        """
+        start = time.perf_counter()
+        chain = self._model_chain(model_name)
+        cached = self._cached_response(self._response_cache_key(prompt, chain[0], schema))
+        if cached is not None:
+            llm_metrics.record_stage(stage, chain[0], time.perf_counter() - start, cached=True)
+            if on_partial:
+                on_partial(cached)
+            return cached
+        
+        for index, model_name in enumerate(chain):
+            has_fallback = index + 1 < len(chain)
+            
+            def generate():
+                self._count_api_call()
+                model = self._get_model(model_name)
+                output_config = self._output_config(model_name, schema) or None
+                if on_partial is None:
+                    response = model.generate_content(
+                        prompt, generation_config=output_config, request_options=self.request_options
+                    )
+                    return response.text, response.usage_metadata
+                return self._consume_stream(
+                    model.generate_content(prompt, generation_config=output_config, stream=True,
+                                           request_options=self.request_options),
+                    on_partial
+                )
+            
+            try:
+                text, usage = call_with_retry(generate, model_name, fail_fast_on_throttle=has_fallback)
+            except Exception as e:
+                if has_fallback and self._should_fail_over(e, model_name, chain[index + 1]):
+                    continue
+                raise
+            llm_metrics.record_stage(stage, model_name, time.perf_counter() - start, *_usage_tokens(usage))
+            return self._parse_response(self._response_cache_key(prompt, model_name, schema), text, model_name)
+    
+    async def _generate_json_async(self, prompt: str, model_name: Optional[str] = None,
+                                   schema: Optional[Dict[str, Any]] = None, stage: str = STAGE_EXTRACTION) -> Any:
+        """Versi async _generate_json; jumlah panggilan bersamaan dan laju request dibatasi per model"""
+        start = time.perf_counter()
+        chain = self._model_chain(model_name)
+        cached = await asyncio.to_thread(self._cached_response, self._response_cache_key(prompt, chain[0], schema))
+        if cached is not None:
+            llm_metrics.record_stage(stage, chain[0], time.perf_counter() - start, cached=True)
+            return cached
+        
+        for index, model_name in enumerate(chain):
+            has_fallback = index + 1 < len(chain)
+            
+            async def generate():
+                async with get_model_limiter(model_name):
+                    self._count_api_call()
+                    model = self._get_model(model_name)
+                    output_config = self._output_config(model_name, schema) or None
+                    if self.native_async:
+                        response = await model.generate_content_async(
+                            prompt, generation_config=output_config, request_options=self.request_options
+                        )
+                    else:
+                        response = await asyncio.to_thread(
+                            model.generate_content, prompt,
+                            generation_config=output_config, request_options=self.request_options
+                        )
+                    return response.text, response.usage_metadata
+            
+            try:
+                text, usage = await call_with_retry_async(generate, model_name, fail_fast_on_throttle=has_fallback)
+            except Exception as e:
+                if has_fallback and self._should_fail_over(e, model_name, chain[index + 1]):
+                    continue
+                raise
+            llm_metrics.record_stage(stage, model_name, time.perf_counter() - start, *_usage_tokens(usage))
+            return await asyncio.to_thread(
+                self._parse_response, self._response_cache_key(prompt, model_name, schema), text, model_name
+            )
+    
+    def _consume_stream(self, response, on_partial: Callable[[Dict[str, Any]], None]) -> tuple:
+        """Baca respons stream sampai habis; hasil sementara dilaporkan lewat on_partial.
+        
+        Mengembalikan (teks lengkap, usage_metadata chunk terakhir).
+        """
+        parser = IncrementalJsonParser()
+        parts = []
+        usage = None
+        for chunk in response:
+            # Chunk terakhir bisa hanya berisi finish reason tanpa teks
+            text = chunk.text if chunk.parts else ''
+            parts.append(text)
+            usage = chunk.usage_metadata or usage
+            if parser.feed(text):
+                on_partial(dict(parser.result))
+        return ''.join(parts), usage
+    
+    def _parse_response(self, cache_key: str, text: str, model_name: str) -> Any:
+        """Parse toleran (lihat json_utils.parse_json_response); hasil parse dicatat di llm_metrics"""
+        try:
+            data, status = parse_json_response(text)
+        except ValueError:
+            llm_metrics.record_parse(model_name, 'failed', wasted_tokens=estimate_tokens(text))
+            raise
+        llm_metrics.record_parse(model_name, status)
+        
+        if status == PARSE_REPAIRED:
+            # Respons terpotong tidak disimpan ke cache agar run berikutnya bisa mendapat respons lengkap
+            self.notifier('warning', f"⚠️ Respons {model_name} terpotong; bagian yang lengkap tetap dipakai.")
+        elif self.response_cache:
+            self.response_cache.set(cache_key, json.dumps(data, ensure_ascii=False))
+        return data
+    
+    def extract_instansi_data(self, combined_text: str, nama_instansi: str, file_names: List[str]) -> InstansiData:
+        """Ekstrak data terstruktur dari multiple dokumen instansi.
+        
+        Raise jika ekstraksi gagal (error API setelah retry/failover, atau respons tidak sesuai schema);
+        hasil gagal tidak pernah dikembalikan sebagai InstansiData kosong.
+        """
+        # Cascade dan tahap map berjalan di event loop bersama
+        return run_async(self.extract_instansi_data_async(combined_text, nama_instansi, file_names)).result()
+    
+    async def extract_instansi_data_async(self, combined_text: str, nama_instansi: str,
+                                          file_names: List[str]) -> InstansiData:
+        """Versi async extract_instansi_data, dibatasi limiter model (lihat async_utils).
+        
+        Routing 'cascade': percobaan pertama dengan model cepat; jika gagal atau hasilnya ditolak
+        validate_extraction, ekstraksi diulang sekali dengan model terpilih (eskalasi).
+        
+        Raise jika percobaan terakhir gagal atau hasilnya tidak sesuai schema (lihat extract_instansi_data).
+        """
+        if self.routing == 'single' or self.fast_model == self.model_name:
+            data = await self._extract(combined_text, nama_instansi, file_names, self.model_name, STAGE_EXTRACTION)
+        else:
+            try:
+                data = await self._extract(combined_text, nama_instansi, file_names, self.fast_model, STAGE_EXTRACTION)
+                reason = validate_extraction(data)
+            except Exception as e:
+                reason = 'error'
+                self.notifier('warning', f"⚠️ Ekstraksi {nama_instansi} dengan {self.fast_model} gagal: {e}")
+            
+            if reason is not None:
+                llm_metrics.record_escalation(reason)
+                self.notifier('info', f"🔼 {nama_instansi}: hasil {self.fast_model} ditolak ({reason}), "
+                                      f"eskalasi ke {self.model_name}")
+                data = await self._extract(combined_text, nama_instansi, file_names, self.model_name, STAGE_ESCALATION)
+        
+        if validate_extraction(data) == 'schema':
+            raise ValueError(f"Respons ekstraksi {nama_instansi} tidak sesuai schema")
+        return self._to_instansi_data(data, nama_instansi, file_names)
+    
+    async def _extract(self, combined_text: str, nama_instansi: str, file_names: List[str],
+                       model_name: str, stage: str) -> Dict[str, Any]:
+        """Satu percobaan ekstraksi (langsung atau map-reduce) dengan model_name"""
+        if self._use_map_reduce(combined_text):
+            return await self._map_reduce_extract(combined_text, nama_instansi, file_names, model_name, stage)
+        prompt = self._build_extraction_prompt(combined_text, nama_instansi, file_names, model_name)
+        data = await self._generate_json_async(prompt, model_name, schema=EXTRACTION_RESPONSE_SCHEMA, stage=stage)
+        if not isinstance(data, dict):
+            raise ValueError(f"Respons ekstraksi bukan objek JSON: {type(data).__name__}")
+        return data
+    
+    def _use_map_reduce(self, combined_text: str) -> bool:
+        if self.extraction_mode == 'auto':
+            min_tokens = int(os.getenv('MAP_REDUCE_MIN_TOKENS', Config.MAP_REDUCE_MIN_TOKENS))
+            return estimate_tokens(combined_text) > min_tokens
+        return self.extraction_mode == 'map_reduce'
+    
+    async def _map_reduce_extract(self, combined_text: str, nama_instansi: str, file_names: List[str],
+                                  model_name: str, stage: str = STAGE_MAP) -> Dict[str, Any]:
+        """Ekstraksi map-reduce: seluruh teks dibagi per bagian, tiap bagian diekstrak paralel oleh
+        model_name, lalu hasilnya digabung lokal (merge_extractions).
+        
+        Latensi mengikuti bagian paling lambat (dibatasi limiter model), bukan panjang dokumen.
+        Bagian percobaan pertama dicatat sebagai tahap 'map', eskalasi tetap sebagai 'eskalasi'.
+        """
+        windows = split_windows(combined_text, int(os.getenv('MAP_CHUNK_TOKENS', Config.MAP_CHUNK_TOKENS)))
+        stage = STAGE_MAP if stage == STAGE_EXTRACTION else stage
+        self.notifier('info', f"🧩 {nama_instansi}: ekstraksi map-reduce {len(windows)} bagian dengan {model_name}")
+        
+        results = await asyncio.gather(*(
+            self._generate_json_async(
+                self._build_map_prompt(window, nama_instansi, file_names, index, len(windows)), model_name,
+                schema=MAP_RESPONSE_SCHEMA, stage=stage
+            )
+            for index, window in enumerate(windows, start=1)
+        ), return_exceptions=True)
+        
+        partials = [result for result in results if isinstance(result, dict)]
+        errors = [result for result in results if isinstance(result, BaseException)]
+        if not partials:
+            if errors:
+                raise errors[0]
+            raise ValueError("Tidak ada hasil ekstraksi dari bagian dokumen")
+        if len(partials) < len(results):
+            self.notifier('warning', f"⚠️ {len(results) - len(partials)} dari {len(results)} bagian dokumen "
+                                     f"{nama_instansi} gagal diekstrak" + (f": {errors[0]}" if errors else ""))
+        return merge_extractions(partials)
+    
+    def _build_map_prompt(self, window_text: str, nama_instansi: str, file_names: List[str],
+                          index: int, total: int) -> str:
+        return f"""
+        Berikut bagian {index} dari {total} kumpulan dokumen instansi pemerintah Indonesia.
+
+        Nama Instansi: {nama_instansi}
+        Dokumen yang Dianalisis: {', '.join(file_names)}
+
+        Bagian Dokumen:
+        {window_text}
+
+        Ekstrak HANYA informasi yang tertulis eksplisit di bagian ini:
+        1. Tugas Pokok (tugas_pokok)
+        2. Fungsi (fungsi)
+        3. Program (program)
+        4. Kegiatan (kegiatan)
+        5. Anggaran (anggaran): kutipan alokasi anggaran APBN/APBD
+        6. Target Sasaran (target_sasaran): target/indikator kinerja
+
+        Tulis setiap item singkat dan gunakan terminologi asli dokumen.
+
+        Format output JSON:
+        {{
+            "tugas_pokok": ["tugas 1"],
+            "fungsi": ["fungsi 1"],
+            "program": ["program 1"],
+            "kegiatan": ["kegiatan 1"],
+            "anggaran": ["anggaran 1"],
+            "target_sasaran": ["sasaran 1"]
+        }}
+
+        Jika informasi tidak ditemukan di bagian ini, gunakan array kosong.
+        """
+    
+    def _build_extraction_prompt(self, combined_text: str, nama_instansi: str, file_names: List[str],
+                                 model_name: Optional[str] = None) -> str:
+        # Bagian teks paling relevan yang muat dalam anggaran token model
+        limited_text = build_context(combined_text, context_token_budget(model_name or self.model_name)).text
+        
+        prompt = f"""
+        Analisis kumpulan dokumen instansi pemerintah Indonesia berikut dan ekstrak informasi dalam format JSON:
+
+        Nama Instansi: {nama_instansi}
+        Dokumen yang Dianalisis: {', '.join(file_names)}
+        
+        Dokumen Gabungan:
+        {limited_text}
+
+        INSTRUKSI EKSTRAKSI (Konteks Indonesia):
+        Dari berbagai dokumen di atas, ekstrak dan konsolidasi informasi berikut sesuai dengan konteks pemerintahan Indonesia:
+        
+        1. Tugas Pokok (tugas_pokok): tugas utama instansi berdasarkan peraturan perundang-undangan
+        2. Fungsi (fungsi): fungsi-fungsi spesifik yang disebutkan dalam SOTK atau dokumen resmi
+        3. Program (program): program kerja strategis sesuai Renstra/RPJMN
+        4. Kegiatan (kegiatan): kegiatan operasional spesifik dalam Renja/DIPA
+        5. Anggaran (anggaran): informasi alokasi anggaran APBN/APBD
+        6. Target Sasaran (target_sasaran): target/indikator kinerja yang ingin dicapai
+
+        PETUNJUK KONSOLIDASI:
+        - Gabungkan informasi dari semua dokumen
+        - Hindari duplikasi (jika sama, masukkan sekali saja)
+        - Prioritaskan informasi dari dokumen resmi (SOTK, Renstra, Perpres, Permen)
+        - Gunakan terminologi pemerintahan Indonesia yang benar
+        - Jika ada konflik informasi, ambil yang paling terbaru/lengkap
+
+        Format output JSON:
+        {{
+            "tugas_pokok": ["tugas 1", "tugas 2"],
+            "fungsi": ["fungsi 1", "fungsi 2"],
+            "program": ["program 1", "program 2"],
+            "kegiatan": ["kegiatan 1", "kegiatan 2"],
+            "anggaran": "ringkasan informasi anggaran",
+            "target_sasaran": ["sasaran 1", "sasaran 2"]
+        }}
+        
+        Pastikan ekstraksi akurat dan komprehensif dari SEMUA dokumen.
+        Jika informasi tidak ditemukan, gunakan array kosong.
+        """
+        return prompt
+    
+    def _to_instansi_data(self, data: Dict[str, Any], nama_instansi: str, file_names: List[str]) -> InstansiData:
+        return InstansiData(
+            nama=nama_instansi,
+            tugas_pokok=data.get('tugas_pokok', []),
+            fungsi=data.get('fungsi', []),
+            program=data.get('program', []),
+            kegiatan=data.get('kegiatan', []),
+            anggaran=data.get('anggaran', ''),
+            target_sasaran=data.get('target_sasaran', []),
+            dokumen_sumber=file_names
+        )
+    
+    def analyze_overlaps(self, instansi_list: List[InstansiData],
+                         on_partial: Optional[Callable[[Dict[str, Any]], None]] = None) -> Dict[str, Any]:
+        """Analisis tumpang tindih antar instansi dengan konteks Indonesia.
+        
+        Dengan on_partial respons di-stream: ringkasan eksekutif dan setiap item tumpang_tindih/rekomendasi
+        dilaporkan begitu lengkap, sebelum seluruh JSON selesai.
+        
+        Dengan prefilter hanya kelompok kandidat yang dikirim ke model dan statistik penyaringan
+        disertakan di hasil ('penyaringan_kandidat'); tanpa kandidat, ringkasan lengkap yang dikirim
+        karena kemiripan semantik tidak selalu terlihat secara leksikal.
+        """
+        
+        # Prepare data untuk analisis
+        instansi_summary = ""
+        for i, instansi in enumerate(instansi_list):
+            instansi_summary += f"""
+            
+INSTANSI {i+1}: {instansi.nama}
+Dokumen Sumber: {', '.join(instansi.dokumen_sumber)}
+Tugas Pokok: {'; '.join(instansi.tugas_pokok)}
+Fungsi: {'; '.join(instansi.fungsi)}
+Program: {'; '.join(instansi.program)}
+Kegiatan: {'; '.join(instansi.kegiatan)}
+Target Sasaran: {'; '.join(instansi.target_sasaran)}
+            """
+        
+        prefilter_stats = None
+        if self.prefilter:
+            candidate_summary, prefilter_stats = self._build_candidate_summary(
+                instansi_list, estimate_tokens(instansi_summary)
+            )
+            self.notifier('info', f"🎯 Penyaringan kandidat: {prefilter_stats['item_dikirim']} dari "
+                                  f"{prefilter_stats['total_item']} item ({prefilter_stats['kelompok_dikirim']} kelompok) "
+                                  f"dikirim ke model, ~{prefilter_stats['token_prompt_dikirim']} token "
+                                  f"(tanpa penyaringan ~{prefilter_stats['token_prompt_tanpa_penyaringan']})")
+            if candidate_summary is not None:
+                instansi_summary = candidate_summary
+            
+            if on_partial:
+                report_partial = on_partial
+                
+                def on_partial(partial: Dict[str, Any]):
+                    report_partial({**partial, 'penyaringan_kandidat': prefilter_stats})
+        
+        prompt = f"""
+        Analisis tumpang tindih tugas, fungsi, dan program antar instansi pemerintah Indonesia berikut:
+
+        {instansi_summary}
+
+        KONTEKS ANALISIS:
+        - Sistem pemerintahan Indonesia dengan struktur kementerian/lembaga
+        - Regulasi perundang-undangan Indonesia (UU, PP, Perpres, Permen)
+        - Koordinasi antar K/L berdasarkan tugas dan fungsi masing-masing
+        - Efisiensi anggaran APBN dan pencegahan duplikasi program
+        - Best practices reformasi birokrasi Indonesia
+
+        Berikan analisis komprehensif dalam format JSON dengan struktur:
+        {{
+            "ringkasan_eksekutif": "ringkasan singkat temuan utama dengan konteks Indonesia",
+            "tumpang_tindih": [
+                {{
+                    "kategori": "tugas_pokok/fungsi/program/kegiatan",
+                    "deskripsi": "deskripsi tumpang tindih dengan konteks regulasi Indonesia",
+                    "instansi_terlibat": ["instansi 1", "instansi 2"],
+                    "tingkat_overlap": "tinggi/sedang/rendah",
+                    "dampak_potensial": "deskripsi dampak terhadap pelayanan publik/efisiensi",
+                    "estimasi_pemborosan_anggaran": "persentase atau nilai rupiah jika memungkinkan",
+                    "dokumen_sumber": ["dokumen yang menunjukkan overlap"],
+                    "rekomendasi_koordinasi": "mekanisme koordinasi yang disarankan"
+                }}
+            ],
+            "rekomendasi": [
+                {{
+                    "prioritas": "tinggi/sedang/rendah",
+                    "aksi": "deskripsi aksi sesuai sistem pemerintahan Indonesia",
+                    "instansi_pelaksana": "instansi yang sebaiknya menjalankan (lead agency)",
+                    "instansi_pendukung": ["instansi pendukung"],
+                    "timeline": "estimasi waktu implementasi",
+                    "benefit_estimasi": "manfaat untuk pelayanan publik dan efisiensi",
+                    "dasar_hukum": "rujukan regulasi yang mendukung",
+                    "mekanisme_koordinasi": "forum/mekanisme koordinasi yang disarankan"
+                }}
+            ],
+            "metrik_overlap": {{
+                "total_overlap_ditemukan": 0,
+                "overlap_tinggi": 0,
+                "overlap_sedang": 0,
+                "overlap_rendah": 0,
+                "efisiensi_potensial": "persentase efisiensi anggaran yang dapat dicapai"
+            }}
+        }}
+
+        Fokus pada:
+        1. Identifikasi duplikasi tugas berdasarkan regulasi masing-masing K/L
+        2. Program dengan target sasaran dan output yang sama
+        3. Potensi konflik kewenangan regulasi
+        4. Peluang sinergi dan kolaborasi antar K/L
+        5. Optimasi alokasi anggaran APBN
+        6. Perbaikan koordinasi sesuai sistem pemerintahan Indonesia
+
+        Berikan rekomendasi yang praktis, dapat diimplementasikan, dan sesuai dengan sistem pemerintahan Indonesia.
+        """
+        
+        try:
+            result = self._generate_json(prompt, on_partial=on_partial, schema=OVERLAP_RESPONSE_SCHEMA,
+                                         stage=STAGE_OVERLAP)
+        except Exception as e:
+            self.notifier('error', f"Error analisis overlap: {e}")
+            result = {"error": str(e)}
+        if prefilter_stats is not None and isinstance(result, dict):
+            result['penyaringan_kandidat'] = prefilter_stats
+        return result
+    
+    def _build_candidate_summary(self, instansi_list: List[InstansiData],
+                                 full_tokens: int) -> Tuple[Optional[str], Dict[str, Any]]:
+        """Ringkasan instansi berisi kelompok item kandidat tumpang tindih saja, dalam anggaran token.
+        
+        Mengembalikan (teks, statistik penyaringan); teks None jika ringkasan lengkap yang dipakai
+        (lihat 'ringkasan_lengkap_dipakai').
+        """
+        start = time.perf_counter()
+        budget = int(os.getenv('OVERLAP_CANDIDATE_TOKEN_BUDGET', Config.OVERLAP_CANDIDATE_TOKEN_BUDGET))
+        items = collect_items(instansi_list)
+        # Antar field juga dibandingkan: tugas pokok satu instansi bisa beririsan dengan fungsi instansi lain
+        pairs = find_candidate_pairs(instansi_list, cross_field=True)
+        clusters = cluster_candidates(pairs)
+        
+        header = "".join(f"\nINSTANSI {i+1}: {instansi.nama}\nDokumen Sumber: {', '.join(instansi.dokumen_sumber)}\n"
+                         for i, instansi in enumerate(instansi_list))
+        header += ("\nKANDIDAT TUMPANG TINDIH (hasil penyaringan otomatis berdasarkan kemiripan teks antar instansi; "
+                   "analisis hanya kandidat berikut dan abaikan kandidat yang ternyata bukan tumpang tindih):\n")
+        parts = [header]
+        used = estimate_tokens(header)
+        sent = []
+        # Kelompok dengan instansi terbanyak dan skor tertinggi dulu; yang tidak muat dilewati
+        for cluster in clusters:
+            block = f"\nKANDIDAT {len(sent) + 1} (kemiripan {cluster.score:.2f}):\n" + "".join(
+                f"- [{item.instansi} | {item.field}] {item.text}\n" for item in cluster.items
+            )
+            tokens = estimate_tokens(block)
+            if used + tokens > budget:
+                continue
+            parts.append(block)
+            used += tokens
+            sent.append(cluster)
+        
+        # Tidak ada kandidat, tidak ada kelompok yang muat, atau hampir semua item mirip (data sedikit):
+        # ringkasan lengkap dipakai
+        use_candidates = bool(sent) and used < full_tokens
+        possible_pairs = cross_agency_pair_count(items)
+        stats = {
+            'total_item': len(items),
+            'pasangan_antar_instansi': possible_pairs,
+            'pasangan_kandidat': len(pairs),
+            'pemangkasan_pasangan': round(1 - len(pairs) / possible_pairs, 4) if possible_pairs else 0.0,
+            'kelompok_kandidat': len(clusters),
+            'kelompok_dikirim': len(sent),
+            'item_dikirim': sum(len(cluster.items) for cluster in sent) if use_candidates else len(items),
+            'ringkasan_lengkap_dipakai': not use_candidates,
+            'token_prompt_tanpa_penyaringan': full_tokens,
+            'token_prompt_dikirim': used if use_candidates else full_tokens,
+            'detik_penyaringan': round(time.perf_counter() - start, 4)
+        }
+        return ("".join(parts) if use_candidates else None), stats
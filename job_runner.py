@@ -0,0 +1,125 @@
+import copy
+import threading
+import time
+import traceback
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional
+
+# Modul ini tidak mengimpor streamlit: job berjalan di thread pool milik proses server,
+# halaman Streamlit hanya membaca snapshot job berdasarkan job id di session_state.
+
+JOB_QUEUED = 'antre'
+JOB_RUNNING = 'berjalan'
+JOB_DONE = 'selesai'
+JOB_FAILED = 'gagal'
+
+JOB_RETENTION_SECONDS = 6 * 60 * 60  # Job selesai disimpan selama ini agar hasilnya bisa dibuka ulang
+
+
+@dataclass
+class Job:
+    job_id: str
+    meta: Dict[str, Any] = field(default_factory=dict)  # Info ringkas untuk UI (jumlah instansi, model, ...)
+    status: str = JOB_QUEUED
+    phase: str = ''
+    state: Any = None  # Snapshot PipelineState terakhir
+    messages: List[tuple] = field(default_factory=list)  # (level, pesan) sejak job dimulai
+    result: Any = None
+    partial_result: Any = None  # Hasil sementara selama analisis masih berjalan (streaming)
+    error: str = ''
+    created: float = field(default_factory=time.time)
+    finished: Optional[float] = None
+
+
+class JobContext:
+    """Handle yang diterima fungsi job untuk melaporkan fase, status pipeline, dan pesan"""
+
+    def __init__(self, runner: 'JobRunner', job_id: str):
+        self._runner = runner
+        self.job_id = job_id
+
+    def set_phase(self, phase: str):
+        with self._runner._lock:
+            self._runner._jobs[self.job_id].phase = phase
+
+    def update_state(self, state):
+        """Callback on_update ExtractionScheduler: pindahkan pesan ke log job dan simpan snapshot"""
+        with self._runner._lock:
+            job = self._runner._jobs[self.job_id]
+            job.messages.extend(state.messages)
+            state.messages.clear()
+            job.state = copy.deepcopy(state)
+
+    def set_partial_result(self, partial_result):
+        with self._runner._lock:
+            self._runner._jobs[self.job_id].partial_result = partial_result
+
+    def notify(self, level: str, message: str):
+        """Notifier DocumentProcessor/GeminiAnalyzer selama job berjalan"""
+        with self._runner._lock:
+            self._runner._jobs[self.job_id].messages.append((level, message))
+
+
+class JobRunner:
+    """Tabel job dan thread pool lokal untuk analisis yang tidak terikat ke satu script run Streamlit"""
+
+    def __init__(self, max_workers: int):
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='sihati-job')
+        self._jobs: Dict[str, Job] = {}
+        self._lock = threading.Lock()
+
+    def submit(self, fn: Callable[..., Any], *args, meta: Optional[Dict[str, Any]] = None, **kwargs) -> str:
+        """Jadwalkan fn(context, *args, **kwargs) dan kembalikan job id"""
+        self._purge_expired()
+
+        job_id = uuid.uuid4().hex[:12]
+        with self._lock:
+            self._jobs[job_id] = Job(job_id=job_id, meta=meta or {})
+        self._executor.submit(self._run, job_id, fn, args, kwargs)
+        return job_id
+
+    def get(self, job_id: str) -> Optional[Job]:
+        """Snapshot job (salinan) agar UI bisa membaca tanpa bersaing dengan thread job"""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return None
+            snapshot = copy.copy(job)
+            snapshot.messages = list(job.messages)
+            return snapshot
+
+    def jobs(self) -> List[Job]:
+        with self._lock:
+            return [copy.copy(job) for job in self._jobs.values()]
+
+    def _run(self, job_id: str, fn: Callable[..., Any], args: tuple, kwargs: dict):
+        with self._lock:
+            self._jobs[job_id].status = JOB_RUNNING
+
+        try:
+            result = fn(JobContext(self, job_id), *args, **kwargs)
+        except Exception as e:
+            with self._lock:
+                job = self._jobs[job_id]
+                job.status = JOB_FAILED
+                job.error = f"{e}\n{traceback.format_exc()}"
+                job.finished = time.time()
+            return
+
+        with self._lock:
+            job = self._jobs[job_id]
+            job.result = result
+            job.status = JOB_DONE
+            job.finished = time.time()
+
+    def _purge_expired(self):
+        now = time.time()
+        with self._lock:
+            expired = [
+                job_id for job_id, job in self._jobs.items()
+                if job.finished is not None and now - job.finished > JOB_RETENTION_SECONDS
+            ]
+            for job_id in expired:
+                del self._jobs[job_id]
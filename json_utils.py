@@ -0,0 +1,243 @@
+import json
+import re
+from typing import Any, Dict, List, Optional, Tuple
+
+# Modul ini tidak mengimpor streamlit. Parser JSON inkremental untuk respons model yang di-stream:
+# field tingkat atas dan elemen array tingkat atas (mis. setiap item tumpang_tindih) tersedia
+# begitu selesai ditulis model, tanpa menunggu seluruh respons. parse_json_response toleran
+# terhadap pagar markdown, teks di sekitar JSON, dan JSON yang terpotong.
+
+WHITESPACE = ' \t\r\n'
+
+# Hasil parse_json_response
+PARSE_OK = 'ok'  # JSON valid apa adanya (setelah pagar markdown dibuang)
+PARSE_EXTRACTED = 'extracted'  # JSON valid diambil dari tengah teks lain
+PARSE_REPAIRED = 'repaired'  # JSON terpotong diperbaiki; bagian yang belum lengkap hilang
+
+FENCE_PATTERN = re.compile(r'```(?:json)?\s*(.*?)\s*(?:```|$)', re.DOTALL | re.IGNORECASE)
+MAX_REPAIR_ATTEMPTS = 20  # Titik potong yang dicoba dari belakang saat memperbaiki JSON terpotong
+
+
+def _safe_cut_points(text: str) -> List[Tuple[int, str]]:
+    """(posisi, penutup) di mana text[:posisi] + penutup adalah JSON lengkap secara struktur.
+
+    Titik aman: setelah kurung buka, setelah value selesai, dan sebelum koma.
+    """
+    points = []
+    stack: List[list] = []  # [kurung, menunggu_key]
+    in_string = False
+    escape = False
+    string_is_key = False
+
+    def closers() -> str:
+        return ''.join('}' if bracket == '{' else ']' for bracket, _ in reversed(stack))
+
+    for i, c in enumerate(text):
+        if in_string:
+            if escape:
+                escape = False
+            elif c == '\\':
+                escape = True
+            elif c == '"':
+                in_string = False
+                if not string_is_key and stack:
+                    points.append((i + 1, closers()))
+            continue
+
+        if c == '"':
+            in_string = True
+            string_is_key = bool(stack) and stack[-1][0] == '{' and stack[-1][1]
+        elif c in '{[':
+            stack.append([c, c == '{'])
+            points.append((i + 1, closers()))
+        elif c in '}]':
+            if not stack:
+                break
+            stack.pop()
+            if not stack:
+                points.append((i + 1, ''))
+                break
+            points.append((i + 1, closers()))
+        elif c == ',' and stack:
+            points.append((i, closers()))
+            if stack[-1][0] == '{':
+                stack[-1][1] = True
+        elif c == ':' and stack:
+            stack[-1][1] = False
+    return points
+
+
+def _json_start(text: str) -> int:
+    return min((i for i in (text.find('{'), text.find('[')) if i >= 0), default=-1)
+
+
+def repair_truncated_json(text: str) -> Any:
+    """Pulihkan JSON yang terpotong: buang bagian terakhir yang belum lengkap lalu tutup semua kurung"""
+    start = _json_start(text)
+    if start < 0:
+        raise ValueError("Tidak ada JSON di respons")
+    body = text[start:]
+    for end, closing in reversed(_safe_cut_points(body)[-MAX_REPAIR_ATTEMPTS:]):
+        try:
+            return json.loads(body[:end].rstrip().rstrip(',') + closing)
+        except ValueError:
+            continue
+    raise ValueError("JSON terpotong tidak dapat diperbaiki")
+
+
+def parse_json_response(text: str) -> Tuple[Any, str]:
+    """Parse respons model yang seharusnya JSON; kembalikan (data, PARSE_*).
+
+    Urutan: JSON utuh, isi pagar ```json, objek/array pertama di tengah teks (raw_decode),
+    lalu perbaikan JSON terpotong. ValueError jika semuanya gagal.
+    """
+    candidate = text.strip()
+    fence = FENCE_PATTERN.search(candidate)
+    if fence and candidate.startswith('```'):
+        candidate = fence.group(1)
+    try:
+        return json.loads(candidate), PARSE_OK
+    except ValueError:
+        pass
+
+    # Teks pengantar/penutup di sekitar JSON: mulai dari kurung buka pertama
+    start = _json_start(candidate)
+    if start < 0:
+        raise ValueError("Tidak ada JSON di respons")
+    try:
+        return json.JSONDecoder().raw_decode(candidate, start)[0], PARSE_EXTRACTED
+    except ValueError:
+        return repair_truncated_json(candidate[start:]), PARSE_REPAIRED
+
+
+class IncrementalJsonParser:
+    """Parser bertahap untuk satu objek JSON tingkat atas.
+
+    feed() menerima potongan teks (boleh diawali pagar ```json) dan mengembalikan True jika
+    ada field atau elemen array baru yang selesai. result berisi field yang sudah lengkap dan,
+    untuk array yang masih ditulis, elemen yang sudah lengkap sejauh ini.
+    """
+
+    def __init__(self):
+        self.result: Dict[str, Any] = {}
+        self.complete = False
+        self._text = ''
+        self._pos = 0
+        self._stack = []  # '{' / '[' yang masih terbuka
+        self._in_string = False
+        self._escape = False
+        self._expect_key = False  # Posisi di objek tingkat atas: menunggu key atau value
+        self._key_start: Optional[int] = None
+        self._key: Optional[str] = None
+        self._value_start: Optional[int] = None  # Awal value field tingkat atas
+        self._item_start: Optional[int] = None  # Awal elemen array tingkat atas
+
+    def feed(self, chunk: str) -> bool:
+        if self.complete or not chunk:
+            return False
+        self._text += chunk
+        changed = False
+        text = self._text
+
+        for i in range(self._pos, len(text)):
+            c = text[i]
+            depth = len(self._stack)
+
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif c == '\\':
+                    self._escape = True
+                elif c == '"':
+                    self._in_string = False
+                    if depth == 1 and self._key_start is not None:
+                        self._key = json.loads(text[self._key_start:i + 1])
+                        self._key_start = None
+                    elif depth == 1 and self._value_start is not None:
+                        changed |= self._finish_value(i + 1)
+                    elif self._in_top_array() and self._item_start is not None:
+                        changed |= self._finish_item(i + 1)
+                continue
+
+            if depth == 0:
+                # Teks sebelum objek tingkat atas (pagar markdown, spasi) diabaikan
+                if c == '{':
+                    self._stack.append('{')
+                    self._expect_key = True
+                continue
+
+            if c == '"':
+                self._in_string = True
+                if depth == 1 and self._expect_key:
+                    self._key_start = i
+                else:
+                    self._mark_value_start(i)
+            elif c in '{[':
+                self._mark_value_start(i)
+                if depth == 1 and c == '[':
+                    self.result[self._key] = []
+                self._stack.append(c)
+            elif c in '}]':
+                # Scalar terakhir sebelum kurung tutup
+                if depth == 1 and self._value_start is not None:
+                    changed |= self._finish_value(i)
+                elif self._in_top_array() and self._item_start is not None:
+                    changed |= self._finish_item(i)
+                self._stack.pop()
+                depth = len(self._stack)
+                if depth == 0:
+                    self.complete = True
+                    self._pos = i + 1
+                    return changed
+                if depth == 1 and self._value_start is not None:
+                    changed |= self._finish_value(i + 1)
+                elif self._in_top_array() and self._item_start is not None:
+                    changed |= self._finish_item(i + 1)
+            elif c == ',':
+                if depth == 1:
+                    if self._value_start is not None:
+                        changed |= self._finish_value(i)
+                    self._expect_key = True
+                elif self._in_top_array() and self._item_start is not None:
+                    changed |= self._finish_item(i)
+            elif c == ':':
+                if depth == 1:
+                    self._expect_key = False
+            elif c not in WHITESPACE:
+                # Awal angka/true/false/null
+                self._mark_value_start(i)
+
+        self._pos = len(text)
+        return changed
+
+    def _in_top_array(self) -> bool:
+        return len(self._stack) == 2 and self._stack[1] == '['
+
+    def _mark_value_start(self, i: int):
+        if len(self._stack) == 1 and not self._expect_key and self._value_start is None:
+            self._value_start = i
+        elif self._in_top_array() and self._item_start is None:
+            self._item_start = i
+
+    def _finish_value(self, end: int) -> bool:
+        raw = self._text[self._value_start:end].strip()
+        self._value_start = None
+        if self._key is None or not raw:
+            return False
+        try:
+            self.result[self._key] = json.loads(raw)
+        except ValueError:
+            return False
+        return True
+
+    def _finish_item(self, end: int) -> bool:
+        raw = self._text[self._item_start:end].strip()
+        self._item_start = None
+        if self._key is None or not raw:
+            return False
+        try:
+            item = json.loads(raw)
+        except ValueError:
+            return False
+        self.result.setdefault(self._key, []).append(item)
+        return True
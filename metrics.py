@@ -0,0 +1,139 @@
+import threading
+from typing import Any, Dict, Optional, Tuple
+
+from config import AVAILABLE_MODELS
+
+# Modul ini tidak mengimpor streamlit: metrik dikumpulkan di proses server/CLI dan
+# ditampilkan oleh UI (System Status) atau dicatat ke log oleh CLI.
+
+
+class LlmMetrics:
+    """Statistik panggilan model per proses: percobaan, retry, failover, latensi tambahan akibat retry,
+    hasil parse respons JSON, serta latensi, token, dan biaya per tahap routing model"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._models: Dict[str, Dict[str, float]] = {}
+        self._stages: Dict[Tuple[str, str], Dict[str, float]] = {}
+        self.fallbacks = 0
+        self.escalations: Dict[str, int] = {}  # Alasan eskalasi ekstraksi ke model kuat -> jumlah
+
+    def _model(self, model_name: str) -> Dict[str, float]:
+        return self._models.setdefault(model_name, {
+            'attempts': 0,
+            'successes': 0,
+            'failures': 0,
+            'retries': 0,
+            'throttled': 0,
+            'circuit_rejections': 0,
+            'success_seconds': 0.0,
+            'failed_attempt_seconds': 0.0,  # Waktu percobaan yang gagal lalu diulang/di-failover
+            'backoff_seconds': 0.0,  # Waktu tunggu backoff/pacing sebelum retry
+            'parse_ok': 0,
+            'parse_extracted': 0,  # JSON diambil dari tengah teks lain
+            'parse_repaired': 0,  # JSON terpotong yang berhasil diperbaiki
+            'parse_failed': 0,
+            'wasted_tokens': 0  # Perkiraan token respons yang terbuang karena gagal di-parse
+        })
+
+    def record_attempt(self, model_name: str, seconds: float, ok: bool, throttled: bool = False):
+        with self._lock:
+            model = self._model(model_name)
+            model['attempts'] += 1
+            if ok:
+                model['successes'] += 1
+                model['success_seconds'] += seconds
+            else:
+                model['failures'] += 1
+                model['failed_attempt_seconds'] += seconds
+                if throttled:
+                    model['throttled'] += 1
+
+    def record_retry(self, model_name: str, delay: float):
+        with self._lock:
+            model = self._model(model_name)
+            model['retries'] += 1
+            model['backoff_seconds'] += delay
+
+    def record_circuit_rejection(self, model_name: str):
+        with self._lock:
+            self._model(model_name)['circuit_rejections'] += 1
+
+    def record_parse(self, model_name: str, status: str, wasted_tokens: int = 0):
+        """status: 'ok', 'extracted', 'repaired' (lihat json_utils) atau 'failed'"""
+        with self._lock:
+            model = self._model(model_name)
+            model[f'parse_{status}'] += 1
+            model['wasted_tokens'] += wasted_tokens
+
+    def record_fallback(self):
+        with self._lock:
+            self.fallbacks += 1
+
+    def record_stage(self, stage: str, model_name: str, seconds: float,
+                     prompt_tokens: int = 0, output_tokens: int = 0, cached: bool = False):
+        """Satu permintaan tahap (ekstraksi, map, eskalasi, analisis_overlap) yang dilayani model_name.
+
+        seconds termasuk retry dan failover; token dari usage_metadata respons (0 untuk respons cache).
+        """
+        with self._lock:
+            entry = self._stages.setdefault((stage, model_name), {
+                'requests': 0,
+                'cache_hits': 0,
+                'seconds': 0.0,
+                'prompt_tokens': 0,
+                'output_tokens': 0
+            })
+            entry['requests'] += 1
+            entry['cache_hits'] += int(cached)
+            entry['seconds'] += seconds
+            entry['prompt_tokens'] += prompt_tokens
+            entry['output_tokens'] += output_tokens
+
+    def record_escalation(self, reason: str):
+        with self._lock:
+            self.escalations[reason] = self.escalations.get(reason, 0) + 1
+
+    def snapshot(self, model_name: Optional[str] = None) -> Dict[str, Any]:
+        """Ringkasan metrik; retry_overhead_seconds = waktu percobaan gagal + waktu tunggu backoff"""
+        with self._lock:
+            models = {name: dict(values) for name, values in self._models.items()
+                      if model_name is None or name == model_name}
+            fallbacks = self.fallbacks
+            stages = [(stage, name, dict(values)) for (stage, name), values in self._stages.items()
+                      if model_name is None or name == model_name]
+            escalations = dict(self.escalations)
+
+        for values in models.values():
+            values['retry_overhead_seconds'] = round(values['failed_attempt_seconds'] + values['backoff_seconds'], 3)
+            values['mean_success_seconds'] = round(
+                values['success_seconds'] / values['successes'], 3) if values['successes'] else 0.0
+            for key in ('success_seconds', 'failed_attempt_seconds', 'backoff_seconds'):
+                values[key] = round(values[key], 3)
+
+        # Biaya perkiraan dari harga per 1 juta token di AVAILABLE_MODELS
+        stage_rows = []
+        for stage, name, values in stages:
+            model_info = AVAILABLE_MODELS.get(name, {})
+            cost = (values['prompt_tokens'] * model_info.get('input_price', 0.0)
+                    + values['output_tokens'] * model_info.get('output_price', 0.0)) / 1_000_000
+            stage_rows.append({
+                'stage': stage,
+                'model': name,
+                **values,
+                'seconds': round(values['seconds'], 3),
+                'mean_seconds': round(values['seconds'] / values['requests'], 3) if values['requests'] else 0.0,
+                'cost_usd': round(cost, 6)
+            })
+
+        return {
+            'models': models,
+            'fallbacks': fallbacks,
+            'stages': stage_rows,
+            'escalations': escalations,
+            'total_cost_usd': round(sum(row['cost_usd'] for row in stage_rows), 6)
+        }
+
+
+# Metrik bersama untuk seluruh analyzer di proses ini
+llm_metrics = LlmMetrics()
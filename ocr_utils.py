@@ -0,0 +1,472 @@
+import hashlib
+import json
+import multiprocessing
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+import pytesseract
+from PIL import Image
+
+from cache_utils import DiskCache, get_cache, make_cache_key
+
+# Modul ini sengaja tidak mengimpor streamlit: fungsi-fungsinya dijalankan di
+# proses worker (spawn) yang tidak boleh ikut menjalankan script Streamlit.
+
+MAX_WORKER_DOCUMENTS = 4  # Jumlah dokumen terbuka (dimuat ke memori) yang disimpan per worker
+
+# Naikkan versi ini jika rasterisasi/OCR berubah agar hasil OCR lama tidak terpakai
+OCR_CACHE_VERSION = 2
+
+# Ambang klasifikasi text layer per halaman
+MIN_PAGE_TEXT_CHARS = 40  # Halaman dengan teks lebih pendek dianggap hasil scan
+MIN_VALID_CHAR_RATIO = 0.7  # Proporsi minimal karakter wajar (huruf, angka, tanda baca umum)
+MIN_WORDLIKE_RATIO = 0.5  # Proporsi minimal token yang menyerupai kata atau angka
+
+# Colorspace rasterisasi OCR -> mode PIL
+COLORSPACE_MODES = {
+    'gray': 'L',
+    'rgb': 'RGB',
+}
+
+# Deskew: rentang sudut (derajat) yang dicoba dan lebar gambar saat estimasi
+DESKEW_MAX_ANGLE = 5.0
+DESKEW_STEP = 0.5
+DESKEW_SAMPLE_WIDTH = 800
+
+DESKEW_MIN_GAIN = 1.05  # Sudut hanya dipakai jika variansi profil naik minimal 5% dibanding tanpa rotasi
+
+MIN_INK_RATIO = 0.001  # Halaman dengan piksel gelap lebih sedikit dianggap kosong (tidak perlu re-OCR)
+
+VALID_PUNCTUATION = set(".,;:()-/%'\"&")
+WORDLIKE_PATTERN = re.compile(r'^\(?([^\W\d_]{2,}|[\d.,%/-]+)[.,;:)]?$')
+
+_worker_documents: 'OrderedDict[str, object]' = OrderedDict()
+_thread_backends = threading.local()
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_workers = 0
+_pool_lock = threading.Lock()
+
+
+def default_ocr_workers() -> int:
+    """Jumlah worker OCR default: semua core yang tersedia untuk proses ini"""
+    try:
+        return max(1, len(os.sched_getaffinity(0)))
+    except AttributeError:
+        return max(1, os.cpu_count() or 1)
+
+
+def page_needs_ocr(page_text: str) -> bool:
+    """Tentukan apakah text layer satu halaman tidak layak pakai sehingga perlu OCR.
+
+    Halaman perlu OCR jika text layer kosong/sangat pendek (halaman scan atau
+    hanya berisi header), atau berisi teks "sampah" akibat font tanpa ToUnicode
+    map yang menghasilkan simbol acak alih-alih kata.
+    """
+    stripped = page_text.strip()
+    if len(stripped) < MIN_PAGE_TEXT_CHARS:
+        return True
+
+    valid_chars = sum(1 for ch in stripped if ch.isalnum() or ch.isspace() or ch in VALID_PUNCTUATION)
+    if valid_chars / len(stripped) < MIN_VALID_CHAR_RATIO:
+        return True
+
+    tokens = stripped.split()
+    wordlike = sum(1 for token in tokens if WORDLIKE_PATTERN.match(token))
+    return wordlike / len(tokens) < MIN_WORDLIKE_RATIO
+
+
+class OcrSettings(NamedTuple):
+    """Pengaturan OCR yang dikirim ke worker dan ikut menjadi bagian key cache"""
+    lang: str
+    dpi: int  # DPI mode tetap, atau DPI percobaan pertama pada mode adaptif
+    colorspace: str = 'gray'
+    backend: str = 'auto'
+    adaptive: bool = False
+    high_dpi: int = 300  # DPI render ulang untuk halaman dengan confidence rendah
+    min_confidence: float = 70.0  # Rata-rata confidence kata (0-100) minimal agar hasil pertama dipakai
+    binarize: bool = True  # Binarisasi Otsu sebelum OCR ulang
+    deskew: bool = True  # Luruskan halaman miring sebelum OCR ulang
+
+    def cache_parts(self) -> tuple:
+        """Komponen pengaturan yang memengaruhi hasil OCR (tanpa backend yang ditentukan per proses)"""
+        if not self.adaptive:
+            return (self.lang, self.dpi, self.colorspace)
+        return (self.lang, self.dpi, self.colorspace, 'adaptive', self.high_dpi,
+                self.min_confidence, self.binarize, self.deskew)
+
+
+class OcrPageResult(NamedTuple):
+    page_num: int
+    text: str
+    cache_hit: bool
+    seconds: float  # Waktu OCR; untuk cache hit berisi waktu OCR asli yang dihemat
+    confidence: Optional[float] = None  # Rata-rata confidence kata, None pada mode tetap
+    rerendered: bool = False  # True jika halaman di-OCR ulang pada DPI tinggi
+
+
+class OcrStats:
+    """Statistik OCR per halaman di proses utama (hasil worker dikirim balik lewat OcrPageResult)"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.rerendered = 0
+        self.ocr_seconds = 0.0
+        self.saved_seconds = 0.0
+
+    def record(self, result: OcrPageResult):
+        with self._lock:
+            if result.cache_hit:
+                self.hits += 1
+                self.saved_seconds += result.seconds
+            else:
+                self.misses += 1
+                self.ocr_seconds += result.seconds
+                self.rerendered += int(result.rerendered)
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / lookups, 3) if lookups else 0.0,
+                'rerendered_pages': self.rerendered,
+                'ocr_seconds': round(self.ocr_seconds, 1),
+                'saved_seconds': round(self.saved_seconds, 1)
+            }
+
+
+ocr_stats = OcrStats()
+
+
+def render_page_image(page, dpi: int, colorspace: str = 'gray') -> Image.Image:
+    """Render satu halaman PyMuPDF langsung menjadi PIL Image tanpa encode/decode PNG.
+
+    Sample pixmap disalin sekali ke bytes milik Python lalu dipakai langsung oleh
+    PIL (frombuffer). Memoryview pixmap tidak dipakai karena akan dilepas saat
+    pixmap dibebaskan, sementara image masih hidup.
+    """
+    import fitz  # PyMuPDF
+
+    mode = COLORSPACE_MODES[colorspace]
+    pix = page.get_pixmap(dpi=dpi, colorspace=fitz.csGRAY if mode == 'L' else fitz.csRGB, alpha=False)
+    image = Image.frombuffer(mode, (pix.width, pix.height), pix.samples, 'raw', mode, pix.stride, 1)
+
+    # pytesseract menyimpan image ke file sementara sesuai image.format;
+    # PPM/PGM tidak dikompresi sehingga tidak ada biaya encode PNG di sana
+    image.format = 'PPM'
+    return image
+
+
+class OcrBackend:
+    """Antarmuka engine OCR. Satu instance dipakai ulang untuk banyak halaman."""
+
+    name = 'base'
+
+    def __init__(self, lang: str):
+        self.lang = lang
+
+    def image_to_string(self, image: Image.Image) -> str:
+        raise NotImplementedError
+
+    def image_to_text_and_confidence(self, image: Image.Image) -> Tuple[str, List[float]]:
+        """Teks halaman beserta confidence (0-100) setiap kata yang dikenali"""
+        raise NotImplementedError
+
+
+class TesserocrBackend(OcrBackend):
+    """Tesseract in-process via tesserocr: model bahasa dimuat sekali, gambar dikirim dari memori"""
+
+    name = 'tesserocr'
+
+    def __init__(self, lang: str):
+        super().__init__(lang)
+        import tesserocr
+
+        tessdata_path = os.getenv('TESSDATA_PREFIX')
+        if tessdata_path:
+            self.api = tesserocr.PyTessBaseAPI(path=tessdata_path, lang=lang)
+        else:
+            self.api = tesserocr.PyTessBaseAPI(lang=lang)
+
+    def image_to_string(self, image: Image.Image) -> str:
+        self.api.SetImage(image)
+        return self.api.GetUTF8Text()
+
+    def image_to_text_and_confidence(self, image: Image.Image) -> Tuple[str, List[float]]:
+        self.api.SetImage(image)
+        text = self.api.GetUTF8Text()
+        return text, [float(conf) for conf in self.api.AllWordConfidences()]
+
+
+class PytesseractBackend(OcrBackend):
+    """Fallback: satu proses tesseract per halaman lewat pytesseract"""
+
+    name = 'pytesseract'
+
+    def image_to_string(self, image: Image.Image) -> str:
+        return pytesseract.image_to_string(image, lang=self.lang)
+
+    def image_to_text_and_confidence(self, image: Image.Image) -> Tuple[str, List[float]]:
+        # Satu pemanggilan tesseract (TSV); teks disusun ulang per baris dan paragraf
+        data = pytesseract.image_to_data(image, lang=self.lang, output_type=pytesseract.Output.DICT)
+        lines: Dict[tuple, List[str]] = {}
+        confidences = []
+        for i, word in enumerate(data['text']):
+            if not word.strip():
+                continue
+            line_key = (data['block_num'][i], data['par_num'][i], data['line_num'][i])
+            lines.setdefault(line_key, []).append(word)
+            conf = float(data['conf'][i])
+            if conf >= 0:
+                confidences.append(conf)
+
+        parts = []
+        previous_paragraph = None
+        for (block_num, par_num, _), words in lines.items():
+            if previous_paragraph is not None and (block_num, par_num) != previous_paragraph:
+                parts.append("")
+            previous_paragraph = (block_num, par_num)
+            parts.append(" ".join(words))
+        return "\n".join(parts), confidences
+
+
+OCR_BACKENDS = {
+    TesserocrBackend.name: TesserocrBackend,
+    PytesseractBackend.name: PytesseractBackend,
+}
+
+
+def get_ocr_backend(backend: str, lang: str) -> OcrBackend:
+    """Engine OCR berumur panjang per thread (dan per proses worker).
+
+    backend 'auto' memakai tesserocr jika tersedia, selain itu pytesseract.
+    PyTessBaseAPI tidak thread-safe, sehingga setiap thread memiliki engine sendiri.
+    """
+    engines = getattr(_thread_backends, 'engines', None)
+    if engines is None:
+        engines = _thread_backends.engines = {}
+
+    engine = engines.get((backend, lang))
+    if engine is not None:
+        return engine
+
+    if backend == 'auto':
+        try:
+            engine = TesserocrBackend(lang)
+        except Exception:
+            # tesserocr belum terpasang atau gagal memuat traineddata
+            engine = PytesseractBackend(lang)
+    else:
+        engine = OCR_BACKENDS[backend](lang)
+
+    engines[(backend, lang)] = engine
+    return engine
+
+
+def ocr_image(image: Image.Image, lang: str, backend: str = 'auto') -> str:
+    """OCR satu gambar halaman dengan engine OCR milik thread ini"""
+    return get_ocr_backend(backend, lang).image_to_string(image)
+
+
+def mean_confidence(confidences: List[float]) -> float:
+    return sum(confidences) / len(confidences) if confidences else 0.0
+
+
+def has_ink(image: Image.Image) -> bool:
+    """True jika halaman memiliki cukup piksel gelap (bukan halaman kosong)"""
+    histogram = image.convert('L').histogram()
+    return sum(histogram[:128]) / (image.width * image.height) >= MIN_INK_RATIO
+
+
+def binarize_image(image: Image.Image) -> Image.Image:
+    """Binarisasi dengan ambang Otsu; membantu fotokopi pudar dan latar belakang kusam"""
+    gray = image.convert('L')
+    histogram = np.asarray(gray.histogram(), dtype=np.float64)
+    total = histogram.sum()
+    levels = np.arange(256)
+
+    weight_background = np.cumsum(histogram)
+    weight_foreground = total - weight_background
+    cumulative_mean = np.cumsum(histogram * levels)
+    mean_background = cumulative_mean / np.maximum(weight_background, 1)
+    mean_foreground = (cumulative_mean[-1] - cumulative_mean) / np.maximum(weight_foreground, 1)
+    between_variance = weight_background * weight_foreground * (mean_background - mean_foreground) ** 2
+
+    threshold = int(np.argmax(between_variance))
+    binary = gray.point(lambda value: 255 if value > threshold else 0)
+    binary.format = 'PPM'
+    return binary
+
+
+def estimate_skew_angle(image: Image.Image) -> float:
+    """Perkirakan sudut miring halaman dengan projection profile (variansi jumlah tinta per baris)"""
+    gray = image.convert('L')
+    scale = min(1.0, DESKEW_SAMPLE_WIDTH / gray.width)
+    if scale < 1.0:
+        gray = gray.resize((int(gray.width * scale), int(gray.height * scale)))
+    # Tinta bernilai 255 agar area baru hasil rotasi (0) tidak terhitung sebagai tinta
+    inverted = gray.point(lambda value: 255 if value < 128 else 0)
+
+    def profile_score(angle: float) -> float:
+        rotated = np.asarray(inverted.rotate(angle, resample=Image.NEAREST), dtype=np.float32)
+        return float(np.var(rotated.sum(axis=1)))
+
+    baseline_score = profile_score(0.0)
+    best_angle, best_score = 0.0, baseline_score
+    steps = int(DESKEW_MAX_ANGLE / DESKEW_STEP)
+    for step in range(-steps, steps + 1):
+        angle = step * DESKEW_STEP
+        score = profile_score(angle) if step else baseline_score
+        if score > best_score:
+            best_angle, best_score = angle, score
+
+    # Halaman tanpa baris teks yang jelas (gambar, tabel kosong) tidak diputar
+    if best_score < baseline_score * DESKEW_MIN_GAIN:
+        return 0.0
+    return best_angle
+
+
+def deskew_image(image: Image.Image) -> Image.Image:
+    """Putar halaman agar baris teks horizontal; gambar asli dikembalikan jika tidak miring"""
+    angle = estimate_skew_angle(image)
+    if angle == 0.0:
+        return image
+    fill = 255 if image.mode == 'L' else (255, 255, 255)
+    rotated = image.rotate(angle, resample=Image.BICUBIC, expand=True, fillcolor=fill)
+    rotated.format = 'PPM'
+    return rotated
+
+
+def raster_hash(image: Image.Image) -> str:
+    """Hash exact raster halaman; halaman identik di dokumen berbeda menghasilkan raster yang sama"""
+    digest = hashlib.sha256(f"{image.mode}:{image.width}x{image.height}:".encode('ascii'))
+    digest.update(image.tobytes())
+    return digest.hexdigest()
+
+
+def _ocr_adaptive(page, image: Image.Image, settings: OcrSettings) -> Tuple[str, float, bool]:
+    """OCR pada DPI rendah; render ulang di DPI tinggi (opsional binarisasi/deskew) jika confidence rendah"""
+    engine = get_ocr_backend(settings.backend, settings.lang)
+    text, confidences = engine.image_to_text_and_confidence(image)
+    confidence = mean_confidence(confidences)
+
+    # Halaman kosong tidak akan membaik dengan resolusi lebih tinggi
+    if confidence >= settings.min_confidence or (not confidences and not has_ink(image)):
+        return text, confidence, False
+
+    high_image = render_page_image(page, settings.high_dpi, settings.colorspace)
+    if settings.deskew:
+        high_image = deskew_image(high_image)
+    if settings.binarize:
+        high_image = binarize_image(high_image)
+
+    high_text, high_confidences = engine.image_to_text_and_confidence(high_image)
+    high_confidence = mean_confidence(high_confidences)
+    if high_confidence >= confidence:
+        return high_text, high_confidence, True
+    return text, confidence, True
+
+
+def ocr_page(document, page_num: int, settings: OcrSettings,
+             cache: Optional[DiskCache] = None) -> OcrPageResult:
+    """Render dan OCR satu halaman, memakai cache OCR per raster halaman jika diberikan"""
+    page = document.load_page(page_num)
+    image = render_page_image(page, settings.dpi, settings.colorspace)
+
+    cache_key = None
+    if cache is not None:
+        engine_name = get_ocr_backend(settings.backend, settings.lang).name
+        cache_key = make_cache_key(OCR_CACHE_VERSION, raster_hash(image), engine_name, *settings.cache_parts())
+        cached = cache.get(cache_key)
+        if cached is not None:
+            entry = json.loads(cached)
+            return OcrPageResult(page_num, entry['text'], True, entry['seconds'], entry['confidence'])
+
+    start = time.perf_counter()
+    if settings.adaptive:
+        text, confidence, rerendered = _ocr_adaptive(page, image, settings)
+    else:
+        text, confidence, rerendered = ocr_image(image, settings.lang, settings.backend), None, False
+    seconds = time.perf_counter() - start
+
+    if cache_key is not None:
+        entry = {'text': text, 'seconds': seconds, 'confidence': confidence}
+        cache.set(cache_key, json.dumps(entry, ensure_ascii=False))
+
+    return OcrPageResult(page_num, text, False, seconds, confidence, rerendered)
+
+
+def _open_worker_document(pdf_path: str, document_key: Optional[str] = None):
+    """Buka dokumen sekali per worker dan simpan handle-nya untuk halaman berikutnya.
+
+    Handle disimpan dengan key isi dokumen (document_key, default path) karena path file
+    sementara bisa dipakai ulang untuk upload lain. Isi file dibaca ke memori sehingga worker
+    tidak menahan file tetap terbuka dan proses utama bisa menghapusnya (juga di Windows).
+    """
+    import fitz  # PyMuPDF
+
+    key = document_key or pdf_path
+    document = _worker_documents.get(key)
+    if document is not None:
+        _worker_documents.move_to_end(key)
+        return document
+
+    with open(pdf_path, 'rb') as f:
+        document = fitz.open(stream=f.read(), filetype='pdf')
+    _worker_documents[key] = document
+    while len(_worker_documents) > MAX_WORKER_DOCUMENTS:
+        _, stale_document = _worker_documents.popitem(last=False)
+        stale_document.close()
+    return document
+
+
+def ocr_page_worker(pdf_path: str, page_num: int, settings: OcrSettings, tesseract_cmd: Optional[str] = None,
+                    cache_path: Optional[str] = None, cache_max_bytes: int = 0,
+                    document_key: Optional[str] = None) -> OcrPageResult:
+    """Task process pool: render dan OCR satu halaman (dengan cache OCR per halaman jika cache_path diisi).
+
+    document_key: hash isi dokumen (PdfSource.document_key) untuk cache handle dokumen di worker.
+    """
+    if tesseract_cmd:
+        pytesseract.pytesseract.tesseract_cmd = tesseract_cmd
+
+    cache = get_cache(cache_path, cache_max_bytes) if cache_path else None
+    document = _open_worker_document(pdf_path, document_key)
+    return ocr_page(document, page_num, settings, cache)
+
+
+def get_ocr_pool(max_workers: int) -> ProcessPoolExecutor:
+    """Process pool OCR bersama untuk seluruh proses aplikasi (dibuat sekali, dipakai ulang)"""
+    global _pool, _pool_workers
+
+    with _pool_lock:
+        if _pool is None or _pool_workers != max_workers:
+            if _pool is not None:
+                _pool.shutdown(wait=False)
+            # spawn: jangan fork server Streamlit yang sedang menjalankan banyak thread
+            _pool = ProcessPoolExecutor(
+                max_workers=max_workers,
+                mp_context=multiprocessing.get_context('spawn')
+            )
+            _pool_workers = max_workers
+        return _pool
+
+
+def reset_ocr_pool():
+    """Buang pool yang rusak (mis. worker mati) agar dibuat ulang pada pemanggilan berikutnya"""
+    global _pool
+
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=False)
+            _pool = None
@@ -0,0 +1,231 @@
+import io
+import os
+import re
+import tempfile
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional
+
+from cache_utils import hash_file
+
+# Modul ini tidak mengimpor streamlit agar bisa dipakai oleh worker dan benchmark.
+
+# Asal teks satu halaman
+PAGE_SOURCE_TEXT = 'text'  # text layer PDF
+PAGE_SOURCE_OCR = 'ocr'  # hasil OCR
+PAGE_SOURCE_FAILED = 'gagal'  # OCR gagal, teks berisi text layer apa adanya (bisa kosong)
+
+DOCUMENT_SEPARATOR = '=' * 50
+
+# Penargetan halaman: bagian dokumen yang memuat TUPOKSI dan program/kegiatan
+SECTION_KEYWORDS = re.compile(
+    r'\b(tugas|fungsi|susunan\s+organisasi|kedudukan|program|kegiatan|sasaran)\b', re.IGNORECASE
+)
+HEADING_PATTERN = re.compile(r'^\s*(BAB\s+[IVXLC\d]+|Pasal\s+\d+)\b', re.IGNORECASE | re.MULTILINE)
+PROGRAM_TABLE_PATTERN = re.compile(r'\b(kode\s+)?program\b.*\bkegiatan\b', re.IGNORECASE)
+HEADING_WINDOW_CHARS = 300  # Jarak maksimal keyword setelah judul BAB/Pasal
+HEADING_WEIGHT = 5
+TABLE_WEIGHT = 3
+MAX_KEYWORD_HITS = 10  # Batas kontribusi keyword biasa per halaman
+MIN_PAGE_SCORE = 3  # Skor minimal agar halaman dianggap relevan dari text layer
+TOC_PAGE_SCORE = 1000  # Halaman dari bagian outline yang relevan selalu diprioritaskan
+CONTEXT_PAGES = 1  # Halaman lanjutan setelah halaman relevan (tabel/pasal berlanjut, halaman scan)
+
+
+@dataclass
+class PageRecord:
+    doc_name: str
+    page_number: int  # 1-based, sama dengan penanda "--- Halaman N ---"
+    source: str
+    text: str
+
+
+def join_page_records(records: Iterable[PageRecord]) -> str:
+    """Bentuk teks satu dokumen dari record halaman dengan penanda halaman (list-join)"""
+    parts = []
+    for record in records:
+        if record.text.strip():
+            parts.append(f"\n--- Halaman {record.page_number} ---\n{record.text}\n")
+    return "".join(parts)
+
+
+def build_combined_text(records: Iterable[PageRecord]) -> str:
+    """Bentuk teks gabungan beberapa dokumen dari aliran record halaman.
+
+    Header DOKUMEN disisipkan setiap kali nama dokumen berganti; teks hanya
+    dimaterialisasi sekali di akhir dengan str.join.
+    """
+    parts = []
+    current_doc = None
+    for record in records:
+        if not record.text.strip():
+            continue
+        if record.doc_name != current_doc:
+            current_doc = record.doc_name
+            parts.append(f"\n\n{DOCUMENT_SEPARATOR}\nDOKUMEN: {current_doc}\n{DOCUMENT_SEPARATOR}\n")
+        parts.append(f"\n--- Halaman {record.page_number} ---\n{record.text}\n")
+    return "".join(parts)
+
+
+def score_page_text(page_text: str) -> int:
+    """Skor relevansi text layer satu halaman terhadap TUPOKSI dan tabel program/kegiatan"""
+    keyword_hits = min(len(SECTION_KEYWORDS.findall(page_text)), MAX_KEYWORD_HITS)
+
+    heading_hits = 0
+    for match in HEADING_PATTERN.finditer(page_text):
+        if SECTION_KEYWORDS.search(page_text, match.end(), match.end() + HEADING_WINDOW_CHARS):
+            heading_hits += 1
+
+    table_hits = sum(1 for line in page_text.splitlines() if PROGRAM_TABLE_PATTERN.search(line))
+    return keyword_hits + HEADING_WEIGHT * heading_hits + TABLE_WEIGHT * min(table_hits, MAX_KEYWORD_HITS)
+
+
+def outline_page_scores(document) -> Dict[int, int]:
+    """Skor halaman (0-based) dari bagian outline/bookmark PDF yang judulnya relevan"""
+    toc = document.get_toc(simple=True)
+    scores = {}
+    for index, (level, title, page) in enumerate(toc):
+        if page < 1 or not SECTION_KEYWORDS.search(title):
+            continue
+
+        # Bagian berakhir sebelum entri berikutnya dengan level yang sama atau lebih tinggi
+        end_page = len(document)
+        for next_level, _, next_page in toc[index + 1:]:
+            if next_level <= level and next_page >= page:
+                end_page = max(page, next_page - 1)
+                break
+
+        for offset, page_num in enumerate(range(page - 1, min(end_page, len(document)))):
+            # Halaman awal bagian lebih diprioritaskan jika anggaran halaman terbatas
+            scores[page_num] = max(scores.get(page_num, 0), TOC_PAGE_SCORE - offset)
+    return scores
+
+
+def select_target_pages(document, page_texts: List[str], page_budget: int) -> Optional[List[int]]:
+    """Pilih halaman yang relevan untuk diekstrak/OCR, maksimal page_budget halaman.
+
+    Pre-pass murah: outline PDF dan keyword pada text layer (BAB/Pasal tentang tugas,
+    fungsi, susunan organisasi; tabel program/kegiatan). Mengembalikan None jika seluruh
+    halaman muat dalam anggaran. Jika tidak ada petunjuk sama sekali (mis. scan tanpa
+    outline), halaman awal dokumen yang dipakai.
+    """
+    page_count = len(page_texts)
+    if page_budget <= 0 or page_count <= page_budget:
+        return None
+
+    try:
+        scores = outline_page_scores(document)
+    except Exception:
+        # Outline rusak tidak boleh menggagalkan ekstraksi
+        scores = {}
+
+    for page_num, page_text in enumerate(page_texts):
+        score = score_page_text(page_text)
+        if score < MIN_PAGE_SCORE:
+            continue
+        scores[page_num] = max(scores.get(page_num, 0), score)
+        for context_num in range(page_num + 1, min(page_num + 1 + CONTEXT_PAGES, page_count)):
+            # Halaman lanjutan mendapat skor lebih rendah dari halaman relevan
+            scores.setdefault(context_num, 1)
+
+    if not scores:
+        return list(range(page_budget))
+
+    ranked = sorted(scores, key=lambda page_num: (-scores[page_num], page_num))
+    return sorted(ranked[:page_budget])
+
+
+def get_file_path(pdf_file) -> Optional[str]:
+    """Path file di disk jika input berupa path atau file yang dibuka dari disk"""
+    if isinstance(pdf_file, (str, os.PathLike)):
+        return os.fspath(pdf_file)
+
+    # UploadedFile / BytesIO juga punya atribut fileno (raise saat dipanggil) dan .name berupa nama file
+    # saja; path hanya dipakai untuk file yang benar-benar dibuka dari disk, selain itu lewat bytes.
+    name = getattr(pdf_file, 'name', None)
+    if not isinstance(name, str) or not os.path.isfile(name):
+        return None
+    if isinstance(pdf_file, (io.BufferedReader, io.FileIO)):
+        return name
+    try:
+        pdf_file.fileno()
+    except (AttributeError, OSError, ValueError):
+        return None
+    return name
+
+
+def open_pdf_document(pdf_file):
+    """Buka PDF dengan PyMuPDF tanpa menyalin isi file ke bytes object baru.
+
+    - Path / file di disk: MuPDF membaca langsung dari file.
+    - UploadedFile / BytesIO: dibuka dari memoryview buffer internal (zero-copy).
+    Raise ImportError jika PyMuPDF tidak tersedia.
+    """
+    import fitz  # PyMuPDF
+
+    file_path = get_file_path(pdf_file)
+    if file_path:
+        return fitz.open(file_path)
+
+    if hasattr(pdf_file, 'getbuffer'):
+        return fitz.open(stream=pdf_file.getbuffer(), filetype="pdf")
+
+    pdf_file.seek(0)
+    return fitz.open(stream=pdf_file.read(), filetype="pdf")
+
+
+class PdfSource:
+    """Satu handle PyMuPDF per dokumen untuk text layer maupun rasterisasi halaman.
+
+    Worker OCR paralel membutuhkan path file; untuk upload di memori, buffer
+    ditulis sekali ke file sementara (langsung dari memoryview) saat dibutuhkan.
+    """
+
+    def __init__(self, pdf_file):
+        self.pdf_file = pdf_file
+        self.document = open_pdf_document(pdf_file)
+        self._temp_path: Optional[str] = None
+        self._document_key: Optional[str] = None
+
+    @property
+    def page_count(self) -> int:
+        return len(self.document)
+
+    def page_texts(self) -> List[str]:
+        """Text layer seluruh halaman, diambil dari handle yang sama"""
+        return [self.document.load_page(page_num).get_text() for page_num in range(self.page_count)]
+
+    def path(self) -> str:
+        """Path file PDF yang bisa dibuka proses lain"""
+        file_path = get_file_path(self.pdf_file)
+        if file_path:
+            return file_path
+
+        if self._temp_path is None:
+            with tempfile.NamedTemporaryFile(suffix='.pdf', delete=False) as tmp_file:
+                if hasattr(self.pdf_file, 'getbuffer'):
+                    with self.pdf_file.getbuffer() as buffer:
+                        tmp_file.write(buffer)
+                else:
+                    self.document.save(tmp_file)
+                self._temp_path = tmp_file.name
+
+        return self._temp_path
+
+    def document_key(self) -> str:
+        """Hash isi file di path(); key handle dokumen di worker OCR agar path yang dipakai ulang
+        (file sementara, file yang diubah) tidak membaca dokumen lama"""
+        if self._document_key is None:
+            self._document_key = hash_file(self.path())
+        return self._document_key
+
+    def close(self):
+        self.document.close()
+        if self._temp_path is not None:
+            os.remove(self._temp_path)
+            self._temp_path = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
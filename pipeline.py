@@ -0,0 +1,268 @@
+import asyncio
+import queue
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from dataclasses import dataclass, field, replace
+from typing import Any, Callable, Dict, List, Optional
+
+from async_utils import run_async
+from dedup_utils import DuplicateGroup, shared_file_map
+
+# Modul ini tidak mengimpor streamlit: UI menerima status lewat callback on_update
+# yang selalu dipanggil di thread pemanggil run().
+
+# Status file
+FILE_WAITING = 'menunggu'
+FILE_EXTRACTING = 'ekstraksi'
+FILE_OCR = 'ocr'
+FILE_DONE = 'selesai'
+FILE_FAILED = 'gagal'
+
+# Status instansi
+AGENCY_WAITING = 'menunggu'
+AGENCY_EXTRACTING = 'ekstraksi'
+AGENCY_ANALYZING = 'analisis_ai'
+AGENCY_DONE = 'selesai'
+AGENCY_FAILED = 'gagal'
+
+
+@dataclass
+class FileStatus:
+    name: str
+    status: str = FILE_WAITING
+    progress: float = 0.0
+    duplicate_of: str = ''  # Label file canonical jika hasil ekstraksinya dipakai bersama
+
+
+@dataclass
+class AgencyStatus:
+    nama: str
+    files: List[FileStatus]
+    status: str = AGENCY_WAITING
+
+
+@dataclass
+class PipelineState:
+    agencies: Dict[Any, AgencyStatus]
+    messages: List[tuple] = field(default_factory=list)  # (level, pesan) yang belum ditampilkan
+
+
+class ExtractionScheduler:
+    """Ekstraksi semua file semua instansi secara bersamaan dengan pool worker terbatas.
+
+    Ekstraksi Gemini untuk satu instansi dimulai segera setelah semua file instansi
+    tersebut selesai diekstrak, sehingga OCR instansi lain tetap berjalan paralel
+    dengan panggilan LLM. Panggilan LLM berjalan async di event loop bersama (lihat
+    async_utils): maksimal llm_workers per run, dan dibatasi lagi oleh limiter model
+    yang berlaku lintas run. File duplikat (lihat dedup_utils) hanya diekstrak sekali dan
+    hasilnya dibagikan ke setiap instansi yang mengunggahnya.
+    """
+
+    def __init__(self, doc_processor, analyzer, file_workers: int, llm_workers: int):
+        self.doc_processor = doc_processor
+        self.analyzer = analyzer
+        self.file_workers = file_workers
+        self.llm_workers = llm_workers
+        self._events: 'queue.Queue[tuple]' = queue.Queue()
+
+    def run(self, uploaded_files_data: Dict[Any, dict],
+            on_update: Optional[Callable[[PipelineState], None]] = None,
+            duplicate_groups: Optional[List[DuplicateGroup]] = None,
+            on_result: Optional[Callable[[Any, Any], None]] = None) -> List[Any]:
+        """Jalankan seluruh ekstraksi; kembalikan InstansiData yang berhasil sesuai urutan input.
+
+        on_result(key, instansi_data) dipanggil di thread pemanggil begitu satu instansi selesai.
+        """
+        state = PipelineState(agencies={
+            key: AgencyStatus(nama=data['nama'], files=[FileStatus(name) for name in data['file_names']])
+            for key, data in uploaded_files_data.items()
+        })
+
+        # File duplikat mengikuti event file canonical-nya
+        shared = shared_file_map(duplicate_groups or [])
+        followers: Dict[tuple, List[tuple]] = {}
+        for (key, index), (canonical_key, canonical_index) in shared.items():
+            followers.setdefault((canonical_key, canonical_index), []).append((key, index))
+            canonical_data = uploaded_files_data[canonical_key]
+            state.agencies[key].files[index].duplicate_of = \
+                f"{canonical_data['file_names'][canonical_index]} ({canonical_data['nama']})"
+
+        # Record halaman per file; teks gabungan baru dibentuk saat instansi siap dianalisis
+        documents = {key: [None] * len(data['files']) for key, data in uploaded_files_data.items()}
+        pending_files = {key: len(data['files']) for key, data in uploaded_files_data.items()}
+        results = {}
+        remaining_agencies = len(uploaded_files_data)
+
+        # Instansi tanpa file tidak akan pernah menerima event; langsung dianggap gagal
+        for key, count in pending_files.items():
+            if not count:
+                state.agencies[key].status = AGENCY_FAILED
+                remaining_agencies -= 1
+                state.messages.append(('error', f"❌ Tidak ada dokumen untuk {state.agencies[key].nama}"))
+
+        # Batas panggilan LLM bersamaan untuk run ini; terikat ke event loop saat pertama dipakai
+        llm_semaphore = asyncio.Semaphore(self.llm_workers)
+
+        with ThreadPoolExecutor(max_workers=self.file_workers) as file_pool, \
+                self._capture_notifications():
+
+            for key, data in uploaded_files_data.items():
+                for index, (pdf_file, name) in enumerate(zip(data['files'], data['file_names'])):
+                    if (key, index) not in shared:
+                        file_pool.submit(self._extract_file, key, index, pdf_file, name)
+
+            if on_update:
+                on_update(state)
+
+            while remaining_agencies:
+                # Kumpulkan semua event yang sudah antre agar UI tidak digambar ulang per halaman
+                events = [self._events.get()]
+                while True:
+                    try:
+                        events.append(self._events.get_nowait())
+                    except queue.Empty:
+                        break
+
+                for event in events:
+                    kind = event[0]
+
+                    if kind == 'file':
+                        _, source_key, source_index, status, progress, records = event
+                        targets = [(source_key, source_index)] + followers.get((source_key, source_index), [])
+
+                        for key, index in targets:
+                            agency = state.agencies[key]
+                            agency.files[index].status = status
+                            agency.files[index].progress = progress
+                            if agency.status == AGENCY_WAITING:
+                                agency.status = AGENCY_EXTRACTING
+
+                            if status not in (FILE_DONE, FILE_FAILED):
+                                continue
+
+                            data = uploaded_files_data[key]
+                            if records is not None and (key, index) != (source_key, source_index):
+                                # Teks dipakai bersama; hanya nama dokumen yang disesuaikan
+                                name = data['file_names'][index]
+                                documents[key][index] = [replace(record, doc_name=name) for record in records]
+                            else:
+                                documents[key][index] = records
+                            pending_files[key] -= 1
+                            if pending_files[key]:
+                                continue
+
+                            combined_text = self.doc_processor.combine_documents(documents[key], data['file_names'])
+                            documents[key] = None
+                            if combined_text:
+                                agency.status = AGENCY_ANALYZING
+                                run_async(self._extract_agency(key, combined_text, data, llm_semaphore))
+                            else:
+                                agency.status = AGENCY_FAILED
+                                remaining_agencies -= 1
+                                state.messages.append(('error', f"❌ Gagal mengekstrak teks dari dokumen {agency.nama}"))
+
+                    elif kind == 'agency':
+                        _, key, status, instansi_data = event
+                        state.agencies[key].status = status
+                        if status == AGENCY_DONE:
+                            results[key] = instansi_data
+                            if on_result:
+                                on_result(key, instansi_data)
+                        remaining_agencies -= 1
+
+                    elif kind == 'message':
+                        _, level, message = event
+                        state.messages.append((level, message))
+
+                if on_update:
+                    on_update(state)
+
+        return [results[key] for key in uploaded_files_data if key in results]
+
+    def _extract_file(self, key, index: int, pdf_file, name: str):
+        """Worker: ekstrak record halaman satu file dan laporkan progress per halaman OCR"""
+        self._events.put(('file', key, index, FILE_EXTRACTING, 0.0, None))
+
+        def report_page_progress(done: int, total: int):
+            self._events.put(('file', key, index, FILE_OCR, done / total, None))
+
+        records = None
+        try:
+            records = list(self.doc_processor.iter_pages(pdf_file, name, report_page_progress))
+        except Exception:
+            # Detail error sudah dilaporkan lewat notifier; combine_documents memberi peringatan per file
+            pass
+        finally:
+            # Event selesai selalu dikirim agar run() tidak menunggu file ini selamanya
+            status = FILE_DONE if records and any(record.text.strip() for record in records) else FILE_FAILED
+            self._events.put(('file', key, index, status, 1.0, records))
+
+    async def _extract_agency(self, key, combined_text: str, data: dict, llm_semaphore: asyncio.Semaphore):
+        """Coroutine: ekstraksi data terstruktur satu instansi dengan Gemini; hasil dikirim begitu selesai"""
+        status, instansi_data = AGENCY_FAILED, None
+        try:
+            async with llm_semaphore:
+                instansi_data = await self.analyzer.extract_instansi_data_async(
+                    combined_text, data['nama'], data['file_names']
+                )
+            status = AGENCY_DONE
+        except Exception as e:
+            self._post_message('error', f"❌ Gagal menganalisis {data['nama']}: {e}")
+        finally:
+            # Juga saat dibatalkan (CancelledError): run() menunggu event ini untuk setiap instansi
+            self._events.put(('agency', key, status, instansi_data))
+
+    def _post_message(self, level: str, message: str):
+        self._events.put(('message', level, message))
+
+    @contextmanager
+    def _capture_notifications(self):
+        """Alihkan pesan processor/analyzer ke antrean event selama worker berjalan"""
+        components = (self.doc_processor, self.analyzer)
+        saved_notifiers = [component.notifier for component in components]
+        for component in components:
+            component.notifier = self._post_message
+        try:
+            yield
+        finally:
+            for component, notifier in zip(components, saved_notifiers):
+                component.notifier = notifier
+
+
+# Fase analisis lengkap (ekstraksi + tumpang tindih)
+PHASE_EXTRACTION = 'ekstraksi'
+PHASE_OVERLAP = 'analisis_tumpang_tindih'
+
+
+def run_overlap_analysis(doc_processor, analyzer, uploaded_files_data: Dict[Any, dict],
+                         file_workers: int, llm_workers: int,
+                         duplicate_groups: Optional[List[DuplicateGroup]] = None,
+                         on_update: Optional[Callable[[PipelineState], None]] = None,
+                         on_phase: Optional[Callable[[str], None]] = None,
+                         on_partial: Optional[Callable[[Dict[str, Any]], None]] = None) -> Dict[str, Any]:
+    """Ekstraksi semua instansi lalu analisis tumpang tindih.
+
+    Mengembalikan dict instansi_list, overlap_analysis (None jika kurang dari 2 instansi
+    berhasil diekstrak), dan model_name. on_partial menerima dict yang sama dengan
+    overlap_analysis sementara selama respons analisis di-stream.
+    """
+    if on_phase:
+        on_phase(PHASE_EXTRACTION)
+    scheduler = ExtractionScheduler(doc_processor, analyzer, file_workers, llm_workers)
+    instansi_list = scheduler.run(uploaded_files_data, on_update, duplicate_groups)
+
+    overlap_analysis = None
+    if len(instansi_list) >= 2:
+        if on_phase:
+            on_phase(PHASE_OVERLAP)
+
+        def report_partial(partial: Dict[str, Any]):
+            on_partial({'instansi_list': instansi_list, 'overlap_analysis': partial, 'model_name': analyzer.model_name})
+
+        overlap_analysis = analyzer.analyze_overlaps(instansi_list, on_partial=report_partial if on_partial else None)
+
+    return {
+        'instansi_list': instansi_list,
+        'overlap_analysis': overlap_analysis,
+        'model_name': analyzer.model_name
+    }
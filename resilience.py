@@ -0,0 +1,223 @@
+import asyncio
+import os
+import random
+import re
+import threading
+import time
+from typing import Any, Awaitable, Callable, Dict, NamedTuple, Optional
+
+from async_utils import get_model_limiter
+from config import Config
+from metrics import llm_metrics
+
+# Modul ini tidak mengimpor streamlit. Lapisan panggilan model: retry dengan exponential
+# backoff + jitter, pacing saat kuota habis (429), dan circuit breaker per model.
+
+RETRYABLE_STATUS_CODES = (429, 500, 502, 503, 504)
+THROTTLED_STATUS_CODE = 429
+RETRY_HINT_PATTERN = re.compile(r'retry in\s+([\d.]+)\s*s', re.IGNORECASE)  # "Please retry in 12.5s"
+
+_breakers: Dict[str, 'CircuitBreaker'] = {}
+_breakers_lock = threading.Lock()
+
+
+class CircuitOpenError(Exception):
+    """Model sedang diistirahatkan karena terlalu banyak kegagalan beruntun"""
+
+    def __init__(self, model_name: str, retry_after: float):
+        super().__init__(f"Circuit breaker {model_name} terbuka, coba lagi dalam {retry_after:.0f} detik")
+        self.model_name = model_name
+        self.retry_after = retry_after
+
+
+class RetryPolicy(NamedTuple):
+    max_attempts: int = 4
+    base_delay: float = 1.0
+    max_delay: float = 30.0
+
+    @classmethod
+    def from_env(cls) -> 'RetryPolicy':
+        return cls(
+            max_attempts=int(os.getenv('LLM_MAX_ATTEMPTS', Config.LLM_MAX_ATTEMPTS)),
+            base_delay=float(os.getenv('LLM_BACKOFF_BASE_SECONDS', Config.LLM_BACKOFF_BASE_SECONDS)),
+            max_delay=float(os.getenv('LLM_BACKOFF_MAX_SECONDS', Config.LLM_BACKOFF_MAX_SECONDS))
+        )
+
+
+class CircuitBreaker:
+    """Circuit breaker sederhana: terbuka setelah failure_threshold kegagalan beruntun.
+
+    Setelah reset_seconds satu panggilan percobaan (half-open) diizinkan; berhasil menutup
+    kembali circuit, gagal membukanya lagi.
+    """
+
+    def __init__(self, failure_threshold: int, reset_seconds: float):
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self._probing = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if self.opened_at is None:
+                return 'closed'
+            return 'half_open' if self._probing else 'open'
+
+    def retry_after(self) -> float:
+        with self._lock:
+            if self.opened_at is None:
+                return 0.0
+            return max(0.0, self.opened_at + self.reset_seconds - time.monotonic())
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self.opened_at is None:
+                return True
+            if not self._probing and time.monotonic() - self.opened_at >= self.reset_seconds:
+                self._probing = True
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self._probing = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self._probing or self.failures >= self.failure_threshold:
+                self.opened_at = time.monotonic()
+                self._probing = False
+
+
+def get_circuit_breaker(model_name: str) -> CircuitBreaker:
+    """Circuit breaker bersama per model untuk seluruh analyzer di proses ini"""
+    with _breakers_lock:
+        breaker = _breakers.get(model_name)
+        if breaker is None:
+            breaker = CircuitBreaker(
+                int(os.getenv('LLM_BREAKER_FAILURES', Config.LLM_BREAKER_FAILURES)),
+                float(os.getenv('LLM_BREAKER_RESET_SECONDS', Config.LLM_BREAKER_RESET_SECONDS))
+            )
+            _breakers[model_name] = breaker
+        return breaker
+
+
+def circuit_states() -> Dict[str, str]:
+    with _breakers_lock:
+        breakers = dict(_breakers)
+    return {model_name: breaker.state for model_name, breaker in breakers.items()}
+
+
+def error_status(error: Exception) -> Optional[int]:
+    """Kode status HTTP dari exception google.api_core (juga untuk transport gRPC)"""
+    code = getattr(error, 'code', None)
+    return code if isinstance(code, int) else None
+
+
+def is_throttled(error: Exception) -> bool:
+    return error_status(error) == THROTTLED_STATUS_CODE
+
+
+def is_retryable(error: Exception) -> bool:
+    return error_status(error) in RETRYABLE_STATUS_CODES or isinstance(error, (ConnectionError, TimeoutError))
+
+
+def backoff_delay(attempt: int, policy: RetryPolicy, error: Optional[Exception] = None) -> float:
+    """Exponential backoff dengan full jitter; untuk 429, jeda yang diminta server dihormati"""
+    delay = random.uniform(0, min(policy.max_delay, policy.base_delay * 2 ** attempt))
+    if error is not None and is_throttled(error):
+        hint = RETRY_HINT_PATTERN.search(str(error))
+        if hint:
+            delay = max(delay, min(float(hint.group(1)), policy.max_delay))
+    return delay
+
+
+def _check_circuit(model_name: str, breaker: CircuitBreaker):
+    if not breaker.allow():
+        llm_metrics.record_circuit_rejection(model_name)
+        raise CircuitOpenError(model_name, breaker.retry_after())
+
+
+def _retry_delay(model_name: str, error: Exception, attempt: int, seconds: float, policy: RetryPolicy,
+                 breaker: CircuitBreaker, fail_fast_on_throttle: bool) -> Optional[float]:
+    """Catat percobaan gagal; kembalikan jeda sebelum retry, atau None jika error harus diteruskan"""
+    throttled = is_throttled(error)
+    llm_metrics.record_attempt(model_name, seconds, ok=False, throttled=throttled)
+
+    if not is_retryable(error):
+        # Error permintaan (mis. 400) bukan tanda model bermasalah
+        breaker.record_success()
+        return None
+
+    breaker.record_failure()
+    delay = backoff_delay(attempt, policy, error)
+    if throttled:
+        # Pacing: semua panggilan model ini menunggu, bukan hanya percobaan ini
+        get_model_limiter(model_name).pause(delay)
+    if attempt + 1 >= policy.max_attempts or (throttled and fail_fast_on_throttle):
+        return None
+
+    llm_metrics.record_retry(model_name, delay)
+    return delay
+
+
+def call_with_retry(fn: Callable[[], Any], model_name: str, policy: Optional[RetryPolicy] = None,
+                    fail_fast_on_throttle: bool = False) -> Any:
+    """Panggil fn() dengan retry untuk error sementara (429/5xx/timeout).
+
+    fail_fast_on_throttle: langsung teruskan error 429 agar pemanggil bisa beralih ke model cadangan.
+    """
+    policy = policy or RetryPolicy.from_env()
+    breaker = get_circuit_breaker(model_name)
+
+    for attempt in range(policy.max_attempts):
+        _check_circuit(model_name, breaker)
+        pause = get_model_limiter(model_name).pause_remaining()
+        if pause > 0:
+            time.sleep(pause)
+
+        start = time.perf_counter()
+        try:
+            result = fn()
+        except Exception as e:
+            delay = _retry_delay(model_name, e, attempt, time.perf_counter() - start, policy, breaker,
+                                 fail_fast_on_throttle)
+            if delay is None:
+                raise
+            time.sleep(delay)
+            continue
+
+        breaker.record_success()
+        llm_metrics.record_attempt(model_name, time.perf_counter() - start, ok=True)
+        return result
+
+
+async def call_with_retry_async(fn: Callable[[], Awaitable[Any]], model_name: str,
+                                policy: Optional[RetryPolicy] = None, fail_fast_on_throttle: bool = False) -> Any:
+    """Versi async call_with_retry; jeda pacing model ditangani limiter model di dalam fn"""
+    policy = policy or RetryPolicy.from_env()
+    breaker = get_circuit_breaker(model_name)
+
+    for attempt in range(policy.max_attempts):
+        _check_circuit(model_name, breaker)
+
+        start = time.perf_counter()
+        try:
+            result = await fn()
+        except Exception as e:
+            delay = _retry_delay(model_name, e, attempt, time.perf_counter() - start, policy, breaker,
+                                 fail_fast_on_throttle)
+            if delay is None:
+                raise
+            await asyncio.sleep(delay)
+            continue
+
+        breaker.record_success()
+        llm_metrics.record_attempt(model_name, time.perf_counter() - start, ok=True)
+        return result
@@ -0,0 +1,251 @@
+import os
+import re
+from collections import Counter
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+from scipy import sparse
+
+from config import Config
+
+# Modul ini tidak mengimpor streamlit. Similarity leksikal lokal antar item tugas/fungsi/program
+# instansi: setiap item menjadi vektor TF-IDF n-gram karakter (sparse, ternormalisasi L2), lalu
+# cosine similarity semua pasangan dihitung sebagai perkalian matriks sparse per blok baris.
+# Deterministik dan tanpa panggilan API; toleran terhadap imbuhan, singkatan, dan salah ketik OCR.
+
+NGRAM_SIZE = 3  # Panjang n-gram karakter, dihitung per kata yang diberi spasi di kedua sisi
+BLOCK_ROWS = 1024  # Baris per blok perkalian matriks, membatasi memori matriks similarity
+MAX_CLUSTER_ITEMS = 12  # Batas item per kelompok kandidat agar rantai kemiripan lemah tidak menyatu
+ITEM_FIELDS = ('tugas_pokok', 'fungsi', 'program', 'kegiatan', 'target_sasaran')
+
+ITEM_PREFIX_PATTERN = re.compile(r'^\s*(\d+[.)]|[a-z][.)]|[-*•])\s+', re.IGNORECASE)  # "1.", "a)", "-"
+NON_WORD_PATTERN = re.compile(r'[^\w\s]')
+
+
+@dataclass
+class SimilarItem:
+    instansi: str
+    field: str
+    text: str
+
+
+@dataclass
+class CandidatePair:
+    """Dua item dari instansi berbeda yang cukup mirip untuk dicurigai tumpang tindih"""
+    item_a: SimilarItem
+    item_b: SimilarItem
+    score: float  # Cosine similarity TF-IDF n-gram karakter, 0-1
+
+
+@dataclass
+class CandidateCluster:
+    """Item dari beberapa instansi yang saling mirip, dikirim ke model sebagai satu kandidat tumpang tindih"""
+    items: List[SimilarItem]
+    score: float  # Similarity pasangan tertinggi di kelompok
+
+    @property
+    def instansi(self) -> List[str]:
+        return list(dict.fromkeys(item.instansi for item in self.items))
+
+
+def normalize_item(text: str) -> str:
+    """Huruf kecil tanpa penomoran di awal dan tanda baca"""
+    text = ITEM_PREFIX_PATTERN.sub('', str(text))
+    return ' '.join(NON_WORD_PATTERN.sub(' ', text.lower()).split())
+
+
+def unique_items(items: Iterable[Any]) -> List[str]:
+    """Item pertama untuk setiap bentuk ternormalisasi, tanpa item kosong; urutan tetap"""
+    unique: Dict[str, str] = {}
+    for item in items or []:
+        unique.setdefault(normalize_item(item), str(item).strip())
+    unique.pop('', None)
+    return list(unique.values())
+
+
+def char_ngrams(text: str, n: int = NGRAM_SIZE) -> List[str]:
+    """N-gram karakter per kata (" kebijakan " -> " ke", "keb", ...); kata pendek menjadi satu n-gram"""
+    grams = []
+    for word in text.split():
+        padded = f' {word} '
+        if len(padded) <= n:
+            grams.append(padded)
+        else:
+            grams.extend(padded[i:i + n] for i in range(len(padded) - n + 1))
+    return grams
+
+
+def tfidf_matrix(texts: Sequence[str], n: int = NGRAM_SIZE, use_idf: bool = True) -> sparse.csr_matrix:
+    """Matriks TF-IDF n-gram karakter (satu baris per teks), setiap baris ternormalisasi L2.
+
+    TF sublinear (1 + log frekuensi). IDF dihitung dari texts itu sendiri sehingga n-gram yang
+    ada di hampir semua item (mis. " pe", "an ") berbobot kecil.
+    """
+    vocabulary: Dict[str, int] = {}
+    indices: List[int] = []
+    indptr = [0]
+    for text in texts:
+        indices.extend(vocabulary.setdefault(gram, len(vocabulary)) for gram in char_ngrams(normalize_item(text), n))
+        indptr.append(len(indices))
+
+    matrix = sparse.csr_matrix(
+        (np.ones(len(indices)), np.array(indices, dtype=np.int64), np.array(indptr, dtype=np.int64)),
+        shape=(len(texts), len(vocabulary))
+    )
+    matrix.sum_duplicates()
+    matrix.data = 1.0 + np.log(matrix.data)
+    if use_idf:
+        document_frequency = np.bincount(matrix.indices, minlength=len(vocabulary))
+        idf = np.log((1 + len(texts)) / (1 + document_frequency)) + 1.0
+        matrix.data *= idf[matrix.indices]
+
+    row_norms = np.sqrt(np.asarray(matrix.multiply(matrix).sum(axis=1)).ravel())
+    row_norms[row_norms == 0] = 1.0  # Teks kosong tetap vektor nol
+    matrix.data /= np.repeat(row_norms, np.diff(matrix.indptr))
+    return matrix
+
+
+def similar_pairs(matrix: sparse.csr_matrix, threshold: float,
+                  block_rows: int = BLOCK_ROWS) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """(baris, kolom, skor) semua pasangan i < j dengan cosine similarity >= threshold.
+
+    matrix @ matrix.T dihitung per blok block_rows baris; hanya entri di atas threshold yang disimpan.
+    """
+    transposed = matrix.T.tocsr()
+    rows, cols, scores = [], [], []
+    for start in range(0, matrix.shape[0], block_rows):
+        block = (matrix[start:start + block_rows] @ transposed).tocoo()
+        block_rows_global = block.row + start
+        keep = (block.data >= threshold) & (block.col > block_rows_global)
+        rows.append(block_rows_global[keep])
+        cols.append(block.col[keep])
+        scores.append(np.minimum(block.data[keep], 1.0))
+    if not rows:
+        return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64), np.zeros(0)
+    return np.concatenate(rows), np.concatenate(cols), np.concatenate(scores)
+
+
+def similarity_threshold() -> float:
+    return float(os.getenv('SIMILARITY_THRESHOLD', Config.SIMILARITY_THRESHOLD))
+
+
+def collect_items(instansi_list: Iterable[Any], fields: Sequence[str] = ITEM_FIELDS) -> List[SimilarItem]:
+    """Item unik per (instansi, field) dari daftar InstansiData"""
+    items = []
+    seen = set()
+    for instansi in instansi_list:
+        for field in fields:
+            for text in getattr(instansi, field, None) or []:
+                key = (instansi.nama, field, normalize_item(text))
+                if not key[2] or key in seen:
+                    continue
+                seen.add(key)
+                items.append(SimilarItem(instansi.nama, field, str(text).strip()))
+    return items
+
+
+def find_candidate_pairs(instansi_list: Iterable[Any], threshold: Optional[float] = None,
+                         fields: Sequence[str] = ITEM_FIELDS, cross_field: bool = False) -> List[CandidatePair]:
+    """Pasangan item antar instansi dengan similarity >= threshold, skor tertinggi dulu.
+
+    Semua item semua instansi divektorisasi sekali, lalu similarity seluruh pasangan dihitung
+    dalam beberapa perkalian matriks sparse. cross_field=False hanya membandingkan field yang
+    sama (fungsi dengan fungsi, program dengan program, dst.).
+    """
+    threshold = similarity_threshold() if threshold is None else threshold
+    items = collect_items(instansi_list, fields)
+    if len(items) < 2:
+        return []
+
+    rows, cols, scores = similar_pairs(tfidf_matrix([item.text for item in items]), threshold)
+    agency_ids = {name: i for i, name in enumerate(dict.fromkeys(item.instansi for item in items))}
+    agencies = np.array([agency_ids[item.instansi] for item in items])
+    field_ids = np.array([fields.index(item.field) for item in items])
+
+    keep = agencies[rows] != agencies[cols]
+    if not cross_field:
+        keep &= field_ids[rows] == field_ids[cols]
+    rows, cols, scores = rows[keep], cols[keep], scores[keep]
+
+    # Urutan deterministik: skor menurun, lalu urutan item
+    order = np.lexsort((cols, rows, -scores))
+    return [CandidatePair(items[rows[k]], items[cols[k]], round(float(scores[k]), 4)) for k in order]
+
+
+def cluster_candidates(pairs: Sequence[CandidatePair], max_items: int = MAX_CLUSTER_ITEMS) -> List[CandidateCluster]:
+    """Kelompokkan pasangan kandidat menjadi item yang saling terhubung (union-find).
+
+    Pasangan diproses dari skor tertinggi; dua kelompok tidak digabung jika hasilnya melebihi
+    max_items. Urutan hasil: jumlah instansi terbanyak, lalu skor tertinggi.
+    """
+    # Key: id(SimilarItem); item pasangan berasal dari list collect_items yang sama
+    parent: Dict[int, int] = {}
+    members: Dict[int, List[SimilarItem]] = {}
+    scores: Dict[int, float] = {}
+
+    def find(key: int) -> int:
+        while parent[key] != key:
+            parent[key] = parent[parent[key]]
+            key = parent[key]
+        return key
+
+    for pair in sorted(pairs, key=lambda p: -p.score):
+        roots = []
+        for item in (pair.item_a, pair.item_b):
+            key = id(item)
+            if key not in parent:
+                parent[key] = key
+                members[key] = [item]
+                scores[key] = 0.0
+            roots.append(find(key))
+        root_a, root_b = roots
+        if root_a == root_b:
+            continue
+        if len(members[root_a]) + len(members[root_b]) > max_items:
+            continue
+        parent[root_b] = root_a
+        members[root_a].extend(members.pop(root_b))
+        scores[root_a] = max(scores[root_a], scores.pop(root_b), pair.score)
+
+    clusters = [CandidateCluster(members[root], round(scores[root], 4)) for root in members if len(members[root]) > 1]
+    clusters.sort(key=lambda c: (-len(c.instansi), -c.score))
+    return clusters
+
+
+def cross_agency_pair_count(items: Sequence[SimilarItem]) -> int:
+    """Jumlah seluruh pasangan item antar instansi (yang harus dipertimbangkan tanpa penyaringan)"""
+    per_agency = Counter(item.instansi for item in items)
+    return (len(items) ** 2 - sum(n * n for n in per_agency.values())) // 2
+
+
+def match_lists(list1: Sequence[str], list2: Sequence[str],
+                threshold: Optional[float] = None) -> List[Tuple[str, str, float]]:
+    """Pasangan satu-satu (item list1, item list2, skor) dengan skor >= threshold, dipilih greedy dari skor tertinggi"""
+    threshold = similarity_threshold() if threshold is None else threshold
+    list1 = [item for item in list1 if normalize_item(item)]
+    list2 = [item for item in list2 if normalize_item(item)]
+    if not list1 or not list2:
+        return []
+
+    matrix = tfidf_matrix(list1 + list2)
+    similarity = (matrix[:len(list1)] @ matrix[len(list1):].T).toarray()
+    rows, cols = np.nonzero(similarity >= threshold)
+    order = np.lexsort((cols, rows, -similarity[rows, cols]))
+
+    matches = []
+    used1, used2 = set(), set()
+    for k in order:
+        i, j = rows[k], cols[k]
+        if i in used1 or j in used2:
+            continue
+        used1.add(i)
+        used2.add(j)
+        matches.append((list1[i], list2[j], round(float(min(similarity[i, j], 1.0)), 4)))
+    return matches
+
+
+def text_similarity(text1: str, text2: str) -> float:
+    """Cosine similarity n-gram karakter dua teks (tanpa IDF: dua dokumen terlalu sedikit untuk IDF)"""
+    matrix = tfidf_matrix([text1, text2], use_idf=False)
+    return round(float(min(matrix[0].multiply(matrix[1]).sum(), 1.0)), 4)
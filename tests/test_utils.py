@@ -0,0 +1,33 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils import OverlapCalculator  # noqa: E402
+
+
+def test_list_overlap_ignores_duplicate_items():
+    list1 = ['Koordinasi pendidikan', 'koordinasi pendidikan.', '1. Koordinasi Pendidikan', 'Pengelolaan data']
+    list2 = ['Koordinasi pendidikan', 'Koordinasi pendidikan', 'Koordinasi pendidikan']
+
+    result = OverlapCalculator.calculate_list_overlap(list1, list2, threshold=0.5)
+
+    # Setelah duplikat dibuang: {koordinasi pendidikan, pengelolaan data} vs {koordinasi pendidikan}
+    assert result['overlap_count'] == 1
+    assert result['similarity_score'] == 0.5
+
+
+def test_list_overlap_identical_lists_with_duplicates():
+    items = ['Perumusan kebijakan', 'Perumusan kebijakan', 'Evaluasi dan pelaporan']
+
+    result = OverlapCalculator.calculate_list_overlap(items, list(reversed(items)), threshold=0.5)
+
+    assert result['overlap_count'] == 2
+    assert result['similarity_score'] == 1.0
+
+
+def test_list_overlap_empty_items():
+    result = OverlapCalculator.calculate_list_overlap(['', '  ', '-'], ['Koordinasi'], threshold=0.5)
+
+    assert result['overlap_count'] == 0
+    assert result['similarity_score'] == 0
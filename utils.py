@@ -1,8 +1,15 @@
+import logging
 import re
 import unicodedata
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 import pandas as pd
 
+logger = logging.getLogger('sihati')
+
+def notify_log(level: str, message: str):
+    """Notifier default DocumentProcessor/GeminiAnalyzer di luar Streamlit: teruskan ke logging"""
+    getattr(logger, level if level in ('info', 'warning', 'error') else 'info')(message)
+
 class TextProcessor:
     @staticmethod
     def clean_text(text: str) -> str:
@@ -40,26 +47,29 @@ class TextProcessor:
 class OverlapCalculator:
     @staticmethod
     def calculate_text_similarity(text1: str, text2: str) -> float:
-        """Hitung similarity antara dua teks"""
-        from difflib import SequenceMatcher
-        return SequenceMatcher(None, text1.lower(), text2.lower()).ratio()
+        """Hitung similarity antara dua teks (cosine n-gram karakter, lihat similarity_utils)"""
+        from similarity_utils import text_similarity
+        return text_similarity(text1, text2)
     
     @staticmethod
-    def calculate_list_overlap(list1: List[str], list2: List[str]) -> Dict[str, Any]:
-        """Hitung overlap antara dua list"""
-        set1 = set([item.lower().strip() for item in list1])
-        set2 = set([item.lower().strip() for item in list2])
+    def calculate_list_overlap(list1: List[str], list2: List[str], threshold: Optional[float] = None) -> Dict[str, Any]:
+        """Hitung overlap antara dua list; item yang mirip (bukan hanya identik) dipasangkan satu-satu"""
+        from similarity_utils import match_lists, unique_items
         
-        intersection = set1.intersection(set2)
-        union = set1.union(set2)
+        # Duplikat dibuang dulu agar matches dan union dihitung dari koleksi yang sama
+        items1 = unique_items(list1)
+        items2 = unique_items(list2)
+        matches = match_lists(items1, items2, threshold)
         
-        jaccard_similarity = len(intersection) / len(union) if union else 0
-        overlap_items = list(intersection)
+        union = len(items1) + len(items2) - len(matches)
+        jaccard_similarity = len(matches) / union if union else 0
+        overlap_items = [item for item, _, _ in matches]
         
         return {
             'similarity_score': jaccard_similarity,
             'overlap_items': overlap_items,
-            'overlap_count': len(overlap_items)
+            'overlap_count': len(overlap_items),
+            'overlap_pairs': matches  # (item list1, item list2, skor)
         }
 
 class ReportGenerator: